@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import shutil
+import resource
+import platform
+import subprocess
+from datetime import datetime, timezone
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+from preprocess import DocumentPreprocessor  # noqa: E402
+from chunker import DocumentChunker, split_chunk_id  # noqa: E402
+from vectorizer import DocumentVectorizer, faiss  # noqa: E402
+from lexical import BM25Index, reciprocal_rank_fusion  # noqa: E402
+from llm_client import LLMClient  # noqa: E402
+from generator import AnswerGenerator  # noqa: E402
+from mock_llm_server import MockLLMServer  # noqa: E402
+
+# Karşılaştırmada izlenen metrikler: (aşama, metrik) -> daha iyi yön
+TRACKED_METRICS = {
+    ("preprocess", "docs_per_sec"): "higher",
+    ("embedding", "passages_per_sec"): "higher",
+    ("index_build", "seconds"): "lower",
+    ("index_build", "rss_delta_mb"): "lower",
+    ("query", "p50_ms"): "lower",
+    ("query", "p95_ms"): "lower",
+    ("query", "p99_ms"): "lower",
+    ("query", "encode_p50_ms"): "lower",
+    ("query", "encode_p95_ms"): "lower",
+    ("query", "search_p50_ms"): "lower",
+    ("query", "search_p95_ms"): "lower",
+    ("query", "batch_queries_per_sec"): "higher",
+    ("recall", "dense_recall_at_k"): "higher",
+    ("recall", "hybrid_recall_at_k"): "higher",
+    ("generator", "p50_ms"): "lower",
+    ("generator", "p95_ms"): "lower",
+}
+
+
+def percentiles(timings_ms, prefix=""):
+    """Milisaniye cinsinden ölçümlerin p50/p95/p99 değerleri (anahtarlar `prefix` ile başlar)."""
+    p50, p95, p99 = np.percentile(timings_ms, [50, 95, 99]).tolist() if timings_ms else (0.0, 0.0, 0.0)
+    return {f"{prefix}p50_ms": p50, f"{prefix}p95_ms": p95, f"{prefix}p99_ms": p99}
+
+
+def rss_mb():
+    """Sürecin güncel bellek kullanımı (MB); /proc yoksa en yüksek kullanım (ru_maxrss, KB)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_preprocess(raw_folder, processed_folder, max_workers=None):
+    preprocessor = DocumentPreprocessor(input_folder=raw_folder, output_folder=processed_folder,
+                                        max_workers=max_workers)
+    n_files = len(os.listdir(raw_folder))
+    start = time.perf_counter()
+    preprocessor.process_documents(force=True)
+    elapsed = time.perf_counter() - start
+    return {"documents": n_files, "seconds": elapsed, "docs_per_sec": n_files / elapsed if elapsed else 0.0}
+
+
+def bench_embedding(vectorizer, texts):
+    start = time.perf_counter()
+    vectors = vectorizer._embed_batch(texts)
+    elapsed = time.perf_counter() - start
+    return vectors, {"passages": len(texts), "seconds": elapsed,
+                     "passages_per_sec": len(texts) / elapsed if elapsed else 0.0}
+
+
+def bench_index_build(vectorizer, chunk_ids, texts, vectors):
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    for offset in range(0, len(chunk_ids), vectorizer.add_block_size):
+        block = slice(offset, offset + vectorizer.add_block_size)
+        vectorizer._add_block(chunk_ids[block], texts[block], vectors[block])
+    vectorizer._flush_pending()
+    elapsed = time.perf_counter() - start
+    return {"vectors": int(vectorizer.index.ntotal), "seconds": elapsed,
+            "index_type": vectorizer.active_config["type"],
+            "index_mb": len(faiss.serialize_index(vectorizer.index)) / 2 ** 20,
+            "rss_delta_mb": rss_mb() - rss_before}
+
+
+def bench_query(vectorizer, queries, top_k):
+    """
+    Sorgu gecikmesi: p50/p95/p99 sorgu kodlama + arama toplamıdır (kullanıcının beklediği süre);
+    iki parça ayrıca `encode_*` ve `search_*` olarak raporlanır.
+    """
+    encode, search, total = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        vectors = vectorizer.embed_queries([query])
+        encoded = time.perf_counter()
+        vectorizer.search_many([query], top_k=top_k, query_vectors=vectors)
+        end = time.perf_counter()
+        encode.append((encoded - start) * 1000)
+        search.append((end - encoded) * 1000)
+        total.append((end - start) * 1000)
+    start = time.perf_counter()
+    vectorizer.search_many(queries, top_k=top_k, query_vectors=vectorizer.embed_queries(queries))
+    elapsed = time.perf_counter() - start
+    return {"queries": len(queries), **percentiles(total), **percentiles(encode, "encode_"),
+            **percentiles(search, "search_"),
+            "batch_queries_per_sec": len(queries) / elapsed if elapsed else 0.0}
+
+
+def bench_recall(vectorizer, lexical_index, answers, query_vectors, top_k):
+    """Beklenen belgenin ilk `top_k` pasaj arasında çıkma oranı (yoğun ve hibrit)."""
+    queries = [answer["query"] for answer in answers]
+    expected = [answer["doc_id"] for answer in answers]
+    dense = vectorizer.search_many(queries, top_k=top_k * 4, query_vectors=query_vectors)
+    dense_hits = hybrid_hits = 0
+    for query, doc_id, dense_results in zip(queries, expected, dense):
+        dense_ids = [chunk_id for chunk_id, _ in dense_results]
+        dense_hits += doc_id in {split_chunk_id(c)[0] for c in dense_ids[:top_k]}
+        lexical_ids = [chunk_id for chunk_id, _ in lexical_index.search(query, top_k=top_k * 4)]
+        fused = reciprocal_rank_fusion([dense_ids, lexical_ids], top_k=top_k)
+        hybrid_hits += doc_id in {split_chunk_id(c)[0] for c, _ in fused}
+    return {"queries": len(queries), "k": top_k,
+            "dense_recall_at_k": dense_hits / len(queries) if queries else 0.0,
+            "hybrid_recall_at_k": hybrid_hits / len(queries) if queries else 0.0}
+
+
+def bench_generator(queries, contexts, latency, token_delay):
+    """Yerel mock LLM'ye karşı tam yanıt ve akışta ilk parça gecikmesi."""
+    with MockLLMServer(latency=latency, token_delay=token_delay) as server:
+        generator = AnswerGenerator(client=LLMClient(server.url, "benchmark"))
+        timings, first_token = [], []
+        for query, documents in zip(queries, contexts):
+            start = time.perf_counter()
+            generator.generate_answer(query, documents)
+            timings.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            for _ in generator.generate_answer_stream(query, documents):
+                first_token.append((time.perf_counter() - start) * 1000)
+                break
+        generator.client.close()
+    return {"requests": len(timings), **percentiles(timings),
+            "stream_first_token_p50_ms": float(np.percentile(first_token, 50)) if first_token else 0.0}
+
+
+def compare_results(current, baseline, tolerance=0.1):
+    """
+    İki sonuç dosyasını karşılaştırır; `tolerance` oranından fazla kötüleşen metrikleri döndürür.
+    :return: [(aşama, metrik, önceki, şimdiki), ...]
+    """
+    regressions = []
+    for (stage, metric), better in TRACKED_METRICS.items():
+        before = baseline.get("stages", {}).get(stage, {}).get(metric)
+        after = current.get("stages", {}).get(stage, {}).get(metric)
+        if before is None or after is None or before == 0:
+            continue
+        change = (after - before) / abs(before)
+        if (better == "higher" and change < -tolerance) or (better == "lower" and change > tolerance):
+            regressions.append((stage, metric, before, after))
+    return regressions
+
+
+def run(args):
+    raw_folder = os.path.join(args.workdir, "raw")
+    processed_folder = os.path.join(args.workdir, "processed")
+    stages = {}
+    for folder in (raw_folder, processed_folder):
+        shutil.rmtree(folder, ignore_errors=True)
+
+    answers = generate_corpus(raw_folder, args.documents, tuple(args.formats), args.seed)
+    answers = answers[:args.queries]
+    stages["preprocess"] = bench_preprocess(raw_folder, processed_folder, args.workers)
+
+    chunks = list(DocumentChunker().chunk_folder(processed_folder))
+    chunk_ids = [chunk.chunk_id for chunk in chunks]
+    texts = [chunk.text for chunk in chunks]
+    vectorizer = DocumentVectorizer(vector_store='faiss', model_name=args.model,
+                                    batch_size=args.batch_size,
+                                    index_config={"type": args.index_type, "nlist": args.nlist})
+    vectors, stages["embedding"] = bench_embedding(vectorizer, texts)
+    stages["index_build"] = bench_index_build(vectorizer, chunk_ids, texts, vectors)
+
+    start = time.perf_counter()
+    lexical_index = BM25Index()
+    lexical_index.add_many(zip(chunk_ids, texts))
+    stages["lexical_build"] = {"passages": len(lexical_index), "seconds": time.perf_counter() - start}
+
+    stages["query"] = bench_query(vectorizer, [answer["query"] for answer in answers], args.k)
+    query_vectors = vectorizer.embed_queries([answer["query"] for answer in answers])
+    stages["recall"] = bench_recall(vectorizer, lexical_index, answers, query_vectors, args.k)
+
+    llm_answers = answers[:args.llm_queries]
+    text_of = dict(zip(chunk_ids, texts))
+    contexts = [[(chunk_id, text_of[chunk_id], score) for chunk_id, score in hits]
+                for hits in vectorizer.search_many([a["query"] for a in llm_answers], top_k=3,
+                                                   query_vectors=query_vectors[:len(llm_answers)])]
+    stages["generator"] = bench_generator([a["query"] for a in llm_answers], contexts,
+                                          args.llm_latency, args.llm_token_delay)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "stages": stages,
+    }
+
+
+# Kullanım
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Uçtan uca RAG performans ölçümü (sentetik derlem)")
+    parser.add_argument("--documents", type=int, default=100, help="Belge sayısı (100 - 100000)")
+    parser.add_argument("--formats", nargs="+", default=["txt", "docx", "pdf"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default="benchmarks/work")
+    parser.add_argument("--workers", type=int, default=None, help="Çıkarım süreç sayısı")
+    parser.add_argument("--model", default="all-mpnet-base-v2")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=500, help="Bilinen yanıtlı en fazla sorgu sayısı")
+    parser.add_argument("--llm-queries", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Mock LLM yanıt gecikmesi (sn)")
+    parser.add_argument("--llm-token-delay", type=float, default=0.0)
+    parser.add_argument("--output", help="Sonuç JSON dosyası (default: benchmarks/results/<zaman>_<commit>.json)")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç JSON dosyası")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Gerileme sayılacak en küçük oran")
+    args = parser.parse_args()
+
+    results = run(args)
+    output = args.output or os.path.join(
+        "benchmarks", "results",
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{results['meta']['commit'] or 'nocommit'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(json.dumps(results["stages"], indent=2))
+    print(f"💾 Sonuçlar kaydedildi: {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_results(results, json.load(f), args.tolerance)
+        for stage, metric, before, after in regressions:
+            print(f"❌ Gerileme: {stage}.{metric} {before:.3f} -> {after:.3f}")
+        if regressions:
+            sys.exit(1)
+        print("✅ Önceki sonuçlara göre gerileme yok.")
@@ -0,0 +1,127 @@
+import os
+import random
+
+# Sentetik mevzuat metinleri için sözcük havuzları
+TOPICS = ["Borçlar", "Ticaret", "İş", "Kira", "Tüketicinin Korunması", "Vergi Usul", "İcra ve İflas",
+          "Kat Mülkiyeti", "Sermaye Piyasası", "Bankacılık", "Sigortacılık", "Fikir ve Sanat Eserleri",
+          "Kişisel Verilerin Korunması", "Rekabetin Korunması", "Maden", "Orman", "Turizm", "Enerji"]
+SUBJECTS = ["kiracı", "kiraya veren", "işveren", "işçi", "satıcı", "alıcı", "borçlu", "alacaklı",
+            "yüklenici", "iş sahibi", "vekil", "müvekkil", "kefil", "sigortacı", "sigortalı", "ortak",
+            "yönetim kurulu", "genel kurul", "tüketici", "sağlayıcı", "veri sorumlusu", "ilgili kişi",
+            "mirasçı", "vasi", "noter", "icra müdürü", "hakem", "bilirkişi", "kurum", "bakanlık"]
+OBJECTS = ["kira bedelini", "ücreti", "satış bedelini", "teminatı", "faizi", "tazminatı", "cezai şartı",
+           "bildirimi", "itirazı", "fesih ihbarını", "belgeleri", "hesap özetini", "raporu", "defterleri",
+           "kişisel verileri", "sözleşme örneğini", "payı", "aidatı", "vergiyi", "harcı", "avansı",
+           "makbuzu", "ihtarnameyi", "izin belgesini", "ruhsatı", "beyannameyi", "muhafaza süresini"]
+MANNERS = ["yazılı olarak", "gecikmeksizin", "otuz gün içinde", "yedi gün içinde", "bir yıl süreyle",
+           "noter aracılığıyla", "elektronik ortamda", "makul süre içinde", "her ayın sonunda",
+           "sözleşmede belirtilen yerde", "yönetmelikte öngörülen usulle", "iki nüsha halinde"]
+VERBS = ["ödemekle yükümlüdür", "teslim eder", "saklar", "bildirir", "iade eder", "talep edebilir",
+         "düzenler", "yayımlar", "onaylar", "iptal edebilir", "denetler", "tescil ettirir"]
+CONDITIONS = ["Aksi kararlaştırılmadıkça", "Sözleşmenin sona ermesi halinde", "Temerrüt durumunda",
+              "Kanunda aksine hüküm bulunmadıkça", "Yazılı talep üzerine", "Mücbir sebep halleri saklıdır;",
+              "Tarafların anlaşmasıyla", "Hâkim, hakkaniyete uygun olarak"]
+
+
+def _sentence(rng):
+    return (f"{rng.choice(CONDITIONS)} {rng.choice(SUBJECTS)}, {rng.choice(OBJECTS)} "
+            f"{rng.choice(MANNERS)} {rng.choice(VERBS)}.")
+
+
+def make_document(index, rng, articles=(5, 15), paragraphs=(1, 3)):
+    """
+    Tek bir sentetik kanun metni ve bilinen yanıtlı bir soru üretir.
+    :return: (metin, soru, yanıtın geçtiği madde numarası)
+    """
+    law_no = 1000 + index
+    topic = rng.choice(TOPICS)
+    lines = [f"{law_no} SAYILI {topic.upper()} KANUNU", ""]
+    article_count = rng.randint(*articles)
+    answer_article = rng.randint(1, article_count)
+    query = None
+    for article in range(1, article_count + 1):
+        body = []
+        for paragraph in range(1, rng.randint(*paragraphs) + 1):
+            body.append(f"({paragraph}) {_sentence(rng)} {_sentence(rng)}")
+        if article == answer_article:
+            # Soru, bu maddeye özgü bir hükmün yeniden ifadesidir
+            subject, obj, manner, verb = (rng.choice(SUBJECTS), rng.choice(OBJECTS),
+                                          rng.choice(MANNERS), rng.choice(VERBS))
+            body.append(f"({len(body) + 1}) {law_no} sayılı {topic} Kanunu uyarınca {subject}, "
+                        f"{obj} {manner} {verb}.")
+            query = f"{topic} Kanununa göre {subject} {obj} nasıl {verb.split()[0]}?"
+        lines.append(f"MADDE {article} - " + "\n".join(body))
+    return "\n".join(lines) + "\n", query, str(answer_article)
+
+
+def _write_txt(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _write_docx(path, text):
+    from docx import Document
+    document = Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def _write_pdf(path, text, lines_per_page=50):
+    import fitz  # PyMuPDF
+    document = fitz.open()
+    lines = text.splitlines()
+    for start in range(0, len(lines), lines_per_page):
+        page = document.new_page()
+        page.insert_textbox(page.rect + (40, 40, -40, -40), "\n".join(lines[start:start + lines_per_page]),
+                            fontsize=8)
+    document.save(path)
+    document.close()
+
+
+WRITERS = {"txt": _write_txt, "docx": _write_docx, "pdf": _write_pdf}
+
+
+def generate_corpus(output_folder, n_documents=100, formats=("txt", "docx", "pdf"), seed=42):
+    """
+    Tekrarlanabilir sentetik Türkçe mevzuat derlemi üretir.
+    - Biçimler sırayla dağıtılır (ör. txt, docx, pdf, txt, ...).
+    - Yerleşik PDF yazı tipleri Türkçe karakterleri taşımadığından bilinen yanıtlı sorular
+      yalnızca TXT ve DOCX belgelerinden seçilir; PDF'ler çıkarım hızı ve çeldirici olarak kullanılır.
+    :param output_folder: Belgelerin yazılacağı klasör (ör. benchmarks/work/raw)
+    :param n_documents: Belge sayısı (100 - 100k)
+    :param formats: Kullanılacak dosya biçimleri
+    :param seed: Rastgelelik tohumu; aynı tohum aynı derlemi üretir
+    :return: [{"query": ..., "doc_id": ..., "article": ...}, ...] bilinen yanıtlar
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    rng = random.Random(seed)
+    answers = []
+    for index in range(n_documents):
+        fmt = formats[index % len(formats)]
+        text, query, article = make_document(index, rng)
+        doc_id = f"kanun_{index:06d}.{fmt}"
+        WRITERS[fmt](os.path.join(output_folder, doc_id), text)
+        if fmt != "pdf":
+            answers.append({"query": query, "doc_id": doc_id, "article": article})
+
+    print(f"🧪 {n_documents} sentetik belge üretildi: {output_folder}")
+    return answers
+
+
+# Kullanım
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Sentetik Türkçe mevzuat derlemi üretir")
+    parser.add_argument("--output", default="benchmarks/work/raw")
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--formats", nargs="+", default=["txt", "docx", "pdf"], choices=sorted(WRITERS))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    answers = generate_corpus(args.output, args.documents, tuple(args.formats), args.seed)
+    answers_path = os.path.join(os.path.dirname(os.path.abspath(args.output)), "answers.json")
+    with open(answers_path, 'w', encoding='utf-8') as f:
+        json.dump(answers, f, ensure_ascii=False, indent=1)
+    print(f"📝 Bilinen yanıtlar: {answers_path}")
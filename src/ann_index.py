@@ -0,0 +1,326 @@
+import time
+import numpy as np
+from utils import lazy_import
+
+faiss = lazy_import("faiss")
+
+INDEX_TYPES = ('flat', 'ivf_flat', 'ivf_pq', 'hnsw')
+ENCODINGS = ('float32', 'fp16', 'sq8', 'pq', 'opq')
+
+DEFAULT_INDEX_CONFIG = {
+    "type": "flat",          # flat | ivf_flat | ivf_pq | hnsw
+    "nlist": 1024,           # IVF küme sayısı
+    "nprobe": 16,            # IVF aramada bakılacak küme sayısı
+    "pq_m": 16,              # PQ alt vektör sayısı (embedding_dim'i bölmeli)
+    "pq_nbits": 8,           # PQ alt vektör başına bit
+    "hnsw_m": 32,            # HNSW düğüm başına bağlantı sayısı
+    "ef_construction": 200,  # HNSW kurulum derinliği
+    "ef_search": 64,         # HNSW arama derinliği
+    "train_size": 50_000,    # Eğitim örneği toplanırken beklenecek vektör sayısı
+    "encoding": "float32",   # Vektör kodlaması: float32 | fp16 | sq8 | pq | opq
+    "rescore_factor": 0,     # >0 ise top_k x bu kadar aday diskteki tam vektörlerle yeniden skorlanır
+    "compact_ratio": 0.2,    # HNSW'de silinmiş vektör oranı bunu aşınca dizin yeniden kurulur
+}
+
+
+def resolve_index_config(index_config=None):
+    """Kullanıcı ayarlarını varsayılanlarla birleştirir ve doğrular."""
+    config = dict(DEFAULT_INDEX_CONFIG)
+    config.update(index_config or {})
+    if config["type"] not in INDEX_TYPES:
+        raise ValueError(f"❌ Geçersiz dizin tipi: {config['type']}. Seçenekler: {', '.join(INDEX_TYPES)}")
+    if config["encoding"] not in ENCODINGS:
+        raise ValueError(f"❌ Geçersiz kodlama: {config['encoding']}. Seçenekler: {', '.join(ENCODINGS)}")
+    return config
+
+
+def _scalar_quantizer_type(encoding):
+    return faiss.ScalarQuantizer.QT_fp16 if encoding == 'fp16' else faiss.ScalarQuantizer.QT_8bit
+
+
+def build_faiss_index(dim, config):
+    """
+    Ayarlara göre (henüz eğitilmemiş olabilecek) temel FAISS dizinini oluşturur.
+    `encoding` vektörlerin dizinde nasıl saklanacağını belirler: fp16 ve sq8 skaler nicemleme
+    (vektör başına 2d / d bayt), pq ve opq ürün nicemleme (vektör başına pq_m bayt); opq,
+    PQ'dan önce öğrenilmiş bir döndürme uygular. ivf_pq her durumda PQ kodu saklar.
+    :param dim: Vektör boyutu
+    :param config: `resolve_index_config` çıktısı
+    """
+    index_type = config["type"]
+    encoding = config["encoding"]
+    if index_type == 'ivf_pq' and encoding in ('float32', 'fp16', 'sq8'):
+        encoding = 'pq'
+
+    if index_type == 'flat':
+        if encoding == 'float32':
+            index = faiss.IndexFlatL2(dim)
+        elif encoding in ('fp16', 'sq8'):
+            index = faiss.IndexScalarQuantizer(dim, _scalar_quantizer_type(encoding))
+        else:
+            index = faiss.IndexPQ(dim, config["pq_m"], config["pq_nbits"])
+    elif index_type == 'hnsw':
+        if encoding == 'float32':
+            index = faiss.IndexHNSWFlat(dim, config["hnsw_m"])
+        elif encoding in ('fp16', 'sq8'):
+            index = faiss.IndexHNSWSQ(dim, _scalar_quantizer_type(encoding), config["hnsw_m"])
+        else:
+            index = faiss.IndexHNSWPQ(dim, config["pq_m"], config["hnsw_m"], config["pq_nbits"])
+        index.hnsw.efConstruction = config["ef_construction"]
+    else:
+        quantizer = faiss.IndexFlatL2(dim)
+        if encoding == 'float32':
+            index = faiss.IndexIVFFlat(quantizer, dim, config["nlist"])
+        elif encoding in ('fp16', 'sq8'):
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, config["nlist"],
+                                                  _scalar_quantizer_type(encoding))
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, config["nlist"], config["pq_m"], config["pq_nbits"])
+
+    if encoding == 'opq':
+        index = faiss.IndexPreTransform(faiss.OPQMatrix(dim, config["pq_m"]), index)
+    return index
+
+
+def min_training_points(config):
+    """Dizinin eğitilebilmesi için gereken en az vektör sayısı (eğitim gerekmiyorsa 0)."""
+    needed = 0
+    if config["type"] in ('ivf_flat', 'ivf_pq'):
+        needed = config["nlist"]
+    if config["type"] == 'ivf_pq' or config["encoding"] in ('pq', 'opq'):
+        needed = max(needed, 2 ** config["pq_nbits"])
+    elif config["encoding"] == 'sq8':
+        needed = max(needed, 1)
+    return needed
+
+
+def _base_index(index):
+    """ID eşlemeli ve ön dönüşümlü sarmalayıcıların altındaki dizini döndürür."""
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return index
+
+
+def apply_search_params(index, config):
+    """nprobe / efSearch gibi arama zamanı ayarlarını (ID eşlemeli sarmalayıcı dahil) uygular."""
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = config["ef_search"]
+    elif isinstance(base, faiss.IndexIVF):
+        base.nprobe = config["nprobe"]
+
+
+def filtered_search_params(index, config, selector):
+    """
+    Kimlik seçicisini dizin aramasına iten arama parametreleri; seçilmeyen vektörler mesafe
+    hesabına girmez. IndexPQ (flat + pq/opq) seçici desteklemediğinden None döner; bu durumda
+    çağıran fazladan aday isteyip sonuçları kendisi süzer.
+    """
+    base = _base_index(index)
+    if isinstance(base, faiss.IndexPQ):
+        return None
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=config["ef_search"])
+    if isinstance(base, faiss.IndexIVF):
+        # IVF parametreleri nprobe'u dizindeki değerle değil, burada verilenle arar
+        return faiss.SearchParametersIVF(sel=selector, nprobe=config["nprobe"])
+    return faiss.SearchParameters(sel=selector)
+
+
+def uses_native_ids(index):
+    """
+    Dizin dış kimlikleri kendisi saklıyorsa True (IVF: kimlikler ters listelerde tutulur).
+    Bu dizinler IndexIDMap2 ile sarmalanmamalıdır: sarmalayıcı silmede kimlik tablosunu sıkıştırır,
+    ters listelerdeki iç kimlikler ise değişmez ve sonuçlar yanlış pasajlara eşlenir.
+    """
+    return isinstance(_base_index(index), faiss.IndexIVF)
+
+
+def unwrap_native_ids(index):
+    """
+    Eski düzende IndexIDMap2 ile sarmalanmış IVF dizinini, ters listelerdeki iç kimlikleri dış
+    kimliklere çevirerek sarmalayıcısız dizine dönüştürür; diğer dizinleri olduğu gibi döndürür.
+    """
+    if not isinstance(index, faiss.IndexIDMap) or not uses_native_ids(index):
+        return index
+    inner = faiss.clone_index(faiss.downcast_index(index.index))
+    id_map = faiss.vector_to_array(index.id_map)
+    base = _base_index(inner)
+    invlists, code_size = base.invlists, base.code_size
+    damaged = False
+    for list_no in range(base.nlist):
+        size = invlists.list_size(list_no)
+        if size == 0:
+            continue
+        internal = faiss.rev_swig_ptr(invlists.get_ids(list_no), size).copy()
+        codes = faiss.rev_swig_ptr(invlists.get_codes(list_no), size * code_size).copy()
+        damaged = damaged or bool((internal >= len(id_map)).any())
+        external = np.ascontiguousarray(id_map[np.minimum(internal, len(id_map) - 1)], dtype='int64')
+        invlists.update_entries(list_no, 0, size, faiss.swig_ptr(external), faiss.swig_ptr(codes))
+    if damaged:
+        print("⚠️ IVF dizininde silme sonrası bozulmuş kimlikler var; belgeler yeniden işlenmelidir.")
+    return inner
+
+
+def supports_remove(index):
+    """Dizinin `remove_ids` desteği olup olmadığını döndürür (HNSW desteklemez)."""
+    base = _base_index(index)
+    return not isinstance(base, faiss.IndexHNSW)
+
+
+def mmap_read_flags(index_type):
+    """
+    Dizini salt okunur, bellek eşlemeli okumak için `faiss.read_index` bayrakları.
+    Vektör kodları kopyalanmadan dosyadan eşlenir; aynı dosyayı açan süreçler sayfa önbelleğini
+    paylaşır. IVF listeleri yalnızca IO_FLAG_MMAP ile eşlenebilir.
+    """
+    if index_type in ('ivf_flat', 'ivf_pq'):
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def _latency_percentiles(index, queries, k):
+    """Sorguları tek tek arar; milisaniye cinsinden p50/p99 gecikmeyi ve sonuçları döndürür."""
+    timings = []
+    indices = np.empty((len(queries), k), dtype='int64')
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, found = index.search(query[None, :], k)
+        timings.append((time.perf_counter() - start) * 1000)
+        indices[i] = found[0]
+    return float(np.percentile(timings, 50)), float(np.percentile(timings, 99)), indices
+
+
+def recall_at_k(found, ground_truth):
+    """Bulunan ilk k sonucun, kesin (flat) ilk k sonuçla ortalama örtüşme oranı."""
+    k = ground_truth.shape[1]
+    hits = [len(set(f[f != -1]) & set(g)) for f, g in zip(found, ground_truth)]
+    return float(np.mean(hits)) / k
+
+
+def _build_filled_index(vectors, config):
+    index = build_faiss_index(vectors.shape[1], config)
+    if not index.is_trained:
+        sample = vectors[np.random.default_rng(0).permutation(len(vectors))[:config["train_size"]]]
+        index.train(sample)
+    index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+
+def evaluate_index(vectors, queries, index_config, k=10, sweep=None):
+    """
+    Seçilen dizin tipini, aynı vektörler üzerindeki kesin (flat) dizine karşı ölçer.
+    :param vectors: Dizine eklenecek vektörler (N x d, float32)
+    :param queries: Sorgu vektörleri (Q x d, float32)
+    :param index_config: Dizin ayarları (bkz. `DEFAULT_INDEX_CONFIG`)
+    :param k: recall@k için k
+    :param sweep: Denenecek nprobe (IVF) veya efSearch (HNSW) değerleri
+    :return: [{"type", "param", "recall@k", "p50_ms", "p99_ms", "build_s"}, ...]
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    config = resolve_index_config(index_config)
+    dim = vectors.shape[1]
+
+    flat = faiss.IndexFlatL2(dim)
+    flat.add(vectors)
+    flat_p50, flat_p99, ground_truth = _latency_percentiles(flat, queries, k)
+    rows = [{"type": "flat", "param": None, f"recall@{k}": 1.0,
+             "p50_ms": flat_p50, "p99_ms": flat_p99, "build_s": 0.0}]
+    if config["type"] == 'flat':
+        return rows
+
+    start = time.perf_counter()
+    index = _build_filled_index(vectors, config)
+    build_seconds = time.perf_counter() - start
+
+    param_name = "ef_search" if config["type"] == 'hnsw' else "nprobe"
+    for value in sweep or [config[param_name]]:
+        config[param_name] = value
+        apply_search_params(index, config)
+        p50, p99, found = _latency_percentiles(index, queries, k)
+        rows.append({"type": config["type"], "param": f"{param_name}={value}",
+                     f"recall@{k}": recall_at_k(found, ground_truth),
+                     "p50_ms": p50, "p99_ms": p99, "build_s": build_seconds})
+    return rows
+
+
+def compression_report(vectors, queries, index_config=None, k=10, encodings=ENCODINGS, rescore_factor=4):
+    """
+    Vektör kodlamalarının bellek kazancını ve recall kaybını karşılaştırır.
+    Yeniden skorlama, diskteki depo gibi float16'ya indirilmiş tam vektörlerle yapılır.
+    :param vectors: Dizine eklenecek vektörler (N x d, float32)
+    :param queries: Sorgu vektörleri (Q x d, float32)
+    :param index_config: Dizin tipi ve PQ/IVF ayarları (`encoding` her satırda değiştirilir)
+    :param k: recall@k için k
+    :param encodings: Karşılaştırılacak kodlamalar
+    :param rescore_factor: Yeniden skorlamada top_k x bu kadar aday alınır (0: yeniden skorlama yok)
+    :return: [{"encoding", "bytes_per_vector", "index_mb", "memory_saved", "recall@k",
+               "recall@k_rescored", "p50_ms"}, ...]
+    """
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    flat = faiss.IndexFlatL2(vectors.shape[1])
+    flat.add(vectors)
+    _, ground_truth = flat.search(queries, k)
+    stored = vectors.astype('float16').astype('float32')
+
+    raw_bytes = 4 * vectors.size  # Sıkıştırılmamış float32 vektörler
+    rows = []
+    for encoding in encodings:
+        config = resolve_index_config({**(index_config or {}), "encoding": encoding})
+        index = _build_filled_index(vectors, config)
+        size = len(faiss.serialize_index(index))
+        p50, _, found = _latency_percentiles(index, queries, k)
+        row = {"encoding": encoding, "bytes_per_vector": size / len(vectors),
+               "index_mb": size / 2 ** 20, "memory_saved": 1 - size / raw_bytes,
+               f"recall@{k}": recall_at_k(found, ground_truth), "p50_ms": p50}
+        if rescore_factor > 0:
+            _, candidates = index.search(queries, k * rescore_factor)
+            exact = ((stored[np.where(candidates >= 0, candidates, 0)] - queries[:, None, :]) ** 2).sum(axis=2)
+            exact[candidates < 0] = np.inf
+            order = np.argsort(exact, axis=1, kind='stable')[:, :k]
+            row[f"recall@{k}_rescored"] = recall_at_k(np.take_along_axis(candidates, order, axis=1),
+                                                      ground_truth)
+        rows.append(row)
+    return rows
+
+
+# Kullanım: python src/ann_index.py --type hnsw --sweep 16 32 64 128
+#           python src/ann_index.py --type flat --compression
+if __name__ == "__main__":
+    import argparse
+    from chunker import DocumentChunker
+    from vectorizer import DocumentVectorizer
+
+    parser = argparse.ArgumentParser(description="FAISS dizin tipi için recall@k ve gecikme ölçümü")
+    parser.add_argument("--type", default="hnsw", choices=INDEX_TYPES)
+    parser.add_argument("--processed-folder", default="data/processed")
+    parser.add_argument("--queries", type=int, default=200, help="Pasajlardan örneklenecek sorgu sayısı")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=DEFAULT_INDEX_CONFIG["nlist"])
+    parser.add_argument("--sweep", type=int, nargs="*", help="nprobe (IVF) veya efSearch (HNSW) değerleri")
+    parser.add_argument("--compression", action="store_true",
+                        help="Kodlamaların bellek kazancı / recall kaybı raporu")
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    args = parser.parse_args()
+
+    vectorizer = DocumentVectorizer(vector_store='faiss')
+    texts = [chunk.text for chunk in DocumentChunker().chunk_folder(args.processed_folder)]
+    corpus = vectorizer._embed_batch(texts)
+    queries = corpus[np.random.default_rng(1).permutation(len(corpus))[:args.queries]]
+
+    if args.compression:
+        print(f"{'kodlama':<8} {'bayt/vektör':>12} {'MB':>8} {'kazanç':>7} {'recall':>7} {'yeniden skorlu':>15}")
+        for row in compression_report(corpus, queries, {"type": args.type, "nlist": args.nlist},
+                                      k=args.k, rescore_factor=args.rescore_factor):
+            rescored = row.get(f"recall@{args.k}_rescored", float("nan"))
+            print(f"{row['encoding']:<8} {row['bytes_per_vector']:>12.1f} {row['index_mb']:>8.2f} "
+                  f"{row['memory_saved']:>7.1%} {row[f'recall@{args.k}']:>7.3f} {rescored:>15.3f}")
+    else:
+        for row in evaluate_index(corpus, queries, {"type": args.type, "nlist": args.nlist},
+                                  k=args.k, sweep=args.sweep):
+            print(f"📊 {row}")
@@ -0,0 +1,95 @@
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from tracing import record_cache
+
+
+class SemanticAnswerCache:
+    """
+    Anlamsal yanıt önbelleği.
+    - Anahtar: sorgu vektörü (kosinüs benzerliği eşiği) + getirilen pasaj kimlikleri + vektör deposu ve
+      dizin sürümü.
+    - Aynı pasajlar üzerinden sorulan, farklı yazılmış ama anlamca aynı sorular LLM'ye gitmez.
+    - Kayıtlar sürüm başına tutulur: yeni sürüm eski kayıtlara isabet etmez ama onları silmez; FAISS ile
+      Chroma arasında geçiş yapmak iki deponun önbelleğini de korur. Eski kayıtlar TTL ve LRU ile atılır.
+    """
+
+    def __init__(self, similarity_threshold=0.95, max_entries=1000, ttl_seconds=86400):
+        """
+        :param similarity_threshold: İki sorgunun aynı sayılması için gereken en düşük kosinüs benzerliği
+        :param max_entries: En fazla tutulacak yanıt sayısı (aşılırsa en eski kullanılan atılır)
+        :param ttl_seconds: Yanıtın geçerli kalacağı süre (sn)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # entry_id -> (bucket, vector, answer, created)
+        self._buckets = {}             # (vector_store, index_version, frozenset(doc_ids)) -> {entry_id, ...}
+        self._next_id = 0
+        self._lock = threading.Lock()  # Streamlit oturumları aynı önbelleği paylaşır
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype='float32')
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _drop(self, entry_id):
+        bucket = self._entries.pop(entry_id)[0]
+        members = self._buckets[bucket]
+        members.discard(entry_id)
+        if not members:
+            del self._buckets[bucket]
+
+    def lookup(self, query_vector, doc_ids, index_version, vector_store=None):
+        """
+        Benzer bir sorunun aynı pasajlarla üretilmiş yanıtını döndürür.
+        :param query_vector: Sorgu gömmesi
+        :param doc_ids: Getirilen pasaj kimlikleri
+        :param index_version: Dizinin güncel sürümü
+        :param vector_store: Yanıtın üretildiği vektör deposu ("faiss" veya "chroma")
+        :return: Önbellekteki yanıt veya None
+        """
+        with self._lock:
+            candidates = list(self._buckets.get((vector_store, index_version, frozenset(doc_ids)), ()))
+            now = time.time()
+            for entry_id in candidates:
+                if now - self._entries[entry_id][3] >= self.ttl_seconds:
+                    self._drop(entry_id)
+            candidates = [entry_id for entry_id in candidates if entry_id in self._entries]
+            if candidates:
+                vectors = np.vstack([self._entries[entry_id][1] for entry_id in candidates])
+                similarities = vectors @ self._normalize(query_vector)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry_id = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    record_cache("answer", True)
+                    return self._entries[entry_id][2]
+            self.misses += 1
+            record_cache("answer", False)
+            return None
+
+    def store(self, query_vector, doc_ids, index_version, answer, vector_store=None):
+        """Üretilen yanıtı dizin sürümü ve vektör deposuyla etiketleyerek önbelleğe ekler."""
+        with self._lock:
+            bucket = (vector_store, index_version, frozenset(doc_ids))
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (bucket, self._normalize(query_vector), answer, time.time())
+            self._buckets.setdefault(bucket, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
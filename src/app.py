@@ -1,11 +1,37 @@
+import os
 import streamlit as st
 from preprocess import DocumentPreprocessor
-from vectorizer import DocumentVectorizer
-from retriever import DocumentRetriever
-from generator import AnswerGenerator
+from resources import ResourceManager
+from answer_cache import SemanticAnswerCache
+from chunker import DocumentChunker
+from ingest import IngestPipeline, manifest_path_for
+from utils import load_yaml_config
+from tracing import configure_tracing, span
+
+model_config = load_yaml_config("configs/model_config.yaml")
+
+
+@st.cache_resource
+def get_resources():
+    """Model, dizin ve LLM istemcisi süreç başına bir kez yüklenir ve oturumlarca paylaşılır."""
+    return ResourceManager(model_config)
+
+
+@st.cache_resource(show_spinner=False)
+def init_tracing():
+    """İzleme ve metrik uç noktası süreç başına bir kez ayarlanır."""
+    return configure_tracing(model_config.get("tracing"))
+
+
+@st.cache_resource
+def get_answer_cache():
+    """Tüm oturumların paylaştığı süreç genelindeki yanıt önbelleği."""
+    return SemanticAnswerCache(**model_config.get("answer_cache", {}))
 
 # Başlık ve açıklama
 st.set_page_config(page_title="Legal Assistant with RAG", layout="wide")
+# set_page_config ilk Streamlit komutu olmalıdır; izleme ondan sonra başlatılır
+init_tracing()
 st.title("🗂️ Legal Assistant with RAG")
 st.write("Türkçe yasal belgelerden hızlı ve doğru yanıtlar alın.")
 
@@ -24,16 +50,22 @@ vector_store = st.radio(
 # Belgeleri kaydetme ve işleme
 if st.button("📌 Belgeleri İşle"):
     if uploaded_files:
-        processor = DocumentPreprocessor()
+        processor = DocumentPreprocessor(manifest_path=manifest_path_for(vector_store),
+                                         **model_config.get("preprocessing", {}))
         for file in uploaded_files:
             file_path = f"data/raw/{file.name}"
             with open(file_path, "wb") as f:
                 f.write(file.read())
             st.success(f"{file.name} yüklendi ve kaydedildi.")
 
-        # İşlenmiş belgeler
-        processor.process_documents()
-        st.success("Belgeler başarıyla işlendi.")
+        # İşlenmiş belgeler pasajlara bölünüp dizine eklenir
+        pipeline = IngestPipeline(
+            vectorizer=get_resources().ingest_vectorizer(vector_store),
+            preprocessor=processor,
+            chunker=DocumentChunker(**model_config.get("chunking", {}))
+        )
+        chunk_count = pipeline.run()
+        st.success(f"Belgeler başarıyla işlendi ({chunk_count} pasaj dizine eklendi).")
     else:
         st.error("Lütfen en az bir belge yükleyin.")
 
@@ -43,23 +75,47 @@ query = st.text_input("Sormak istediğiniz soruyu girin:")
 # Arama butonu
 if st.button("🔎 Ara"):
     if query:
-        retriever = DocumentRetriever(vector_store=vector_store, top_k=3)
-        results = retriever.retrieve(query)
-
-        if results:
-            st.subheader("📌 İlgili Belgeler:")
-            for idx, (doc_id, content, score) in enumerate(results):
-                st.write(f"**{idx + 1}. Belge ID:** {doc_id}")
-                st.write(f"**Alaka Skoru:** {score:.2f}")
-                st.text_area(f"Belge İçeriği - {doc_id}", content, height=150)
+        # Her sorgu tek bir iz (trace) olarak kaydedilir: arama, içerik, prompt ve LLM aşamaları
+        with span("query", vector_store=vector_store) as query_span:
+            retriever = get_resources().get_retriever(vector_store=vector_store, top_k=3)
+            # Kanun/madde atfı sorguları kodlayıcıya gitmeden sözcüksel dizinden yanıtlanır
+            query_vector = None if retriever.is_citation_query(query) else retriever.embed_query(query)
+            results = retriever.retrieve(query, query_vector=query_vector)
+
+            if results:
+                st.subheader("📌 İlgili Belgeler:")
+                for idx, (doc_id, content, score) in enumerate(results):
+                    st.write(f"**{idx + 1}. Belge ID:** {doc_id}")
+                    st.write(f"**Alaka Skoru:** {score:.4f}")
+                    st.text_area(f"Belge İçeriği - {doc_id}", content, height=150)
             
-            # Yanıt üretimi
-            generator = AnswerGenerator()
-            st.subheader("💡 Üretilen Yanıt:")
-            answer = generator.generate_answer(query, results)
-            st.write(answer)
-        else:
-            st.warning("Uygun bir belge bulunamadı.")
+                # Yanıt üretimi: aynı pasajlarla sorulmuş benzer bir soru varsa LLM'ye gidilmez
+                st.subheader("💡 Üretilen Yanıt:")
+                answer_cache = get_answer_cache()
+                doc_ids = [doc_id for doc_id, _, _ in results]
+                answer = None
+                if query_vector is not None:
+                    answer = answer_cache.lookup(query_vector, doc_ids, retriever.index_version, vector_store)
+                query_span.set(results=len(results), answer_cached=answer is not None)
+                if answer is not None:
+                    st.write(answer)
+                    st.caption("⚡ Yanıt önbellekten getirildi.")
+                else:
+                    generator = get_resources().get_generator()
+                    # Yanıt parçaları geldikçe panele yazılır
+                    answer_panel = st.empty()
+                    answer = ""
+                    stream = generator.generate_answer_stream(query, results)
+                    for piece in stream:
+                        answer += piece
+                        answer_panel.markdown(answer + "▌")
+                    answer_panel.markdown(answer)
+                    # Hata veya kesintiyle biten akışın kısmi metni önbelleğe yazılmaz
+                    if query_vector is not None and answer and stream.completed:
+                        answer_cache.store(query_vector, doc_ids, retriever.index_version, answer,
+                                           vector_store)
+            else:
+                st.warning("Uygun bir belge bulunamadı.")
     else:
         st.error("Lütfen bir sorgu girin.")
 
@@ -75,7 +131,7 @@ if st.button("📝 Seçili Belgeyi Özetle"):
         if os.path.exists(file_path):
             with open(file_path, 'r', encoding='utf-8') as file:
                 content = file.read()
-            generator = AnswerGenerator()
+            generator = get_resources().get_generator()
             summary = generator.summarize_document(content)
             st.write("📌 **Belge Özeti:**")
             st.write(summary)
@@ -0,0 +1,183 @@
+import os
+import re
+from dataclasses import dataclass
+from tracing import span
+
+# "MADDE 12 -", "Madde 12.", "Geçici Madde 3 –" gibi madde başlıkları
+ARTICLE_PATTERN = re.compile(
+    r'^[ \t]*(?:(?:GEÇİCİ|Geçici|EK|Ek)[ \t]+)?(?:MADDE|Madde)[ \t]+(\d+)[ \t]*[-–—.:]?',
+    re.MULTILINE
+)
+# "(1)", "(2)" şeklinde başlayan fıkralar
+PARAGRAPH_PATTERN = re.compile(r'^[ \t]*\(\d+\)', re.MULTILINE)
+# "a)", "b)", "ç)" şeklinde başlayan bentler
+CLAUSE_PATTERN = re.compile(r'^[ \t]*[a-zçğıöşü]\)[ \t]', re.MULTILINE)
+# Cümle sonları (son çare bölme noktaları)
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?;:])\s+')
+
+PROCESSED_SUFFIX = ".processed.txt"
+
+
+@dataclass
+class Chunk:
+    """Belgeden çıkarılmış, karakter ofsetleriyle birlikte tutulan pasaj."""
+    doc_id: str
+    start: int
+    end: int
+    text: str
+    article: str = None
+    metadata: dict = None  # Belge düzeyi meta veri (bkz. `metadata.extract_metadata`)
+
+    @property
+    def chunk_id(self):
+        return make_chunk_id(self.doc_id, self.start, self.end)
+
+
+def make_chunk_id(doc_id, start, end):
+    """Pasaj kimliğini üretir: `<doc_id>#<start>-<end>`."""
+    return f"{doc_id}#{start}-{end}"
+
+
+def split_chunk_id(chunk_id):
+    """
+    Pasaj kimliğini bileşenlerine ayırır.
+    :return: (doc_id, start, end); kimlik bir pasajı göstermiyorsa (chunk_id, None, None)
+    """
+    doc_id, sep, span = chunk_id.rpartition('#')
+    if sep and '-' in span:
+        start, _, end = span.partition('-')
+        if start.isdigit() and end.isdigit():
+            return doc_id, int(start), int(end)
+    return chunk_id, None, None
+
+
+class DocumentChunker:
+    """
+    Yapıya duyarlı belge bölücü.
+    - Metni önce "Madde N" başlıklarından, sığmayan maddeleri fıkra ve bentlerden böler.
+    - Pasajlar arasında örtüşme bırakır ve her pasajın karakter ofsetlerini korur.
+    """
+
+    def __init__(self, max_chars=1200, overlap=150, min_chars=200):
+        """
+        :param max_chars: Bir pasajın en fazla karakter sayısı
+        :param overlap: Aynı madde içindeki ardışık pasajlar arasındaki örtüşme (karakter)
+        :param min_chars: Bundan kısa maddeler bir sonraki maddeyle birleştirilir
+        """
+        if overlap >= max_chars:
+            raise ValueError("❌ overlap, max_chars değerinden küçük olmalıdır.")
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self.min_chars = min_chars
+
+    def _sections(self, text):
+        """Metni madde sınırlarından bölümlere ayırır: [(start, end, article), ...]"""
+        matches = list(ARTICLE_PATTERN.finditer(text))
+        if not matches:
+            return [(0, len(text), None)]
+
+        sections = []
+        if matches[0].start() > 0:
+            sections.append((0, matches[0].start(), None))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            sections.append((match.start(), end, match.group(1)))
+
+        # Çok kısa maddeleri (ör. mülga maddeler) bir sonrakiyle birleştir
+        merged = []
+        for start, end, article in sections:
+            if merged and merged[-1][1] - merged[-1][0] < self.min_chars \
+                    and end - merged[-1][0] <= self.max_chars:
+                prev_start, _, prev_article = merged[-1]
+                merged[-1] = (prev_start, end, prev_article or article)
+            else:
+                merged.append((start, end, article))
+        return merged
+
+    def _boundaries(self, text, start, end):
+        """Bölüm içindeki aday bölme noktalarını, önem sırasına göre döndürür."""
+        segment = text[start:end]
+        yield [start + m.start() for m in PARAGRAPH_PATTERN.finditer(segment) if m.start() > 0]
+        yield [start + m.start() for m in CLAUSE_PATTERN.finditer(segment) if m.start() > 0]
+        yield [start + m.end() for m in SENTENCE_PATTERN.finditer(segment) if m.end() < len(segment)]
+
+    def _split_point(self, text, start, end):
+        """`start`tan itibaren max_chars sınırına en yakın yapısal bölme noktasını bulur."""
+        limit = start + self.max_chars
+        for points in self._boundaries(text, start, end):
+            candidates = [p for p in points if start + self.overlap < p <= limit]
+            if candidates:
+                return max(candidates)
+        # Yapısal sınır yoksa boşluktan, o da yoksa doğrudan kes
+        space = text.rfind(' ', start + self.overlap + 1, limit)
+        return space if space > start else limit
+
+    def _snap_overlap(self, text, point, floor):
+        """Örtüşme başlangıcını kelime ortasından bir sonraki boşluğa kaydırır."""
+        start = max(floor, point - self.overlap)
+        space = text.find(' ', start, point)
+        return space + 1 if space != -1 else start
+
+    def chunk_text(self, doc_id, text):
+        """
+        Metni pasajlara böler.
+        :param doc_id: Belge kimliği
+        :param text: İşlenmiş belge metni
+        :return: [Chunk, ...]
+        """
+        chunks = []
+        for sec_start, sec_end, article in self._sections(text):
+            start = sec_start
+            while start < sec_end:
+                if sec_end - start <= self.max_chars:
+                    end = sec_end
+                else:
+                    end = self._split_point(text, start, sec_end)
+                passage = text[start:end]
+                if passage.strip():
+                    chunks.append(Chunk(doc_id, start, end, passage, article))
+                if end >= sec_end:
+                    break
+                start = self._snap_overlap(text, end, start + 1)
+        return chunks
+
+    def chunk_file(self, file_path, doc_id=None, metadata_extractor=None):
+        """
+        İşlenmiş bir belge dosyasını pasajlara böler.
+        :param metadata_extractor: Verilirse `(doc_id, text) -> dict` ile çıkarılan belge meta verisi
+                                   her pasaja eklenir
+        """
+        if doc_id is None:
+            doc_id = os.path.basename(file_path)
+            if doc_id.endswith(PROCESSED_SUFFIX):
+                doc_id = doc_id[:-len(PROCESSED_SUFFIX)]
+        with span("chunk", doc_id=doc_id) as chunk_span:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            chunks = self.chunk_text(doc_id, text)
+            if metadata_extractor is not None:
+                metadata = metadata_extractor(doc_id, text)
+                for chunk in chunks:
+                    chunk.metadata = metadata
+            chunk_span.set(chars=len(text), chunks=len(chunks))
+            return chunks
+
+    def chunk_folder(self, processed_folder='data/processed'):
+        """Klasördeki tüm `.processed.txt` dosyalarını pasajlara böler (generator)."""
+        for filename in sorted(os.listdir(processed_folder)):
+            if filename.endswith(PROCESSED_SUFFIX):
+                yield from self.chunk_file(os.path.join(processed_folder, filename))
+
+
+# Kullanım
+if __name__ == "__main__":
+    chunker = DocumentChunker(max_chars=300, overlap=50)
+    sample = (
+        "TÜRK BORÇLAR KANUNU\n"
+        "MADDE 1 - (1) Sözleşme, tarafların iradelerini karşılıklı ve birbirine uygun olarak "
+        "açıklamalarıyla kurulur.\n(2) İrade açıklaması, açık veya örtülü olabilir.\n"
+        "MADDE 2 - (1) Taraflar esaslı noktalarda uyuşmuşlarsa, ikinci derecedeki noktalar "
+        "üzerinde durulmamış olsa bile, sözleşme kurulmuş sayılır.\n"
+    )
+    for chunk in chunker.chunk_text("borclar_kanunu.txt", sample):
+        print(f"📎 {chunk.chunk_id} (Madde {chunk.article}): {chunk.text[:60]!r}")
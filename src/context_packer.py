@@ -0,0 +1,207 @@
+import re
+import math
+from dataclasses import dataclass
+from chunker import split_chunk_id, SENTENCE_PATTERN
+from lexical import tokenize
+
+# Yaklaşık sayımda kelime parçası başına karakter (Türkçe metinlerde BPE ortalamasına yakın)
+CHARS_PER_TOKEN = 3
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+ELLIPSIS = " … "
+
+
+class ApproximateTokenizer:
+    """Bağımlılıksız yaklaşık tokenizer: her kelime ~3 karakterlik parçalara, her noktalama bir tokene sayılır."""
+
+    def offsets(self, text):
+        spans = []
+        for match in TOKEN_PATTERN.finditer(text):
+            start, end = match.span()
+            for piece in range(start, end, CHARS_PER_TOKEN):
+                spans.append((piece, min(piece + CHARS_PER_TOKEN, end)))
+        return spans
+
+    def count(self, text):
+        return sum(math.ceil(len(match.group()) / CHARS_PER_TOKEN) for match in TOKEN_PATTERN.finditer(text))
+
+
+class HuggingFaceTokenizer:
+    """`tokenizers` kütüphanesiyle yerel bir HF tokenizer (ör. LLM'nin kendi tokenizer'ı)."""
+
+    def __init__(self, name):
+        from tokenizers import Tokenizer
+        self.tokenizer = Tokenizer.from_pretrained(name)
+
+    def offsets(self, text):
+        return self.tokenizer.encode(text, add_special_tokens=False).offsets
+
+    def count(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class TiktokenTokenizer:
+    """tiktoken kodlaması (ör. `tiktoken:cl100k_base`)."""
+
+    def __init__(self, encoding):
+        import tiktoken
+        self.encoding = tiktoken.get_encoding(encoding)
+
+    def offsets(self, text):
+        tokens = self.encoding.encode(text)
+        spans, position = [], 0
+        for token in tokens:
+            length = len(self.encoding.decode_single_token_bytes(token).decode("utf-8", errors="ignore"))
+            spans.append((position, position + length))
+            position += length
+        return spans
+
+    def count(self, text):
+        return len(self.encoding.encode(text))
+
+
+def load_tokenizer(name=None):
+    """
+    Token sayımı için yerel tokenizer'ı yükler.
+    :param name: None / "approx": yaklaşık sayım; "tiktoken:<kodlama>"; diğerleri HF tokenizer adı
+    """
+    if not name or name == "approx":
+        return ApproximateTokenizer()
+    if name.startswith("tiktoken:"):
+        return TiktokenTokenizer(name.split(":", 1)[1])
+    return HuggingFaceTokenizer(name)
+
+
+def truncate_tokens(tokenizer, text, max_tokens):
+    """Metnin ilk `max_tokens` tokenini (karakter ofsetleri üzerinden) döndürür."""
+    spans = tokenizer.offsets(text)
+    if len(spans) <= max_tokens:
+        return text
+    return text[:spans[max_tokens - 1][1]] if max_tokens > 0 else ""
+
+
+@dataclass
+class PackedPassage:
+    """Bağlama alınan pasaj: kaynak kimliği, metin ve ilk aşama sırası."""
+    source: str
+    text: str
+    rank: int
+    tokens: int = 0
+    trimmed: bool = False
+
+
+class ContextPacker:
+    """
+    Token bütçeli bağlam paketleyici.
+    - Aynı belgenin örtüşen/bitişik pasajlarını ofsetlerine göre tek aralıkta birleştirir,
+      başka bir pasajın içinde kalan metinleri eler.
+    - Pasajları getirici sırasıyla (en iyi önce) bütçe dolana kadar ekler; sığmayan pasajdan
+      ilk karakterler yerine soruyla en çok terim paylaşan cümleler seçilir.
+    - Her pasaj `[n] Kaynak: <belge>#<başlangıç>-<bitiş>` etiketiyle yer alır.
+    """
+
+    def __init__(self, token_budget=1500, max_passage_tokens=400, min_passage_tokens=32, tokenizer=None):
+        """
+        :param token_budget: Bağlam bölümü için en fazla token
+        :param max_passage_tokens: Tek pasaja ayrılacak en fazla token (None: sınırsız)
+        :param min_passage_tokens: Kalan bütçe bundan azsa yeni pasaj eklenmez
+        :param tokenizer: `load_tokenizer` adı veya `count`/`offsets` sağlayan nesne (default: yaklaşık)
+        """
+        self.token_budget = token_budget
+        self.max_passage_tokens = max_passage_tokens
+        self.min_passage_tokens = min_passage_tokens
+        self.tokenizer = tokenizer if hasattr(tokenizer, "count") else load_tokenizer(tokenizer)
+
+    @staticmethod
+    def _merge(documents):
+        """
+        Örtüşen pasajları birleştirir, başka bir pasajın içinde kalan metinleri eler.
+        :return: [(doc_id, start, end, text, rank), ...] (sıra: en iyi önce)
+        """
+        spans, by_doc = [], {}
+        for rank, (chunk_id, content, _) in enumerate(documents):
+            doc_id, start, end = split_chunk_id(chunk_id)
+            if start is not None and end - start == len(content):
+                by_doc.setdefault(doc_id, []).append([start, end, content, rank])
+            else:
+                spans.append((chunk_id, None, None, content, rank))
+
+        for doc_id, items in by_doc.items():
+            items.sort()
+            merged = [items[0]]
+            for start, end, content, rank in items[1:]:
+                last = merged[-1]
+                if start <= last[1]:
+                    if end > last[1]:
+                        last[2] += content[last[1] - start:]
+                        last[1] = end
+                    last[3] = min(last[3], rank)
+                else:
+                    merged.append([start, end, content, rank])
+            spans.extend((doc_id, start, end, content, rank) for start, end, content, rank in merged)
+        spans.sort(key=lambda span: span[4])
+
+        normalized = [" ".join(span[3].split()) for span in spans]
+        return [span for i, span in enumerate(spans)
+                if not any(j != i and normalized[i] in normalized[j]
+                           and (len(normalized[j]) > len(normalized[i]) or j < i)
+                           for j in range(len(spans)))]
+
+    def _select_sentences(self, query, text, max_tokens):
+        """Soruyla en çok terim paylaşan cümleleri bütçeye sığacak kadar seçer (metin sırası korunur)."""
+        query_terms = set(tokenize(query))
+        sentences = [s for s in SENTENCE_PATTERN.split(text) if s.strip()]
+        scored = sorted(range(len(sentences)),
+                        key=lambda i: (-len(query_terms & set(tokenize(sentences[i]))), i))
+        chosen, used = [], 0
+        separator = self.tokenizer.count(ELLIPSIS)
+        for i in scored:
+            cost = self.tokenizer.count(sentences[i]) + (separator if chosen else 0)
+            if used + cost <= max_tokens:
+                chosen.append(i)
+                used += cost
+            elif not chosen:
+                # Tek cümle bile sığmıyorsa en alakalı cümlenin başı alınır
+                return truncate_tokens(self.tokenizer, sentences[i], max_tokens)
+        return ELLIPSIS.join(sentences[i] for i in sorted(chosen))
+
+    @staticmethod
+    def _label(number, passage):
+        return f"[{number}] Kaynak: {passage.source}\n"
+
+    def pack(self, query, documents):
+        """
+        :param query: Kullanıcı sorgusu (sığmayan pasajlarda cümle seçimi için)
+        :param documents: Getirici sırasıyla [(chunk_id, content, score), ...]
+        :return: Bağlama alınan `PackedPassage` listesi
+        """
+        packed = []
+        remaining = self.token_budget
+        for doc_id, start, end, text, rank in self._merge(documents):
+            source = doc_id if start is None else f"{doc_id}#{start}-{end}"
+            passage = PackedPassage(source, text, rank)
+            available = remaining - self.tokenizer.count(self._label(len(packed) + 1, passage))
+            if available < self.min_passage_tokens:
+                break
+            limit = min(available, self.max_passage_tokens or available)
+            passage.tokens = self.tokenizer.count(text)
+            if passage.tokens > limit:
+                passage.text = self._select_sentences(query, text, limit)
+                passage.tokens = self.tokenizer.count(passage.text)
+                passage.trimmed = True
+            packed.append(passage)
+            remaining = available - passage.tokens
+        return packed
+
+    def render(self, packed):
+        """Paketlenmiş pasajları etiketli bağlam metnine çevirir."""
+        return "\n\n".join(f"{self._label(number, passage)}{passage.text}"
+                           for number, passage in enumerate(packed, start=1))
+
+
+# Kullanım
+if __name__ == "__main__":
+    text = ("MADDE 1 - Sözleşme, tarafların iradelerini karşılıklı ve birbirine uygun olarak "
+            "açıklamalarıyla kurulur. İrade açıklaması, açık veya örtülü olabilir.")
+    documents = [("tbk.txt#0-90", text[0:90], 0.9), ("tbk.txt#60-146", text[60:146], 0.8)]
+    packer = ContextPacker(token_budget=60)
+    print(packer.render(packer.pack("Sözleşme nasıl kurulur?", documents)))
@@ -0,0 +1,191 @@
+import os
+import hashlib
+import threading
+import unicodedata
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: dosya kilidi yok, yalnızca süreç içi kilit kullanılır
+    fcntl = None
+
+KEY_BYTES = 16
+SLOT_DTYPE = np.dtype([('key', f'S{KEY_BYTES}'), ('tick', '<i8')])
+# Süreçlerin paylaştığı sayaçlar: slot tablosunun yapı sürümü ve ortak LRU saati
+HEADER_DTYPE = np.dtype([('generation', '<i8'), ('tick', '<i8')])
+
+
+def normalize_text(text):
+    """Önbellek anahtarı için metni normalleştirir (Unicode NFC + boşluk sadeleştirme)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    İçerik adresli, diskte kalıcı gömme (embedding) önbelleği.
+    - Anahtar: (model adı, normalleştirilmiş metin) özetidir; metnin kendisi saklanmaz.
+    - Vektörler sabit kapasiteli, bellek eşlemeli (memmap) bir float32 matriste tutulur.
+    - Kapasite dolduğunda en uzun süredir kullanılmayan kayıtlar topluca boşaltılır.
+    - Birden çok yazıcı güvenlidir: her işlem süreç içi kilit ve önbellek klasöründeki dosya kilidi
+      altında yapılır. Başka bir örnek/süreç slot tablosunu değiştirdiyse (sürüm sayacı artmışsa)
+      anahtar -> slot eşlemesi işlemden önce tablodan yeniden kurulur.
+    """
+
+    def __init__(self, model_name, embedding_dim, cache_dir='models/embedding_cache',
+                 max_entries=200_000, evict_fraction=0.1):
+        """
+        :param model_name: Vektörleri üreten model adı (anahtarın parçası)
+        :param embedding_dim: Vektör boyutu
+        :param cache_dir: Önbellek dosyalarının kök klasörü
+        :param max_entries: En fazla saklanacak vektör sayısı
+        :param evict_fraction: Kapasite dolduğunda boşaltılacak kayıt oranı
+        """
+        self.model_name = model_name
+        self.embedding_dim = embedding_dim
+        self.max_entries = max_entries
+        self.evict_count = max(1, int(max_entries * evict_fraction))
+        self.hits = 0
+        self.misses = 0
+
+        safe_name = model_name.replace('/', '__')
+        self.cache_dir = os.path.join(cache_dir, f"{safe_name}-{embedding_dim}")
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._lock_file = open(os.path.join(self.cache_dir, "lock"), 'a+')
+        with self._locked(sync=False):
+            self.vectors = self._open_memmap("vectors.f32", np.float32, (max_entries, embedding_dim))
+            self.slots = self._open_memmap("slots.bin", SLOT_DTYPE, (max_entries,))
+            created = not os.path.exists(os.path.join(self.cache_dir, "header.bin"))
+            self.header = self._open_memmap("header.bin", HEADER_DTYPE, (1,))
+            if created:
+                # Sayaçlardan önce yazılmış önbellekte saat slot tablosundan devam eder
+                self.header['tick'][0] = self.slots['tick'].max()
+            self._generation = None
+            self._reload()
+
+    @contextmanager
+    def _locked(self, sync=True):
+        """Süreç içi ve süreçler arası kilidi alır; gerekirse slot eşlemesini tazeler."""
+        with self._lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                if sync and int(self.header['generation'][0]) != self._generation:
+                    self._reload()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _reload(self):
+        """Anahtar -> slot eşlemesini ve boş slotları paylaşılan slot tablosundan kurar."""
+        used = np.nonzero(self.slots['tick'] > 0)[0]
+        self.key_to_slot = {bytes(self.slots['key'][i]): int(i) for i in used}
+        self.free_slots = sorted(set(range(self.max_entries)) - set(self.key_to_slot.values()),
+                                 reverse=True)
+        self._generation = int(self.header['generation'][0])
+
+    def _changed(self):
+        """Slot tablosunun yapısı değişti (yeni anahtar veya boşaltma); diğer örnekler yeniden yükler."""
+        self.header['generation'][0] += 1
+        self._generation = int(self.header['generation'][0])
+
+    def _open_memmap(self, filename, dtype, shape):
+        """Dosya varsa bellek eşlemeli açar, yoksa sıfırlarla oluşturur."""
+        path = os.path.join(self.cache_dir, filename)
+        mode = 'r+' if os.path.exists(path) else 'w+'
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def _key(self, text):
+        payload = f"{self.model_name}\0{normalize_text(text)}".encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=KEY_BYTES).digest()
+
+    def _touch(self, slot):
+        self.header['tick'][0] += 1
+        self.slots['tick'][slot] = self.header['tick'][0]
+
+    def _evict(self):
+        """En eski `evict_count` kaydı boşaltır."""
+        ticks = np.where(self.slots['tick'] > 0, self.slots['tick'], np.iinfo(np.int64).max)
+        oldest = np.argpartition(ticks, self.evict_count - 1)[:self.evict_count]
+        for slot in oldest:
+            key = bytes(self.slots['key'][slot])
+            if self.key_to_slot.pop(key, None) is not None:
+                self.slots['tick'][slot] = 0
+                self.free_slots.append(int(slot))
+        self._changed()
+        print(f"♻️ Gömme önbelleğinden {len(oldest)} kayıt boşaltıldı.")
+
+    def get(self, text):
+        """Metnin vektörünü döndürür; önbellekte yoksa None."""
+        with self._locked():
+            return self._get(text)
+
+    def _get(self, text):
+        slot = self.key_to_slot.get(self._key(text))
+        if slot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(slot)
+        return np.array(self.vectors[slot])
+
+    def get_many(self, texts):
+        """
+        Metinlerin önbellekteki vektörlerini döndürür.
+        :return: (vectors, missing) — `vectors` bulunamayanlar için None içerir,
+                 `missing` bulunamayan metinlerin indeksleridir.
+        """
+        vectors, missing = [], []
+        with self._locked():
+            found = [self._get(text) for text in texts]
+        for i, vector in enumerate(found):
+            vectors.append(vector)
+            if vector is None:
+                missing.append(i)
+        return vectors, missing
+
+    def put(self, text, vector):
+        """Metnin vektörünü önbelleğe yazar."""
+        with self._locked():
+            self._put(text, vector)
+
+    def _put(self, text, vector):
+        key = self._key(text)
+        slot = self.key_to_slot.get(key)
+        if slot is None:
+            if not self.free_slots:
+                self._evict()
+            slot = self.free_slots.pop()
+            self.key_to_slot[key] = slot
+            self.slots['key'][slot] = key
+            self._changed()
+        self.vectors[slot] = vector
+        self._touch(slot)
+
+    def put_many(self, texts, vectors):
+        with self._locked():
+            for text, vector in zip(texts, vectors):
+                self._put(text, vector)
+
+    def flush(self):
+        """Bellek eşlemeli dosyaları diske yazar."""
+        with self._locked(sync=False):
+            self.vectors.flush()
+            self.slots.flush()
+            self.header.flush()
+
+    def stats(self):
+        """İsabet/ıskalama sayaçlarını döndürür."""
+        with self._locked():
+            lookups = self.hits + self.misses
+            entries = len(self.key_to_slot)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "capacity": self.max_entries,
+        }
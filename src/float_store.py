@@ -0,0 +1,104 @@
+import os
+import shutil
+import numpy as np
+
+FLOAT_STORE_FILE = "models/embeddings/faiss_vectors.f16"
+
+
+class FloatVectorStore:
+    """
+    Sıkıştırılmış dizinlerde kesin yeniden skorlama için diskteki tam vektör deposu.
+    - Vektörler float16 olarak, vektör kimliği satır numarası olacak şekilde bellek eşlemeli
+      bir dosyada tutulur (float32'nin yarısı); RAM'de yalnızca okunan satırlar yer alır.
+    - Dosya, kimlikler büyüdükçe kapasitesi ikiye katlanarak genişletilir.
+    - Yayımlanmış bir anlık görüntüdeki dosya yerinde değiştirilmez: `working_path` verilmişse ilk
+      yazmada dosya oraya kopyalanır ve yazmalar kopyaya gider (yazınca kopyala).
+    """
+
+    def __init__(self, dim, path=FLOAT_STORE_FILE, dtype='float16', read_only=False, working_path=None):
+        """
+        :param dim: Vektör boyutu
+        :param path: Depo dosyası
+        :param dtype: Diskte saklama tipi (float16 veya float32)
+        :param read_only: Dosya salt okunur eşlenir (sunum süreçleri sayfa önbelleğini paylaşır)
+        :param working_path: `path` paylaşılan (değişmez) bir dosyaysa yazmaların yapılacağı çalışma dosyası
+        """
+        self.path = path
+        self.working_path = working_path or path
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.read_only = read_only
+        self._row_bytes = self.dim * self.dtype.itemsize
+        self._vectors = None
+        self._open()
+
+    def _open(self, capacity=None):
+        if not self.read_only:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if capacity is not None and capacity * self._row_bytes > size:
+            if self.read_only:
+                raise RuntimeError(f"❌ Vektör deposu salt okunur açıldı: {self.path}")
+            with open(self.path, 'ab') as f:
+                f.truncate(capacity * self._row_bytes)
+            size = capacity * self._row_bytes
+        rows = size // self._row_bytes
+        mode = 'r' if self.read_only else 'r+'
+        self._vectors = np.memmap(self.path, dtype=self.dtype, mode=mode, shape=(rows, self.dim)) if rows else None
+
+    @property
+    def shared(self):
+        """Dosya yayımlanmış bir anlık görüntüye aitse True; ilk yazmada çalışma dosyasına kopyalanır."""
+        return self.path != self.working_path
+
+    def _detach(self):
+        """Paylaşılan dosyayı çalışma dosyasına kopyalayıp yazmaları oraya yönlendirir."""
+        self.flush()
+        self._vectors = None
+        os.makedirs(os.path.dirname(self.working_path) or '.', exist_ok=True)
+        tmp_path = f"{self.working_path}.tmp"
+        if os.path.exists(self.path):
+            shutil.copyfile(self.path, tmp_path)
+        else:
+            open(tmp_path, 'wb').close()
+        os.replace(tmp_path, self.working_path)
+        self.path = self.working_path
+        self._open()
+
+    @property
+    def capacity(self):
+        return 0 if self._vectors is None else len(self._vectors)
+
+    def put(self, ids, vectors):
+        """Vektörleri kimliklerinin satırlarına yazar."""
+        ids = np.asarray(ids, dtype='int64')
+        if len(ids) == 0:
+            return
+        if self.shared and not self.read_only:
+            self._detach()
+        needed = int(ids.max()) + 1
+        if needed > self.capacity:
+            self.flush()
+            self._open(capacity=max(needed, 2 * self.capacity, 1024))
+        self._vectors[ids] = np.asarray(vectors, dtype='float32').astype(self.dtype)
+
+    def get(self, ids):
+        """Kimliklere karşılık gelen vektörleri float32 olarak döndürür (ids herhangi bir şekilde olabilir)."""
+        return np.asarray(self._vectors[np.asarray(ids, dtype='int64')], dtype='float32')
+
+    def rescore(self, query_vectors, candidate_ids):
+        """
+        Aday kimlikleri için kesin L2 uzaklıklarını hesaplar.
+        :param query_vectors: (Q, d) sorgu matrisi
+        :param candidate_ids: (Q, k) aday kimlikleri; -1 ve depoda olmayanlar sonsuz uzaklık alır
+        :return: (Q, k) kare L2 uzaklıkları
+        """
+        valid = (candidate_ids >= 0) & (candidate_ids < self.capacity)
+        vectors = self.get(np.where(valid, candidate_ids, 0))
+        distances = ((vectors - query_vectors[:, None, :]) ** 2).sum(axis=2)
+        distances[~valid] = np.inf
+        return distances
+
+    def flush(self):
+        if self._vectors is not None:
+            self._vectors.flush()
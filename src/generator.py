@@ -1,10 +1,33 @@
 import os
+import json
+import time
 import requests
 import yaml
 from dotenv import load_dotenv
+from llm_client import LLMClient
+from context_packer import ContextPacker
+from summarizer import MapReduceSummarizer
+from tracing import span
 
 load_dotenv()
 
+API_ERROR_MESSAGE = "API isteği sırasında bir hata oluştu."
+
+class AnswerStream:
+    """
+    `generate_answer_stream` çıktısı: yanıt parçalarını verir.
+    `completed`, akış bitiş işaretiyle sona erdiyse True olur; hata, kesilen bağlantı veya
+    yarıda bırakılan okuma durumunda False kalır.
+    """
+
+    def __init__(self):
+        self.completed = False
+        self._pieces = iter(())
+
+    def __iter__(self):
+        return self._pieces
+
+
 class AnswerGenerator:
     """
     Soru-cevap üreticisi.
@@ -12,12 +35,21 @@ class AnswerGenerator:
     - İlgili belgelerden alınan içeriklerle birlikte daha anlamlı sonuçlar sağlar.
     """
 
-    def __init__(self):
+    def __init__(self, client=None, client_options=None, context_packer=None, summarizer=None):
+        """
+        :param client: Paylaşılacak `LLMClient` (default: ortam değişkenlerinden yeni istemci)
+        :param client_options: Yeni istemci için ayarlar (timeout, max_retries, max_concurrency, ...)
+        :param context_packer: Bağlamı token bütçesiyle dolduran `ContextPacker` (default: varsayılan bütçe)
+        :param summarizer: Uzun belgeler için `MapReduceSummarizer` (default: aynı istemciyle, bellekte önbellek)
+        """
         self.api_url = os.getenv("GROQ_API_URL")
         self.api_key = os.getenv("GROQ_API_KEY")
-        if not self.api_url or not self.api_key:
+        if client is None and (not self.api_url or not self.api_key):
             raise ValueError("❌ API ayarları bulunamadı. Lütfen .env dosyasını kontrol edin.")
 
+        self.client = client or LLMClient(self.api_url, self.api_key, **(client_options or {}))
+        self.context_packer = context_packer or ContextPacker()
+        self.summarizer = summarizer or MapReduceSummarizer(self.client)
         print("✅ Groq-hosted LLM bağlantısı sağlandı.")
 
     def _prepare_prompt(self, query, documents):
@@ -27,7 +59,15 @@ class AnswerGenerator:
         :param documents: [(doc_id, content, score), ...]
         :return: Hazırlanmış prompt
         """
-        document_contexts = "\n\n".join([f"Kaynak: {doc_id}\n\n{content[:500]}..." for doc_id, content, _ in documents])
+        with span("prompt_build", documents=len(documents)) as prompt_span:
+            packed = self.context_packer.pack(query, documents)
+            prompt = self._build_prompt(query, self.context_packer.render(packed))
+            prompt_span.set(chars=len(prompt), passages=len(packed),
+                            context_tokens=sum(passage.tokens for passage in packed),
+                            trimmed=sum(passage.trimmed for passage in packed))
+            return prompt
+
+    def _build_prompt(self, query, document_contexts):
         prompt = f"""
         Soru: {query}
         Aşağıda ilgili belgelerden alınmış içerikler bulunmaktadır:
@@ -35,6 +75,7 @@ class AnswerGenerator:
         {document_contexts}
         
         Lütfen yukarıdaki bilgiler ışığında, soruya net, doğru ve Türkçe bir yanıt ver.
+        Kullandığın bilgilerin kaynağını [1], [2] biçiminde belirt.
         Eğer cevap belgelerde açıkça yer almıyorsa, tahmin yürütmeden "Belge içerisinde bu bilgiye ulaşılamadı." de.
         """
 
@@ -50,48 +91,136 @@ class AnswerGenerator:
         prompt = self._prepare_prompt(query, documents)
         
         try:
-            response = requests.post(
-                self.api_url,
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json={"prompt": prompt, "max_tokens": 300}
-            )
-            response.raise_for_status()
-            result = response.json()
+            answer = self.client.generate(prompt, max_tokens=300)
             print("✅ Yanıt başarıyla alındı.")
-            return result.get("response", "Yanıt alınamadı.")
+            return answer or "Yanıt alınamadı."
         
         except requests.RequestException as e:
             print(f"❌ API isteği sırasında hata oluştu: {e}")
-            return "API isteği sırasında bir hata oluştu."
+            return API_ERROR_MESSAGE
+
+    async def agenerate_answer(self, query, documents):
+        """`generate_answer`in asyncio sürümü (sorgu servisi); eşzamanlılık `max_concurrency` ile sınırlıdır."""
+        prompt = self._prepare_prompt(query, documents)
+
+        try:
+            answer = await self.client.agenerate(prompt, max_tokens=300)
+            return answer or "Yanıt alınamadı."
+
+        except requests.RequestException as e:
+            print(f"❌ API isteği sırasında hata oluştu: {e}")
+            return API_ERROR_MESSAGE
+
+    def generate_answers(self, batch):
+        """
+        Birden çok soruyu eşzamanlı yanıtlar (ör. gecelik regresyon soru seti).
+        :param batch: [(query, documents), ...]
+        :return: Girdi sırasıyla yanıt metinleri; başarısız istekler için hata mesajı
+        """
+        prompts = [self._prepare_prompt(query, documents) for query, documents in batch]
+        answers = []
+        for result in self.client.generate_many(prompts, max_tokens=300):
+            if isinstance(result, requests.RequestException):
+                print(f"❌ API isteği sırasında hata oluştu: {result}")
+                answers.append(API_ERROR_MESSAGE)
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                answers.append(result or "Yanıt alınamadı.")
+        print(f"✅ {len(answers)} soru için yanıt alındı.")
+        return answers
+
+    @staticmethod
+    def _parse_stream_line(line):
+        """
+        Akış satırından metin parçasını çıkarır.
+        SSE (`data: {...}`) ve satır satır JSON (chunked) biçimleri desteklenir.
+        :return: Metin parçası, akış bittiyse None, parça içermeyen satırda ""
+        """
+        if not line or line.startswith(":"):
+            return ""
+        if line.startswith("data:"):
+            line = line[len("data:"):].strip()
+        if line == "[DONE]":
+            return None
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            return ""
+        if chunk.get("done"):
+            return chunk.get("response") or None
+        if "response" in chunk:
+            return chunk["response"] or ""
+        choices = chunk.get("choices") or [{}]
+        delta = choices[0].get("delta") or {}
+        return delta.get("content") or choices[0].get("text") or ""
+
+    def generate_answer_stream(self, query, documents):
+        """
+        LLM yanıtını parça parça üretir (ilk parça, tam yanıt beklenmeden gelir).
+        :param query: Kullanıcı sorgusu
+        :param documents: İlgili belgeler
+        :return: Metin parçalarını veren `AnswerStream`; akış bitince `completed` yanıtın eksiksiz
+                 geldiğini söyler (yalnızca tamamlanan yanıtlar önbelleğe alınmalıdır)
+        """
+        stream = AnswerStream()
+        stream._pieces = self._stream_pieces(query, documents, stream)
+        return stream
+
+    def _stream_pieces(self, query, documents, stream):
+        prompt = self._prepare_prompt(query, documents)
+        # Akış boyunca yield edildiğinden aralık etkin (üst) aralık yapılmaz
+        stream_span = span("llm_stream", activate=False)
+        start = time.perf_counter()
+        pieces = chars = 0
+
+        try:
+            with self.client.post(
+                {"prompt": prompt, "max_tokens": 300, "stream": True},
+                stream=True,
+                headers={"Accept": "text/event-stream"}
+            ) as response:
+                for line in response.iter_lines():
+                    piece = self._parse_stream_line(line.decode("utf-8"))
+                    if piece is None:
+                        stream.completed = True
+                        break
+                    if piece:
+                        if not pieces:
+                            stream_span.set(first_token_ms=round((time.perf_counter() - start) * 1000, 3))
+                        pieces += 1
+                        chars += len(piece)
+                        yield piece
+            if stream.completed:
+                print("✅ Yanıt akışı tamamlandı.")
+            else:
+                # Bağlantı bitiş işareti gelmeden kapandı; gelen metin yanıtın yalnızca bir kısmıdır
+                print("⚠️ Yanıt akışı yarıda kesildi.")
+                stream_span.set(error="truncated")
+
+        except requests.RequestException as e:
+            print(f"❌ API isteği sırasında hata oluştu: {e}")
+            stream_span.set(error=e.__class__.__name__)
+            yield API_ERROR_MESSAGE
+
+        finally:
+            stream_span.set(pieces=pieces, chars=chars)
+            stream_span.end()
 
     def summarize_document(self, content):
         """
-        Belgeyi özetler.
+        Belgeyi özetler; uzun belgeler bölümlere ayrılıp paralel özetlenir ve birleştirilir.
         :param content: Özetlenecek belge içeriği
         :return: Özet metni
         """
-        prompt = f"""
-        Aşağıda verilen belgeyi özetle:
-        
-        {content[:1000]}...
-        
-        Özet:
-        """
-
         try:
-            response = requests.post(
-                self.api_url,
-                headers={"Authorization": f"Bearer {self.api_key}"},
-                json={"prompt": prompt, "max_tokens": 200}
-            )
-            response.raise_for_status()
-            result = response.json()
+            summary = self.summarizer.summarize(content)
             print("✅ Özet başarıyla alındı.")
-            return result.get("response", "Özet alınamadı.")
+            return summary or "Özet alınamadı."
         
         except requests.RequestException as e:
             print(f"❌ API isteği sırasında hata oluştu: {e}")
-            return "API isteği sırasında bir hata oluştu."
+            return API_ERROR_MESSAGE
     
 
 # Kullanım
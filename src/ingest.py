@@ -0,0 +1,167 @@
+import os
+from preprocess import DocumentPreprocessor
+from chunker import DocumentChunker, PROCESSED_SUFFIX, split_chunk_id
+from metadata import extract_metadata
+from lexical import BM25Index, LEXICAL_INDEX_FILE
+from passage_store import PassageStore, PassageStoreWriter, PASSAGE_STORE_FILE
+from manifest import INGEST_MANIFEST_FILE
+from tracing import span
+
+
+def manifest_path_for(vector_store):
+    """Depoya özel manifesto dosyası; FAISS ve Chroma dizinleri ayrı ayrı güncel tutulur."""
+    return os.path.join("data", f"manifest_{vector_store}.json")
+
+
+class IngestPipeline:
+    """
+    Belge alım hattı.
+    - Ham belgeleri işler, yapıya duyarlı pasajlara böler ve vektör deposuna ekler; belge türü,
+      kanun numarası, tarih ve madde numarası filtreli arama için pasajlarla birlikte saklanır.
+    - Manifesto kullanılıyorsa yalnızca yeni/değişmiş belgeler yeniden vektörleştirilir;
+      değişmiş ve silinmiş belgelerin eski vektörleri depodan kaldırılır.
+    - Aynı pasajlarla vektör diziniyle birlikte BM25 sözcüksel dizinini ve paketlenmiş pasaj
+      deposunu da günceller.
+    - FAISS'te BM25 dizini, pasaj deposu ve manifesto vektör diziniyle aynı anlık görüntüye yazılır
+      ve oradan okunur; okuyucular hep birbiriyle tutarlı bir dosya takımı görür.
+    """
+
+    def __init__(self, vectorizer, preprocessor=None, chunker=None, lexical_path=LEXICAL_INDEX_FILE,
+                 passage_path=PASSAGE_STORE_FILE):
+        """
+        :param vectorizer: Pasajların ekleneceği `DocumentVectorizer`
+        :param preprocessor: `DocumentPreprocessor` (default: data/raw -> data/processed, depoya özel
+                             manifesto ile, bkz. `manifest_path_for`)
+        :param chunker: `DocumentChunker` (default: varsayılan pasaj ayarları)
+        :param lexical_path: BM25 dizininin dosyası (None: sözcüksel dizin tutulmaz); FAISS'te yalnızca
+                             dosya adı kullanılır, dosya anlık görüntüye yazılır
+        :param passage_path: Paketlenmiş pasaj deposunun dosyası (None: depo tutulmaz); FAISS'te yalnızca
+                             dosya adı kullanılır
+        """
+        self.vectorizer = vectorizer
+        self.preprocessor = preprocessor or DocumentPreprocessor(
+            manifest_path=manifest_path_for(vectorizer.vector_store))
+        self.chunker = chunker or DocumentChunker()
+        self.lexical_path = lexical_path
+        self.passage_path = passage_path
+
+    def _processed_chunks(self, filenames):
+        for filename in filenames:
+            path = os.path.join(self.preprocessor.output_folder, f"{filename}{PROCESSED_SUFFIX}")
+            if os.path.exists(path):
+                yield from self.chunker.chunk_file(path, metadata_extractor=extract_metadata)
+
+    @staticmethod
+    def _index_alongside(chunks, sinks):
+        """Vektörleştiriciye giden pasajları aynı geçişte yan dizinlere (BM25, pasaj deposu) de ekler."""
+        for chunk in chunks:
+            for sink in sinks:
+                sink.add(chunk.chunk_id, chunk.text)
+            yield chunk
+
+    def run(self):
+        """
+        Değişen belgeleri işler, eski vektörlerini siler, yeni pasajları dizine ekler
+        ve dizini kaydeder.
+        :return: Dizine eklenen pasaj sayısı
+        """
+        with span("ingest") as ingest_span:
+            count = self._run()
+            ingest_span.set(chunks=count)
+            return count
+
+    def _side_path(self, path):
+        """
+        Yan dosyanın okunacağı yol: yüklü FAISS anlık görüntüsündeki kopyası, yoksa (Chroma veya
+        anlık görüntülerden önceki düzen) verilen yol.
+        """
+        if not path:
+            return None
+        return self.vectorizer.snapshot_file(os.path.basename(path)) or path
+
+    def _run(self):
+        # FAISS'te yan dosyalar ve manifesto vektör diziniyle aynı anlık görüntüde yayımlanır
+        snapshots = self.vectorizer.vector_store == 'faiss'
+        # Kayıtlı dizinlerden biri yoksa manifesto güvenilmezdir; her şey baştan işlenir
+        force = not self.vectorizer.load()
+        lexical_source = self._side_path(self.lexical_path)
+        passage_source = self._side_path(self.passage_path)
+        for path in (lexical_source, passage_source):
+            force = force or bool(path) and not os.path.exists(path)
+        lexical_index = None
+        relex = False  # Korunan pasajlar eski pasaj deposundan BM25 dizinine yeniden eklenecek mi
+        if self.lexical_path:
+            lexical_index = BM25Index() if force else BM25Index.load(lexical_source)
+            if lexical_index.stale:
+                # Eski köklerle yazılmış terimler yeni sorgularla eşleşmez; dizin pasaj deposundan
+                # yeniden kurulur, depo tutulmuyorsa belgeler baştan işlenir
+                lexical_index = BM25Index()
+                relex = bool(self.passage_path)
+                force = force or not relex
+        manifest_source = self.vectorizer.snapshot_file(INGEST_MANIFEST_FILE) if snapshots else None
+        if manifest_source and self.preprocessor.manifest is not None:
+            self.preprocessor.manifest.load(manifest_source)
+        # Manifesto, dizinler kaydedilene kadar yazılmaz; alım yarıda kalırsa belgeler yeniden işlenir
+        changes = self.preprocessor.process_documents(force=force, save_manifest=False)
+
+        # Manifesto yoksa tüm belgeler "yeni" sayılır; eski kopyalar da temizlenir
+        stale = changes["added"] + changes["modified"] + changes["removed"]
+        self.vectorizer.remove_documents(stale)
+        sinks = []
+        if lexical_index is not None:
+            lexical_index.remove_documents(stale)
+            sinks.append(lexical_index)
+        passage_writer = None
+        if self.passage_path:
+            # FAISS'te depo anlık görüntüye yazılır; geçici dosyası dizinin kök klasöründe tutulur
+            staging = (os.path.join(self.vectorizer.root, os.path.basename(self.passage_path))
+                       if snapshots else self.passage_path)
+            passage_writer = PassageStoreWriter(staging)
+        try:
+            if passage_writer is not None:
+                previous = None if force else PassageStore.open(passage_source)
+                if previous is not None:
+                    passage_writer.copy_from(previous, exclude_doc_ids=stale)
+                    if relex:
+                        lexical_index.add_many((chunk_id, previous.get(chunk_id)) for chunk_id in previous.chunk_ids
+                                               if split_chunk_id(chunk_id)[0] not in stale)
+                    previous.close()
+                sinks.append(passage_writer)
+            chunks = self._processed_chunks(changes["added"] + changes["modified"])
+            count = self.vectorizer.add_chunks(self._index_alongside(chunks, sinks))
+            update = changes.get("manifest_update")
+            manifest_changed = update is not None and any(update[key] for key in ("entries", "removed", "reset"))
+            if not (stale or count or relex or manifest_changed):
+                # Aynı dosyalar yeniden yazılmaz; sunum süreçleri de gereksiz yere yeniden yüklemez
+                print("ℹ️ Değişen belge yok; dizin yeniden yayımlanmadı.")
+                return count
+
+            side_files = {}  # Yan dosyanın yolu -> verilen yola yazan fonksiyon
+            if lexical_index is not None:
+                side_files[self.lexical_path] = lexical_index.save
+            if passage_writer is not None:
+                side_files[self.passage_path] = passage_writer.commit
+            if snapshots:
+                writers = {os.path.basename(path): write for path, write in side_files.items()}
+                if update is not None:
+                    writers[INGEST_MANIFEST_FILE] = lambda path: self.preprocessor.commit_manifest(update, path)
+                self.vectorizer.persist(side_files=writers)
+            else:
+                # Sürüm dosyası vektör deposuyla yazıldığından yan dizinler ondan önce kaydedilir
+                for path, write in side_files.items():
+                    write(path)
+                self.vectorizer.persist()
+                self.preprocessor.commit_manifest(update)
+        finally:
+            # Kayıt yarıda kaldıysa (veya depo hiç yazılmadıysa) geçici pasaj dosyası bırakılmaz
+            if passage_writer is not None:
+                passage_writer.discard()
+        return count
+
+
+# Kullanım
+if __name__ == "__main__":
+    from vectorizer import DocumentVectorizer
+
+    pipeline = IngestPipeline(DocumentVectorizer(vector_store='faiss'))
+    pipeline.run()
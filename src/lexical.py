@@ -0,0 +1,307 @@
+import os
+import re
+import math
+import unicodedata
+import numpy as np
+from chunker import split_chunk_id
+from tracing import span
+
+LEXICAL_INDEX_FILE = "models/embeddings/bm25_index.npz"
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# "6098 sayılı", "Madde 12", "m. 12" gibi atıflar
+CITATION_PATTERN = re.compile(r"\b\d{3,5}\s+sayılı\b|\b(?:madde|md|m)\.?\s*\d+\b", re.IGNORECASE)
+
+# Uzundan kısaya; çekim eklerinin yaygın olanları (hafif, sözlüksüz kök bulma)
+SUFFIXES = sorted({
+    "larının", "lerinin", "larında", "lerinde", "larına", "lerine", "ların", "lerin",
+    "ları", "leri", "lar", "ler",
+    "ının", "inin", "unun", "ünün", "nın", "nin", "nun", "nün",
+    "daki", "deki", "taki", "teki", "dan", "den", "tan", "ten",
+    "dır", "dir", "dur", "dür", "tır", "tir", "tur", "tür",
+    "yla", "yle", "da", "de", "ta", "te", "ya", "ye", "na", "ne",
+    "ın", "in", "un", "ün", "yı", "yi", "yu", "yü", "sı", "si", "su", "sü",
+    "ı", "i", "u", "ü", "a", "e",
+}, key=len, reverse=True)
+MIN_STEM = 3
+# Sonu ek gibi görünen hukuk terimleri; kök bu uzunluğun altına inmez ("kanunun" -> "kanun", "kan" değil)
+PROTECTED_STEMS = {
+    "kanun", "kira", "madde", "dava", "ceza", "icra", "tapu", "nafaka", "vasi", "vergi",
+    "irade", "mahkeme", "savcı", "sigorta",
+}
+# Kök bulma kuralları değişince artırılır; eski sürümle kaydedilmiş dizinler yeniden kurulur
+STEMMER_VERSION = 2
+
+STOPWORDS = {
+    "ve", "veya", "ile", "bir", "bu", "şu", "da", "de", "ki", "mi", "mı", "mu", "mü",
+    "için", "gibi", "olarak", "olan", "ne", "nedir", "nasıl", "hangi", "kaç", "midir",
+}
+
+
+def turkish_casefold(text):
+    """Türkçe kurallarıyla küçük harfe çevirir (I -> ı, İ -> i)."""
+    text = unicodedata.normalize("NFC", text)
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def stem(token):
+    """
+    Sondaki çekim eklerini (en fazla iki kat) soyar; sayılara dokunmaz.
+    Korunan bir terimle başlayan sözcük o terimden kısa köke indirilmez.
+    """
+    if token.isdigit():
+        return token
+    min_stem = max([MIN_STEM] + [len(word) for word in PROTECTED_STEMS if token.startswith(word)])
+    for _ in range(2):
+        for suffix in SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= min_stem:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+
+def tokenize(text):
+    """Metni Türkçe'ye duyarlı biçimde terimlere ayırır (casefold + durak kelime + kök)."""
+    return [stem(token) for token in TOKEN_PATTERN.findall(turkish_casefold(text))
+            if token not in STOPWORDS]
+
+
+def is_citation_query(query):
+    """
+    Sorgu yalnızca kanun/madde atfından oluşuyorsa True döner (ör. "6098 sayılı kanun madde 12").
+    Bu sorgular kodlayıcıya gerek kalmadan sözcüksel dizinle yanıtlanabilir.
+    """
+    if not CITATION_PATTERN.search(query):
+        return False
+    remainder = CITATION_PATTERN.sub(" ", query)
+    words = [w for w in TOKEN_PATTERN.findall(turkish_casefold(remainder))
+             if w not in STOPWORDS and w not in ("kanun", "kanunu", "kanunun", "tck", "tbk", "tmk", "hmk")]
+    return len(words) == 0
+
+
+class BM25Index:
+    """
+    Pasajlar için BM25 ters dizini.
+    - Kalıcı kısım CSR biçiminde tutulur: terim başına sıralı pasaj numaraları (uint32) ve
+      terim frekansları (uint16) tek bitişik dizilerde, terim ofsetleriyle birlikte.
+    - Yeni eklenen pasajlar kaydedilene kadar küçük bir ek (delta) dizinde bekler; silinen
+      pasajlar işaretlenir ve kaydederken sıkıştırılarak atılır.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.chunk_ids = []                          # pasaj numarası -> chunk_id
+        self.doc_lengths = np.zeros(0, dtype='uint32')
+        self.deleted = bytearray()                   # pasaj numarası -> silindi mi (0/1)
+        self.vocab = {}                              # terim -> CSR satırı
+        self.offsets = np.zeros(1, dtype='int64')
+        self.postings = np.zeros(0, dtype='uint32')
+        self.frequencies = np.zeros(0, dtype='uint16')
+        self._delta = {}                             # terim -> ([pasaj], [frekans])
+        self._delta_lengths = []
+        self.stemmer_version = STEMMER_VERSION
+
+    @property
+    def stale(self):
+        """Dizin farklı kök bulma kurallarıyla kurulduysa True; terimleri sorgularla eşleşmez."""
+        return self.stemmer_version != STEMMER_VERSION
+
+    def __len__(self):
+        return len(self.chunk_ids) - self.deleted.count(1)
+
+    def _deleted_mask(self):
+        return np.frombuffer(self.deleted, dtype=bool)
+
+    def _term_postings(self, term):
+        """Terimin (pasaj numaraları, frekanslar) dizilerini kalıcı ve ek dizinden birleştirir."""
+        parts_ids, parts_tfs = [], []
+        row = self.vocab.get(term)
+        if row is not None:
+            start, end = self.offsets[row], self.offsets[row + 1]
+            parts_ids.append(self.postings[start:end])
+            parts_tfs.append(self.frequencies[start:end])
+        if term in self._delta:
+            ids, tfs = self._delta[term]
+            parts_ids.append(np.asarray(ids, dtype='uint32'))
+            parts_tfs.append(np.asarray(tfs, dtype='uint16'))
+        if not parts_ids:
+            return None, None
+        if len(parts_ids) == 1:
+            return parts_ids[0], parts_tfs[0]
+        return np.concatenate(parts_ids), np.concatenate(parts_tfs)
+
+    def _all_lengths(self):
+        if self._delta_lengths:
+            return np.concatenate([self.doc_lengths, np.asarray(self._delta_lengths, dtype='uint32')])
+        return self.doc_lengths
+
+    def add(self, chunk_id, text):
+        """Pasajı dizine ekler."""
+        doc = len(self.chunk_ids)
+        terms = tokenize(text)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            ids, tfs = self._delta.setdefault(term, ([], []))
+            ids.append(doc)
+            tfs.append(min(tf, 65535))
+        self.chunk_ids.append(chunk_id)
+        self._delta_lengths.append(len(terms))
+        self.deleted.append(0)
+
+    def add_many(self, items):
+        for chunk_id, text in items:
+            self.add(chunk_id, text)
+
+    def remove_documents(self, doc_ids):
+        """Belgelere ait tüm pasajları silinmiş olarak işaretler."""
+        doc_ids = set(doc_ids)
+        for doc, chunk_id in enumerate(self.chunk_ids):
+            if not self.deleted[doc] and split_chunk_id(chunk_id)[0] in doc_ids:
+                self.deleted[doc] = 1
+
+    def search(self, query, top_k=5, allowed=None):
+        """
+        BM25 skoruna göre en iyi pasajları döndürür.
+        :param allowed: Kimlik listesinden izin verilenleri (sırası korunarak) döndüren fonksiyon
+                        (ör. koleksiyon veya meta veri filtresi); verilirse top_k yalnızca izin verilen
+                        pasajlar arasından seçilir
+        :return: [(chunk_id, score), ...] (yüksek skor daha alakalı)
+        """
+        with span("lexical_search", top_k=top_k, scoped=allowed is not None) as search_span:
+            results = self._search(query, top_k, allowed)
+            search_span.set(results=len(results))
+            return results
+
+    def _search(self, query, top_k, allowed=None):
+        terms = tokenize(query)
+        n_docs = len(self.chunk_ids)
+        if not terms or n_docs == 0:
+            return []
+
+        deleted = self._deleted_mask()
+        lengths = self._all_lengths().astype('float32')
+        live = len(self)
+        avg_length = float(lengths[~deleted].mean()) if live else 1.0
+        norms = self.k1 * (1 - self.b + self.b * lengths / max(avg_length, 1e-9))
+        scores = np.zeros(n_docs, dtype='float32')
+
+        for term in set(terms):
+            ids, tfs = self._term_postings(term)
+            if ids is None:
+                continue
+            df = int((~deleted[ids]).sum())
+            if df == 0:
+                continue
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            tfs = tfs.astype('float32')
+            np.add.at(scores, ids, idf * tfs * (self.k1 + 1) / (tfs + norms[ids]))
+
+        scores[deleted] = 0
+        candidates = np.nonzero(scores)[0]
+        if len(candidates) == 0:
+            return []
+        if allowed is not None:
+            return self._top_allowed(candidates, scores, top_k, allowed)
+        k = min(top_k, len(candidates))
+        best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        best = best[np.argsort(-scores[best])]
+        return [(self.chunk_ids[i], float(scores[i])) for i in best]
+
+    def _top_allowed(self, candidates, scores, top_k, allowed):
+        """
+        Adayları skor sırasıyla, büyüyen gruplar halinde `allowed`dan geçirir; top_k izin verilen
+        pasaj bulununca durur. Filtre yalnızca gerektiği kadar adayda değerlendirilir.
+        """
+        order = candidates[np.argsort(-scores[candidates], kind='stable')]
+        results, offset, batch = [], 0, max(2 * top_k, 32)
+        while offset < len(order) and len(results) < top_k:
+            chunk_ids = [self.chunk_ids[i] for i in order[offset:offset + batch]]
+            permitted = set(allowed(chunk_ids))
+            results += [(chunk_id, float(scores[i])) for chunk_id, i in zip(chunk_ids, order[offset:offset + batch])
+                        if chunk_id in permitted]
+            offset += batch
+            batch *= 2
+        return results[:top_k]
+
+    def save(self, path):
+        """Silinmiş pasajları atarak dizini tek bir sıkıştırılmış `.npz` dosyasına yazar."""
+        keep = np.nonzero(~self._deleted_mask())[0]
+        remap = np.full(len(self.chunk_ids), -1, dtype='int64')
+        remap[keep] = np.arange(len(keep))
+
+        terms = sorted(set(self.vocab) | set(self._delta))
+        offsets, postings, frequencies, vocab = [0], [], [], []
+        for term in terms:
+            ids, tfs = self._term_postings(term)
+            mask = remap[ids] >= 0
+            if not mask.any():
+                continue
+            postings.append(remap[ids[mask]].astype('uint32'))
+            frequencies.append(tfs[mask])
+            offsets.append(offsets[-1] + int(mask.sum()))
+            vocab.append(term)
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            vocab=np.array("\n".join(vocab)),
+            chunk_ids=np.array("\n".join(self.chunk_ids[i] for i in keep)),
+            doc_lengths=self._all_lengths()[keep],
+            offsets=np.asarray(offsets, dtype='int64'),
+            postings=np.concatenate(postings) if postings else np.zeros(0, dtype='uint32'),
+            frequencies=np.concatenate(frequencies) if frequencies else np.zeros(0, dtype='uint16'),
+            params=np.array([self.k1, self.b]),
+            stemmer=np.array(STEMMER_VERSION),
+        )
+        os.replace(tmp_path, path)
+        print(f"💾 BM25 dizini kaydedildi: {path} ({len(keep)} pasaj, {len(vocab)} terim)")
+
+    @classmethod
+    def load(cls, path):
+        """Kaydedilmiş dizini yükler; dosya yoksa boş dizin döndürür."""
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            k1, b = data["params"].tolist()
+            index = cls(k1=k1, b=b)
+            vocab = str(data["vocab"])
+            chunk_ids = str(data["chunk_ids"])
+            index.vocab = {term: row for row, term in enumerate(vocab.split("\n"))} if vocab else {}
+            index.chunk_ids = chunk_ids.split("\n") if chunk_ids else []
+            index.doc_lengths = data["doc_lengths"]
+            index.offsets = data["offsets"]
+            index.postings = data["postings"]
+            index.frequencies = data["frequencies"]
+            # Sürüm alanından önce kaydedilmiş dizinler ilk kök bulucuyla yazılmıştır
+            index.stemmer_version = int(data["stemmer"]) if "stemmer" in data.files else 1
+        if index.stale:
+            print(f"⚠️ BM25 dizini eski kök bulma kurallarıyla kurulmuş, sonraki alımda yeniden kurulacak: {path}")
+        index.deleted = bytearray(len(index.chunk_ids))
+        return index
+
+
+def reciprocal_rank_fusion(rankings, k=60, top_k=5):
+    """
+    Birden çok sıralamayı karşılıklı sıra birleştirmesiyle (RRF) tek sıralamaya indirger.
+    :param rankings: [[chunk_id, ...], ...] her biri en alakalıdan başlayan sıralamalar
+    :return: [(chunk_id, rrf_score), ...]
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+# Kullanım
+if __name__ == "__main__":
+    index = BM25Index.load(LEXICAL_INDEX_FILE)
+    print(f"📚 {len(index)} pasaj yüklendi.")
+    for chunk_id, score in index.search("6098 sayılı Türk Borçlar Kanunu madde 12", top_k=3):
+        print(f"🔍 {chunk_id}: {score:.3f}")
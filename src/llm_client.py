@@ -0,0 +1,131 @@
+import os
+import time
+import random
+import asyncio
+import weakref
+import requests
+from requests.adapters import HTTPAdapter
+from tracing import span
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMClient:
+    """
+    Groq-hosted LLM için HTTP istemcisi.
+    - Tek bir `requests.Session` üzerinden kalıcı (keep-alive) bağlantı havuzu kullanır.
+    - Her isteğe zaman aşımı uygular; 429/5xx ve bağlantı hatalarında jitter'lı üstel
+      geri çekilmeyle yeniden dener.
+    - asyncio arayüzü ve sınırlı eşzamanlılıkla toplu istek desteği sunar.
+    """
+
+    def __init__(self, api_url, api_key, timeout=(5, 60), max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, pool_size=10, max_concurrency=4):
+        """
+        :param api_url: LLM uç noktası
+        :param api_key: API anahtarı
+        :param timeout: (bağlantı, okuma) zaman aşımı (sn) veya tek bir değer
+        :param max_retries: İlk denemeye ek olarak en fazla yeniden deneme sayısı
+        :param backoff_base: Geri çekilme taban süresi (sn); deneme başına iki katına çıkar
+        :param backoff_max: Tek bir bekleme için üst sınır (sn)
+        :param pool_size: Havuzda tutulacak kalıcı bağlantı sayısı
+        :param max_concurrency: asyncio arayüzünde aynı anda uçuşta olabilecek istek sayısı
+        """
+        self.api_url = api_url
+        self.timeout = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> asyncio.Semaphore
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """GROQ_API_URL ve GROQ_API_KEY ortam değişkenlerinden istemci oluşturur."""
+        api_url = os.getenv("GROQ_API_URL")
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_url or not api_key:
+            raise ValueError("❌ API ayarları bulunamadı. Lütfen .env dosyasını kontrol edin.")
+        return cls(api_url, api_key, **kwargs)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Tam jitter'lı üstel geri çekilme süresi; sunucu Retry-After verdiyse ona uyar."""
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def post(self, payload, stream=False, **kwargs):
+        """
+        Yeniden deneme ve zaman aşımıyla POST isteği gönderir.
+        :return: Başarılı `requests.Response`
+        :raises requests.RequestException: Tüm denemeler başarısız olursa
+        """
+        with span("llm_call", stream=stream, prompt_chars=len(payload.get("prompt", ""))) as call_span:
+            response = self._post(payload, stream, call_span, **kwargs)
+            call_span.set(status=response.status_code)
+            return response
+
+    def _post(self, payload, stream, call_span, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            call_span.set(attempts=attempt + 1)
+            last_try = attempt == self.max_retries
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout,
+                                             stream=stream, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_try:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"⚠️ LLM bağlantı hatası ({e.__class__.__name__}), {delay:.2f} sn sonra yeniden deneniyor.")
+                time.sleep(delay)
+                continue
+
+            if response.status_code in RETRY_STATUSES and not last_try:
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                print(f"⚠️ LLM {response.status_code} döndü, {delay:.2f} sn sonra yeniden deneniyor.")
+                response.close()
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return response
+
+    def generate(self, prompt, max_tokens=300, **params):
+        """Prompt için tam yanıt metnini döndürür."""
+        result = self.post({"prompt": prompt, "max_tokens": max_tokens, **params}).json()
+        return result.get("response")
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._semaphores:
+            self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphores[loop]
+
+    async def agenerate(self, prompt, max_tokens=300, **params):
+        """`generate`in asyncio sürümü; eşzamanlılık `max_concurrency` ile sınırlıdır."""
+        async with self._semaphore():
+            return await asyncio.to_thread(self.generate, prompt, max_tokens, **params)
+
+    async def agenerate_many(self, prompts, max_tokens=300, **params):
+        """
+        Promptları eşzamanlı gönderir; sonuçlar girdi sırasıyla döner.
+        Başarısız istekler için sonuç listesinde istisna nesnesi yer alır.
+        """
+        tasks = [self.agenerate(prompt, max_tokens, **params) for prompt in prompts]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def generate_many(self, prompts, max_tokens=300, **params):
+        """`agenerate_many`nin senkron sarmalayıcısı (çalışan bir event loop dışında çağrılmalı)."""
+        return asyncio.run(self.agenerate_many(prompts, max_tokens, **params))
+
+    def close(self):
+        self.session.close()
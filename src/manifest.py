@@ -0,0 +1,106 @@
+import os
+import json
+import hashlib
+
+# FAISS anlık görüntüsünün içinde saklanan manifestonun adı (bkz. `ingest.IngestPipeline`)
+INGEST_MANIFEST_FILE = "ingest_manifest.json"
+
+
+def file_sha256(file_path, block_size=1 << 20):
+    """Dosyanın SHA-256 özetini bloklar halinde okuyarak hesaplar."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Ham belge manifestosu.
+    - Her ham dosya için boyut, değişiklik zamanı (mtime) ve içerik özetini saklar.
+    - Boyut ve mtime değişmemişse dosya yeniden okunmaz; değişmişse içerik özeti karşılaştırılır.
+    """
+
+    def __init__(self, path='data/manifest.json'):
+        """
+        :param path: Manifestonun JSON olarak saklandığı dosya
+        """
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            self.load(path)
+
+    def load(self, path):
+        """Kayıtları verilen dosyadan okur (ör. yayımlanmış anlık görüntüdeki manifesto)."""
+        with open(path, 'r', encoding='utf-8') as f:
+            self.entries = json.load(f)
+
+    def scan(self, folder, filenames, force=False):
+        """
+        Klasördeki dosyaları manifestoyla karşılaştırır; manifestoyu değiştirmez.
+        :param folder: Ham belgelerin klasörü
+        :param filenames: Değerlendirilecek dosya adları
+        :param force: True ise kayıtlar yok sayılır, tüm dosyalar yeni sayılır
+        :return: {"added": [...], "modified": [...], "removed": [...], "unchanged": [...]}
+                 ve yeni/değişmiş dosyaların manifesto kayıtları ({dosya: kayıt}), yalnızca mtime'ı
+                 değişmiş dosyaların tazelenmiş kayıtları (bkz. `commit`)
+        """
+        changes = {"added": [], "modified": [], "removed": [], "unchanged": []}
+        pending, refreshed = {}, {}
+        entries = {} if force else self.entries
+        for filename in filenames:
+            stat = os.stat(os.path.join(folder, filename))
+            entry = entries.get(filename)
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                changes["unchanged"].append(filename)
+                continue
+
+            sha256 = file_sha256(os.path.join(folder, filename))
+            record = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256}
+            if entry is None:
+                changes["added"].append(filename)
+                pending[filename] = record
+            elif entry["sha256"] != sha256:
+                changes["modified"].append(filename)
+                pending[filename] = record
+            else:
+                # İçerik aynı, yalnızca mtime değişmiş (ör. kopyalama); kaydı tazele
+                changes["unchanged"].append(filename)
+                refreshed[filename] = record
+
+        present = set(filenames)
+        changes["removed"] = [name for name in entries if name not in present]
+        return changes, pending, refreshed
+
+    def update(self, filename, record):
+        self.entries[filename] = record
+
+    def remove(self, filename):
+        self.entries.pop(filename, None)
+
+    def commit(self, entries, removed=(), reset=False, path=None):
+        """
+        Bekleyen güncellemeyi uygular ve manifestoyu kaydeder. Belge alımında dizinler
+        kaydedildikten sonra çağrılır; alım yarıda kalırsa manifesto eski haliyle kalır.
+        :param entries: Yazılacak kayıtlar ({dosya: kayıt})
+        :param removed: Manifestodan çıkarılacak dosyalar
+        :param reset: True ise (zorla yeniden işlemede) önceki kayıtların tümü atılır
+        :param path: Kaydedilecek dosya (default: `self.path`)
+        """
+        if reset:
+            self.entries = {}
+        for filename in removed:
+            self.remove(filename)
+        for filename, record in entries.items():
+            self.update(filename, record)
+        self.save(path)
+
+    def save(self, path=None):
+        """Manifestoyu geçici dosya üzerinden atomik olarak yazar."""
+        path = path or self.path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
@@ -0,0 +1,200 @@
+import os
+import re
+import json
+from lexical import turkish_casefold
+
+# Belge düzeyi alanlar (aynı belgenin tüm pasajlarında ortak) ve pasaj düzeyi alanlar
+DOCUMENT_FIELDS = ("source", "doc_type", "law_number", "title", "date", "year")
+CHUNK_FIELDS = ("article",)
+FILTER_FIELDS = DOCUMENT_FIELDS + CHUNK_FIELDS
+OPERATORS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin")
+
+# Başlıktaki anahtar kelimeye göre belge türü (ilk eşleşen kazanır; KHK, "kanun"dan önce denenir)
+DOC_TYPE_PATTERNS = (
+    ("khk", re.compile(r"kanun hükmünde kararname|\bkhk\b")),
+    ("cumhurbaskanligi_kararnamesi", re.compile(r"cumhurbaşkanlığı kararnamesi")),
+    ("yonetmelik", re.compile(r"yönetmeli[kğ]")),
+    ("teblig", re.compile(r"tebli[ğg]")),
+    ("genelge", re.compile(r"genelge")),
+    ("kanun", re.compile(r"\bkanun")),
+    ("karar", re.compile(r"\besas\s*(?:no|sayısı)|\bkarar\s*(?:no|sayısı)")),
+    ("sozlesme", re.compile(r"sözleşme")),
+)
+LAW_NUMBER_PATTERNS = (
+    re.compile(r"kanun\s+numaras[ıi]\s*:?\s*(\d{1,5})"),
+    re.compile(r"(\d{1,5})\s+sayılı"),
+)
+DATE_PATTERN = re.compile(r"\b(\d{1,2})[./](\d{1,2})[./](\d{4})\b")
+ISO_DATE_PATTERN = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+ACCEPTANCE_DATE_PATTERN = re.compile(r"kabul\s+tarihi\s*:?\s*(\d{1,2}[./]\d{1,2}[./]\d{4})")
+# Meta veri çıkarımında yalnızca belgenin başlık bölümüne bakılır
+HEADER_CHARS = 2000
+
+
+def _date_value(day, month, year):
+    day, month, year = int(day), int(month), int(year)
+    if not (1 <= day <= 31 and 1 <= month <= 12 and 1800 <= year <= 2200):
+        return None
+    return year * 10000 + month * 100 + day
+
+
+def parse_date(value):
+    """Tarihi YYYYMMDD tamsayısına çevirir ("2020-01-15", "15.01.2020", 20200115 veya yalnızca yıl)."""
+    if isinstance(value, int):
+        return value * 10000 + 101 if value < 10000 else value
+    value = str(value).strip()
+    match = ISO_DATE_PATTERN.match(value)
+    if match:
+        return _date_value(match.group(3), match.group(2), match.group(1))
+    match = DATE_PATTERN.search(value)
+    if match:
+        return _date_value(*match.groups())
+    if value.isdigit():
+        return parse_date(int(value))
+    raise ValueError(f"❌ Tarih anlaşılamadı: {value}")
+
+
+def extract_metadata(doc_id, text):
+    """
+    İşlenmiş belge metninden belge düzeyi meta veriyi çıkarır.
+    :param doc_id: Belge kimliği (dosya adı)
+    :param text: Belge metni
+    :return: {"source", "doc_type", "law_number", "title", "date", "year"} (bulunamayanlar atlanır)
+    """
+    header = text[:HEADER_CHARS]
+    folded = turkish_casefold(header)
+    metadata = {"source": os.path.basename(doc_id)}
+
+    title = next((line.strip() for line in header.splitlines() if line.strip()), None)
+    if title:
+        metadata["title"] = title[:200]
+    # Tür önce başlık satırından, bulunamazsa başlık bölümünden belirlenir
+    for scope in (turkish_casefold(title or ""), folded):
+        doc_type = next((name for name, pattern in DOC_TYPE_PATTERNS if pattern.search(scope)), None)
+        if doc_type:
+            metadata["doc_type"] = doc_type
+            break
+    for pattern in LAW_NUMBER_PATTERNS:
+        match = pattern.search(folded)
+        if match:
+            metadata["law_number"] = match.group(1)
+            break
+
+    match = ACCEPTANCE_DATE_PATTERN.search(folded) or DATE_PATTERN.search(header)
+    date = None
+    if match:
+        date = parse_date(match.group(1)) if match.re is ACCEPTANCE_DATE_PATTERN else _date_value(*match.groups())
+    if date:
+        metadata["date"] = date
+        metadata["year"] = date // 10000
+    return metadata
+
+
+def chunk_metadata(document_metadata, article):
+    """Pasaj meta verisi: belge alanları ve (varsa) madde numarası."""
+    metadata = dict(document_metadata or {})
+    if article is not None and str(article).isdigit():
+        metadata["article"] = int(article)
+    return metadata
+
+
+def split_metadata(metadata):
+    """Pasaj meta verisini (belge alanları, madde numarası) olarak ayırır."""
+    metadata = metadata or {}
+    return ({key: value for key, value in metadata.items() if key in DOCUMENT_FIELDS and value is not None},
+            metadata.get("article"))
+
+
+def _normalize_value(field, value):
+    if field == "date":
+        return parse_date(value)
+    if field in ("year", "article"):
+        return int(value)
+    return str(value)
+
+
+def normalize_filters(filters):
+    """
+    Filtreleri doğrular ve {alan: {operatör: değer}} biçimine getirir.
+    Değer doğrudan verilirse eşitlik, liste verilirse `$in` sayılır; ör.
+    {"doc_type": "kanun", "law_number": ["6098", "4721"], "date": {"$gte": "2020-01-01"}}.
+    """
+    if not filters:
+        return {}
+    normalized = {}
+    for field, condition in filters.items():
+        if field not in FILTER_FIELDS:
+            raise ValueError(f"❌ Geçersiz filtre alanı: {field}. Seçenekler: {', '.join(FILTER_FIELDS)}")
+        if not isinstance(condition, dict):
+            condition = {"$in": list(condition)} if isinstance(condition, (list, tuple, set)) else {"$eq": condition}
+        normalized[field] = {}
+        for operator, value in condition.items():
+            if operator not in OPERATORS:
+                raise ValueError(f"❌ Geçersiz filtre operatörü: {operator}. Seçenekler: {', '.join(OPERATORS)}")
+            if operator in ("$in", "$nin"):
+                value = [_normalize_value(field, item) for item in value]
+            else:
+                value = _normalize_value(field, value)
+            normalized[field][operator] = value
+    return normalized
+
+
+def filter_key(filters):
+    """Normalize edilmiş filtrelerin kararlı anahtarı (önbellekler için)."""
+    return json.dumps(filters, sort_keys=True, ensure_ascii=False)
+
+
+def _compare(value, operator, target):
+    # Değeri olmayan alan hiçbir koşulu sağlamaz ($ne/$nin dahil); Chroma da anahtarı olmayan
+    # kayıtları `where` ile eşleştirmez, iki depo aynı sonucu verir
+    if value is None:
+        return False
+    if operator == "$ne":
+        return value != target
+    if operator == "$nin":
+        return value not in target
+    if operator == "$eq":
+        return value == target
+    if operator == "$in":
+        return value in target
+    if operator == "$gt":
+        return value > target
+    if operator == "$gte":
+        return value >= target
+    if operator == "$lt":
+        return value < target
+    return value <= target
+
+
+def matches(metadata, filters, fields=FILTER_FIELDS):
+    """Meta veri, normalize edilmiş filtrelerin (yalnızca `fields` içindekilerin) tümünü sağlıyorsa True."""
+    return all(_compare(metadata.get(field), operator, target)
+               for field, condition in filters.items() if field in fields
+               for operator, target in condition.items())
+
+
+def to_chroma_where(filters):
+    """Normalize edilmiş filtreleri Chroma `where` ifadesine çevirir (None: filtre yok)."""
+    clauses = []
+    for field, condition in filters.items():
+        for operator, value in condition.items():
+            if operator == "$in":
+                options = [{field: {"$eq": item}} for item in value]
+                clauses.append(options[0] if len(options) == 1 else {"$or": options})
+            elif operator == "$nin":
+                clauses.extend({field: {"$ne": item}} for item in value)
+            else:
+                clauses.append({field: {operator: value}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+# Kullanım
+if __name__ == "__main__":
+    sample = ("TÜRK BORÇLAR KANUNU\nKanun Numarası: 6098\nKabul Tarihi: 11/1/2011\n"
+              "MADDE 1 - (1) Sözleşme, tarafların iradelerini karşılıklı ve birbirine uygun olarak açıklamalarıyla kurulur.")
+    metadata = extract_metadata("tbk.pdf", sample)
+    print(f"🏷️ {metadata}")
+    filters = normalize_filters({"law_number": "6098", "date": {"$gte": "2010-01-01"}})
+    print(f"✅ Eşleşme: {matches(metadata, filters)}, Chroma: {to_chroma_where(filters)}")
@@ -0,0 +1,120 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLMServer:
+    """
+    Testler ve ölçümler için yerel LLM taklidi.
+    - POST isteğine `{"response": ...}` JSON'u döner.
+    - İstekte `"stream": true` varsa yanıtı SSE (`data: {...}`) parçaları halinde akıtır.
+    - `cut_stream_after` verilirse akış o kadar parçadan sonra bitiş işareti olmadan kesilir.
+    """
+
+    def __init__(self, response="Hukuki süreçler mahkemelerde yürütülür.", token_delay=0.0,
+                 latency=0.0, fail_first=0, fail_status=503, cut_stream_after=None, host="127.0.0.1", port=0):
+        """
+        :param response: Döndürülecek sabit yanıt (str) veya prompt -> yanıt fonksiyonu
+        :param token_delay: Akış modunda parçalar arasındaki bekleme (sn)
+        :param latency: JSON yanıtından önce beklenecek süre (sn)
+        :param fail_first: İlk bu kadar istek `fail_status` ile reddedilir (yeniden deneme testleri)
+        :param fail_status: Reddedilen isteklerin HTTP durum kodu
+        :param cut_stream_after: Akışın yarıda kesileceği parça sayısı (None: akış tamamlanır)
+        :param port: 0 verilirse boş bir port seçilir
+        """
+        self.response = response
+        self.token_delay = token_delay
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.cut_stream_after = cut_stream_after
+        self._lock = threading.Lock()
+        self.requests = []  # Alınan istek gövdeleri (testlerde doğrulama için)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/generate"
+
+    def _answer(self, prompt):
+        return self.response(prompt) if callable(self.response) else self.response
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with server._lock:
+                    server.requests.append(payload)
+                    failing = len(server.requests) <= server.fail_first
+                if failing:
+                    self.send_response(server.fail_status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                answer = server._answer(payload.get("prompt", ""))
+
+                if payload.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for sent, token in enumerate(answer.split(" ")):
+                        if sent == server.cut_stream_after:
+                            self.close_connection = True
+                            return
+                        chunk = json.dumps({"response": token + " "}, ensure_ascii=False)
+                        self.wfile.write(f"data: {chunk}\n\n".encode("utf-8"))
+                        self.wfile.flush()
+                        time.sleep(server.token_delay)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.close_connection = True
+                    return
+
+                time.sleep(server.latency)
+                body = json.dumps({"response": answer}, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Kullanım
+if __name__ == "__main__":
+    with MockLLMServer(token_delay=0.05) as server:
+        print(f"🧪 Mock LLM sunucusu: {server.url} (durdurmak için Ctrl+C)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,158 @@
+import os
+import mmap
+import struct
+import threading
+from collections import OrderedDict
+import numpy as np
+from chunker import split_chunk_id
+from tracing import record_cache
+
+PASSAGE_STORE_FILE = "models/embeddings/passages.bin"
+
+# Dosya düzeni: başlık | ofset tablosu (n+1 x int64) | kimlikler ('\n' ile, UTF-8) | metin bloğu (UTF-8)
+MAGIC = b"PSG1"
+HEADER = struct.Struct("<4sQQ")  # sihirli sayı, pasaj sayısı, kimlik bloğu uzunluğu
+
+
+class PassageStore:
+    """
+    Paketlenmiş pasaj deposu.
+    - Tüm pasaj metinleri tek bir bitişik UTF-8 blokta, ofset tablosuyla birlikte tek dosyada tutulur.
+    - Dosya bellek eşlemeli (mmap) açılır; pasaj, kimliğiyle bulunup bloktan dilimlenerek okunur.
+    - Çözülmüş (str) pasajlar küçük bir LRU önbellekte tutulur.
+    """
+
+    def __init__(self, path=PASSAGE_STORE_FILE, cache_size=1024):
+        """
+        :param path: Paketlenmiş depo dosyası
+        :param cache_size: Önbellekte tutulacak çözülmüş pasaj sayısı
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, ids_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"❌ Geçersiz pasaj deposu: {path}")
+        table_start = HEADER.size
+        ids_start = table_start + (count + 1) * 8
+        self._data_start = ids_start + ids_length
+        # Ofset tablosu kopyalanmadan doğrudan eşlenmiş bellekten okunur
+        self.offsets = np.frombuffer(self._mmap, dtype='<i8', count=count + 1, offset=table_start)
+        ids = self._mmap[ids_start:self._data_start].decode("utf-8")
+        self.chunk_ids = ids.split("\n") if ids else []
+        self._positions = {chunk_id: i for i, chunk_id in enumerate(self.chunk_ids)}
+
+    @classmethod
+    def open(cls, path=PASSAGE_STORE_FILE, cache_size=1024):
+        """Depo dosyası varsa açar, yoksa None döndürür."""
+        return cls(path, cache_size) if os.path.exists(path) else None
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self._positions
+
+    def raw(self, position):
+        """Pasajın UTF-8 baytlarını kopyalamadan (memoryview) döndürür."""
+        start = self._data_start + int(self.offsets[position])
+        end = self._data_start + int(self.offsets[position + 1])
+        return memoryview(self._mmap)[start:end]
+
+    def get(self, chunk_id):
+        """Pasaj metnini döndürür; kimlik depoda yoksa None."""
+        with self._lock:
+            text = self._cache.get(chunk_id)
+            if text is not None:
+                self._cache.move_to_end(chunk_id)
+        record_cache("passage", text is not None)
+        if text is not None:
+            return text
+        position = self._positions.get(chunk_id)
+        if position is None:
+            return None
+        text = str(self.raw(position), "utf-8")
+        with self._lock:
+            self._cache[chunk_id] = text
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return text
+
+    def close(self):
+        self.offsets = None
+        self._mmap.close()
+
+
+class PassageStoreWriter:
+    """
+    Pasaj deposunu yazar.
+    - Metinler geldikçe geçici bir veri dosyasına eklenir; bellekte yalnızca kimlik ve ofsetler tutulur.
+    - `commit` başlığı, tabloyu ve veriyi tek dosyada birleştirip atomik olarak yerine koyar;
+      kaydedilmeyecek depo `discard` ile kapatılıp geçici dosyası silinir.
+    """
+
+    def __init__(self, path=PASSAGE_STORE_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._data_path = f"{path}.data.tmp"
+        self._data = open(self._data_path, 'wb')
+        self.chunk_ids = []
+        self.offsets = [0]
+
+    def _append(self, chunk_id, payload):
+        self._data.write(payload)
+        self.chunk_ids.append(chunk_id)
+        self.offsets.append(self.offsets[-1] + len(payload))
+
+    def add(self, chunk_id, text):
+        self._append(chunk_id, text.encode("utf-8"))
+
+    def copy_from(self, store, exclude_doc_ids=()):
+        """Eski depodaki pasajları (verilen belgelerinkiler hariç) çözmeden kopyalar."""
+        exclude_doc_ids = set(exclude_doc_ids)
+        for position, chunk_id in enumerate(store.chunk_ids):
+            if split_chunk_id(chunk_id)[0] not in exclude_doc_ids:
+                self._append(chunk_id, store.raw(position))
+
+    def discard(self):
+        """Kaydedilmemiş depoyu bırakır: geçici veri dosyası kapatılıp silinir (commit sonrası etkisizdir)."""
+        if self._data.closed:
+            return
+        self._data.close()
+        os.remove(self._data_path)
+
+    def commit(self, path=None):
+        """
+        Depoyu tek dosyada birleştirip atomik olarak yerine koyar.
+        :param path: Hedef dosya (default: `self.path`; ör. anlık görüntünün hazırlık klasörü)
+        """
+        path = path or self.path
+        self._data.close()
+        ids = "\n".join(self.chunk_ids).encode("utf-8")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as out, open(self._data_path, 'rb') as data:
+            out.write(HEADER.pack(MAGIC, len(self.chunk_ids), len(ids)))
+            out.write(np.asarray(self.offsets, dtype='<i8').tobytes())
+            out.write(ids)
+            while True:
+                block = data.read(1 << 20)
+                if not block:
+                    break
+                out.write(block)
+        os.remove(self._data_path)
+        os.replace(tmp_path, path)
+        print(f"💾 Pasaj deposu kaydedildi: {path} ({len(self.chunk_ids)} pasaj)")
+
+
+# Kullanım
+if __name__ == "__main__":
+    store = PassageStore.open()
+    if store is None:
+        print("⚠️ Pasaj deposu bulunamadı, önce belgeleri işleyin.")
+    else:
+        print(f"📚 {len(store)} pasaj yüklendi.")
+        for chunk_id in store.chunk_ids[:3]:
+            print(f"📄 {chunk_id}: {store.get(chunk_id)[:100]}...")
@@ -1,7 +1,60 @@
 import os
+import time
 import fitz  # PyMuPDF
 import docx
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from multiprocessing.connection import wait
+from manifest import IngestManifest
+from tracing import span
+
+
+# Süreç havuzunda çalışabilmeleri için okuyucular modül düzeyinde tanımlıdır.
+def read_pdf_pages(file_path, start=0, end=None):
+    """PDF'in [start, end) sayfa aralığındaki metni çıkarır."""
+    with fitz.open(file_path) as doc:
+        end = doc.page_count if end is None else min(end, doc.page_count)
+        return "".join([doc.load_page(i).get_text() for i in range(start, end)])
+
+
+def read_txt(file_path):
+    """TXT belgesini okur."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def read_docx(file_path):
+    """DOCX belgesindeki paragrafları okur."""
+    return "\n".join([para.text for para in docx.Document(file_path).paragraphs])
+
+
+def _worker_loop(conn):
+    """Çıkarıcı süreç: görevleri boru üzerinden alır, sonucu veya hatayı geri gönderir; None gelince çıkar."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        func, args = task
+        try:
+            conn.send((True, func(*args)))
+        except Exception as e:
+            conn.send((False, str(e)))
+    conn.close()
+
+
+def available_cpus():
+    """Sürecin kullanabileceği çekirdek sayısı (konteyner CPU kısıtları dahil)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def pdf_page_count(file_path):
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
 
 class DocumentPreprocessor:
     """
@@ -11,41 +64,151 @@ class DocumentPreprocessor:
 
     SUPPORTED_FORMATS = ('.pdf', '.txt', '.docx')
 
-    def __init__(self, input_folder='data/raw', output_folder='data/processed'):
+    def __init__(self, input_folder='data/raw', output_folder='data/processed', manifest_path=None,
+                 max_workers=None, file_timeout=300, pdf_pages_per_task=50):
+        """
+        :param input_folder: Ham belgelerin klasörü
+        :param output_folder: İşlenmiş belgelerin yazılacağı klasör
+        :param manifest_path: Verilirse yalnızca yeni/değişmiş dosyalar işlenir (bkz. `IngestManifest`)
+        :param max_workers: Çıkarım süreç sayısı (default: kullanılabilir çekirdek sayısı)
+        :param file_timeout: Bir dosyanın (veya PDF sayfa aralığının) en fazla işlenme süresi (sn)
+        :param pdf_pages_per_task: Büyük PDF'ler bu kadar sayfalık parçalara bölünüp paralel okunur
+        """
         self.input_folder = input_folder
         self.output_folder = output_folder
+        self.manifest = IngestManifest(manifest_path) if manifest_path else None
+        self.max_workers = max_workers or available_cpus()
+        self.file_timeout = file_timeout
+        self.pdf_pages_per_task = pdf_pages_per_task
         os.makedirs(self.output_folder, exist_ok=True)
 
-    def _read_pdf(self, file_path):
-        """PDF belgesini okur ve metni çıkarır."""
-        text = ""
-        try:
-            with fitz.open(file_path) as doc:
-                for page in doc:
-                    text += page.get_text()
-        except Exception as e:
-            print(f"❌ PDF okunurken hata oluştu: {file_path} - Hata: {e}")
-        return text
+    def _plan_tasks(self, files):
+        """
+        Dosyaları çıkarım görevlerine böler: [(file, part, func, args), ...]
+        Büyük PDF'ler sayfa aralıklarına ayrılır; diğer dosyalar tek görevdir.
+        :return: (görevler, {file: parça sayısı})
+        """
+        tasks, parts = [], {}
+        for file in files:
+            file_path = os.path.join(self.input_folder, file)
+            if file.endswith('.pdf'):
+                try:
+                    page_count = pdf_page_count(file_path)
+                except Exception as e:
+                    print(f"❌ PDF okunurken hata oluştu: {file_path} - Hata: {e}")
+                    continue
+                ranges = [(start, start + self.pdf_pages_per_task)
+                          for start in range(0, page_count, self.pdf_pages_per_task)] or [(0, 0)]
+                for part, (start, end) in enumerate(ranges):
+                    tasks.append((file, part, read_pdf_pages, (file_path, start, end)))
+                parts[file] = len(ranges)
+            elif file.endswith('.txt'):
+                tasks.append((file, 0, read_txt, (file_path,)))
+                parts[file] = 1
+            elif file.endswith('.docx'):
+                tasks.append((file, 0, read_docx, (file_path,)))
+                parts[file] = 1
+        return tasks, parts
 
-    def _read_txt(self, file_path):
-        """TXT belgesini okur ve metni çıkarır."""
-        text = ""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        except Exception as e:
-            print(f"❌ TXT okunurken hata oluştu: {file_path} - Hata: {e}")
-        return text
+    def _extract_parallel(self, files):
+        """
+        Dosyaları en fazla `max_workers` uzun ömürlü çıkarıcı süreçte paralel çıkarır ve tamamlanan her
+        dosyayı hemen döndürür. Süreçler görevden göreve yeniden kullanılır; yalnızca zaman aşımına
+        uğrayan (sonlandırılan) veya çöken süreçlerin yerine yenisi açılır. Zaman aşımı görevin
+        çalışırken geçirdiği süreyi ölçer; tek görev de aynı sınırla ayrı süreçte çalışır, çünkü takılan
+        bir okuyucu ancak süreci sonlandırılarak durdurulabilir. Hata veren veya zaman aşımına uğrayan
+        dosyalar atlanır, diğerleri etkilenmez.
+        :return: (file, content) üreteci
+        """
+        tasks, parts = self._plan_tasks(files)
+        pending = list(reversed(tasks))
+        results = {file: [None] * count for file, count in parts.items()}
+        failed = set()
+        context = multiprocessing.get_context()
+        workers = {}  # Ana süreç tarafındaki boru ucu -> çıkarıcı süreç
+        idle = []
+        busy = {}     # boru ucu -> (file, part, başlangıç zamanı)
+
+        def spawn():
+            conn, child = context.Pipe()
+            process = context.Process(target=_worker_loop, args=(child,), daemon=True)
+            process.start()
+            child.close()
+            workers[conn] = process
+            idle.append(conn)
+
+        def kill(conn):
+            process = workers.pop(conn)
+            busy.pop(conn, None)
+            if conn in idle:
+                idle.remove(conn)
+            if process.is_alive():
+                process.kill()
+            process.join()
+            conn.close()
+
+        def fail(file, message):
+            print(message)
+            failed.add(file)
+            results.pop(file, None)
+            # Aynı dosyanın hâlâ çalışan diğer parçaları boşuna beklenmez
+            for conn in [conn for conn, task in busy.items() if task[0] == file]:
+                kill(conn)
 
-    def _read_docx(self, file_path):
-        """DOCX belgesini okur ve metni çıkarır."""
-        text = ""
         try:
-            doc = docx.Document(file_path)
-            text = "\n".join([para.text for para in doc.paragraphs])
-        except Exception as e:
-            print(f"❌ DOCX okunurken hata oluştu: {file_path} - Hata: {e}")
-        return text
+            while pending or busy:
+                while pending and (idle or len(workers) < self.max_workers):
+                    file, part, func, args = pending.pop()
+                    if file in failed:
+                        continue
+                    if not idle:
+                        spawn()
+                    conn = idle.pop()
+                    try:
+                        conn.send((func, args))
+                    except OSError:
+                        # Boşta beklerken ölmüş süreç; görev yeni bir sürece verilir
+                        kill(conn)
+                        pending.append((file, part, func, args))
+                        continue
+                    busy[conn] = (file, part, time.monotonic())
+                if not busy:
+                    break
+
+                next_deadline = min(started + self.file_timeout for *_, started in busy.values())
+                for conn in wait(list(busy), timeout=max(0.0, next_deadline - time.monotonic())):
+                    if conn not in busy:
+                        continue
+                    file, part, _ = busy.pop(conn)
+                    try:
+                        ok, value = conn.recv()
+                        idle.append(conn)
+                    except EOFError:
+                        kill(conn)
+                        ok, value = False, "çıkarıcı süreç beklenmedik şekilde sonlandı"
+                    if not ok:
+                        fail(file, f"❌ Belge okunurken hata oluştu: {file} - Hata: {value}")
+                        continue
+                    results[file][part] = value
+                    if all(r is not None for r in results[file]):
+                        yield file, "".join(results.pop(file))
+
+                now = time.monotonic()
+                for conn, (file, _, started) in list(busy.items()):
+                    if conn in busy and now - started >= self.file_timeout:
+                        kill(conn)
+                        fail(file, f"⏱️ Belge zaman aşımına uğradı ({self.file_timeout} sn): {file}")
+        finally:
+            # Boştaki süreçler kapatılır; yarıda bırakılan (ör. tüketici durduğunda) görevlerinkiler sonlandırılır
+            for conn in idle:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+            for conn, process in list(workers.items()):
+                if conn not in busy:
+                    process.join(timeout=1)
+                kill(conn)
 
     def _save_processed_text(self, filename, content):
         """İşlenmiş metni çıktılar klasörüne kaydeder."""
@@ -57,25 +220,78 @@ class DocumentPreprocessor:
         except Exception as e:
             print(f"❌ Metin kaydedilemedi: {output_path} - Hata: {e}")
 
-    def process_documents(self):
-        """Belgeleri işler ve çıktı klasörüne kaydeder."""
+    def _remove_processed_text(self, filename):
+        """Silinmiş veya çıkarımı başarısız olmuş bir ham belgenin (eski) işlenmiş çıktısını kaldırır."""
+        output_path = os.path.join(self.output_folder, filename)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+            print(f"🗑️ İşlenmiş belge silindi: {output_path}")
+
+    def process_documents(self, force=False, save_manifest=True):
+        """
+        Belgeleri işler ve çıktı klasörüne kaydeder.
+        Manifesto kullanılıyorsa yalnızca yeni ve değişmiş dosyalar okunur, silinmiş
+        dosyaların çıktıları kaldırılır.
+        :param force: True ise manifesto yok sayılır ve tüm dosyalar yeniden işlenir
+        :param save_manifest: False ise manifesto kaydedilmez; güncelleme sonuçta "manifest_update"
+                              olarak döner ve dizinler kaydedildikten sonra `commit_manifest` ile uygulanır
+        :return: {"added": [...], "modified": [...], "removed": [...], "unchanged": [...]}
+        """
         files = [f for f in os.listdir(self.input_folder) if f.endswith(self.SUPPORTED_FORMATS)]
+        changes = {"added": files, "modified": [], "removed": [], "unchanged": []}
+        pending, update = {}, None
+        if self.manifest is not None:
+            changes, pending, refreshed = self.manifest.scan(self.input_folder, files, force=force)
+            update = {"entries": refreshed, "removed": changes["removed"], "reset": force}
+            for file in changes["removed"]:
+                self._remove_processed_text(f"{file}.processed.txt")
+            files = changes["added"] + changes["modified"]
+            print(f"📋 Manifesto: {len(changes['added'])} yeni, {len(changes['modified'])} değişmiş, "
+                  f"{len(changes['removed'])} silinmiş, {len(changes['unchanged'])} değişmemiş belge.")
+
         if not files:
             print("⚠️ İşlenecek belge bulunamadı.")
-            return
+            return self._finish(changes, update, save_manifest)
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            for file in files:
-                file_path = os.path.join(self.input_folder, file)
-                if file.endswith('.pdf'):
-                    content = executor.submit(self._read_pdf, file_path).result()
-                elif file.endswith('.txt'):
-                    content = executor.submit(self._read_txt, file_path).result()
-                elif file.endswith('.docx'):
-                    content = executor.submit(self._read_docx, file_path).result()
-                
+        start_time = time.perf_counter()
+        processed = 0
+        with span("extract", files=len(files), workers=self.max_workers) as extract_span:
+            chars = 0
+            extracted = set()
+            for file, content in self._extract_parallel(files):
                 if content:
                     self._save_processed_text(f"{file}.processed.txt", content)
+                    extracted.add(file)
+                    processed += 1
+                    chars += len(content)
+                    if file in pending:
+                        update["entries"][file] = pending[file]
+            # Çıkarılamayan belgenin önceki sürümünün metni dizine yeniden eklenmesin; manifesto kaydı
+            # da güncellenmediğinden belge sonraki alımda yeniden denenir
+            for file in files:
+                if file not in extracted:
+                    self._remove_processed_text(f"{file}.processed.txt")
+            extract_span.set(processed=processed, chars=chars)
+        print(f"📄 {processed}/{len(files)} belge {time.perf_counter() - start_time:.1f} sn'de "
+              f"{self.max_workers} süreçle işlendi.")
+
+        return self._finish(changes, update, save_manifest)
+
+    def _finish(self, changes, update, save_manifest):
+        if update is not None:
+            if save_manifest:
+                self.commit_manifest(update)
+            else:
+                changes["manifest_update"] = update
+        return changes
+
+    def commit_manifest(self, update, path=None):
+        """
+        `process_documents(save_manifest=False)` ile dönen manifesto güncellemesini uygulayıp kaydeder.
+        :param path: Kaydedilecek dosya (default: manifestonun kendi yolu)
+        """
+        if self.manifest is not None and update is not None:
+            self.manifest.commit(**update, path=path)
 
 # Kullanım
 if __name__ == "__main__":
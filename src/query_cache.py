@@ -0,0 +1,156 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from embedding_cache import normalize_text
+from lexical import turkish_casefold
+from metadata import filter_key
+from tracing import tracer, record_cache
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+KINDS = ("embedding", "results")
+
+
+def normalize_query(query):
+    """
+    Önbellek anahtarı için sorguyu normalleştirir: Unicode NFC, Türkçe küçük harf (I -> ı, İ -> i),
+    noktalama yerine boşluk ve boşluk sadeleştirme. "Kira Bedeli NEDİR?" ile "kira bedeli nedir"
+    aynı anahtarı verir.
+    """
+    return " ".join(PUNCTUATION_PATTERN.sub(" ", turkish_casefold(normalize_text(query))).split())
+
+
+class QueryCache:
+    """
+    Sorgu tarafı LRU önbelleği.
+    - Sorgu gömmeleri normalleştirilmiş sorguya göre tutulur; tekrar eden ve popüler sorgular
+      kodlayıcıya hiç gitmez. Gömmeler dizinden bağımsızdır, yeniden dizinlemede korunur.
+    - Arama sonuçları (ilk aşama [(chunk_id, score)] listeleri) normalleştirilmiş sorgu, vektör deposu
+      ve arama kapsamıyla tutulur ve dizin sürümüyle etiketlenir; sürüm değişince kayıt ıskalanıp
+      yenilenir. FAISS ve Chroma aynı önbelleği paylaşsa da birbirlerinin kayıtlarını ezmez.
+    - Her kayıt hesaplanma süresini saklar; isabetlerde kazanılan süre `saved_ms` olarak toplanır.
+    """
+
+    def __init__(self, max_embeddings=10_000, max_results=10_000):
+        """
+        :param max_embeddings: En fazla tutulacak sorgu gömmesi
+        :param max_results: En fazla tutulacak arama sonucu listesi
+        """
+        self.max_entries = {"embedding": max_embeddings, "results": max_results}
+        self._entries = {kind: OrderedDict() for kind in KINDS}  # anahtar -> (sürüm, değer, süre sn)
+        self._hits = dict.fromkeys(KINDS, 0)
+        self._misses = dict.fromkeys(KINDS, 0)
+        self._saved = dict.fromkeys(KINDS, 0.0)
+        self._lock = threading.Lock()  # Sunum iş parçacıkları aynı önbelleği paylaşır
+        self._saved_counter = tracer.metrics.counter("query_cache_saved_seconds_total",
+                                                     "Sorgu önbelleği isabetleriyle kazanılan süre (sn)")
+
+    @staticmethod
+    def result_key(query, top_k, hybrid=False, collections=None, filters=None, vector_store=None):
+        """Arama sonucunu belirleyen her şeyi içeren anahtar (vektör deposu + normalleştirilmiş sorgu + kapsam)."""
+        return (vector_store, normalize_query(query), top_k, hybrid,
+                None if collections is None else tuple(collections), filter_key(filters or {}))
+
+    def _lookup(self, kind, keys, version):
+        """Anahtarların değerlerini döndürür; ıskalananlar (veya eski sürümlüler) None olur."""
+        found = []
+        with self._lock:
+            entries = self._entries[kind]
+            for key in keys:
+                entry = entries.get(key)
+                if entry is not None and entry[0] == version:
+                    entries.move_to_end(key)
+                    self._hits[kind] += 1
+                    self._saved[kind] += entry[2]
+                    self._saved_counter.inc(entry[2], cache=kind)
+                    found.append(entry[1])
+                else:
+                    self._misses[kind] += 1
+                    found.append(None)
+        hits = sum(value is not None for value in found)
+        record_cache(f"query_{kind}", True, hits)
+        record_cache(f"query_{kind}", False, len(keys) - hits)
+        return found
+
+    def _store(self, kind, items, version, seconds):
+        with self._lock:
+            entries = self._entries[kind]
+            for key, value in items:
+                entries[key] = (version, value, seconds)
+                entries.move_to_end(key)
+            while len(entries) > self.max_entries[kind]:
+                entries.popitem(last=False)
+
+    def _get_many(self, kind, keys, version, compute):
+        """
+        Ortak "bul ya da hesapla" akışı: ıskalanan her farklı anahtar için ilk sorgunun sırası
+        `compute(sıralar)`ya tek çağrıda verilir; aynı anahtarlı sorgular sonucu paylaşır.
+        """
+        values = self._lookup(kind, keys, version)
+        pending = {}
+        for i, (key, value) in enumerate(zip(keys, values)):
+            if value is None:
+                pending.setdefault(key, []).append(i)
+        if pending:
+            first = [indices[0] for indices in pending.values()]
+            start = time.perf_counter()
+            computed = compute(first)
+            seconds = (time.perf_counter() - start) / len(first)
+            self._store(kind, zip(pending, computed), version, seconds)
+            for indices, value in zip(pending.values(), computed):
+                for i in indices:
+                    values[i] = value
+        return values
+
+    def embed(self, query, encode):
+        """Sorgu gömmesini önbellekten veya `encode(query)` ile döndürür."""
+        return self._get_many("embedding", [normalize_query(query)], None,
+                              lambda _: [np.asarray(encode(query), dtype='float32')])[0]
+
+    def embed_many(self, queries, encode_batch):
+        """Sorgu gömmelerini döndürür; yalnızca ıskalananlar `encode_batch(metinler)`a tek geçişte gider."""
+        queries = list(queries)
+        vectors = self._get_many("embedding", [normalize_query(query) for query in queries], None,
+                                 lambda pending: list(np.asarray(encode_batch([queries[i] for i in pending]),
+                                                                 dtype='float32')))
+        return np.vstack(vectors) if vectors else np.empty((0, 0), dtype='float32')
+
+    def search_many(self, keys, index_version, search):
+        """
+        Arama sonuçlarını önbellekten veya `search(sıralar)` ile döndürür.
+        :param keys: Her sorgu için `result_key` çıktısı
+        :param index_version: Dizinin güncel sürümü; farklı sürümle kaydedilmiş sonuçlar kullanılmaz
+        :param search: Iskalanan sorguların sıralarını alıp sonuç listelerini döndüren fonksiyon
+        """
+        return self._get_many("results", keys, index_version, search)
+
+    def clear(self):
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+
+    def stats(self):
+        """Tür başına isabet/ıska, isabet oranı, kazanılan süre (ms) ve kayıt sayısı."""
+        with self._lock:
+            stats = {}
+            for kind in KINDS:
+                lookups = self._hits[kind] + self._misses[kind]
+                stats[kind] = {
+                    "hits": self._hits[kind],
+                    "misses": self._misses[kind],
+                    "hit_ratio": self._hits[kind] / lookups if lookups else 0.0,
+                    "saved_ms": self._saved[kind] * 1000,
+                    "entries": len(self._entries[kind]),
+                }
+            return stats
+
+
+# Kullanım
+if __name__ == "__main__":
+    cache = QueryCache()
+    encode = lambda text: (time.sleep(0.05), np.ones(3))[1]
+    for query in ("Kira bedeli NEDİR?", "kira  bedeli nedir", "KIRA bedeli nedir"):
+        print(f"🔑 {normalize_query(query)!r}")
+        cache.embed(query, encode)
+    print(f"📦 {cache.stats()['embedding']}")
@@ -0,0 +1,378 @@
+import json
+import asyncio
+import threading
+from tracing import tracer, span, render_prometheus
+from metadata import normalize_filters, filter_key
+
+MAX_BODY_BYTES = 1 << 20
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+_STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error", 501: "Not Implemented",
+                503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class ServiceOverloaded(Exception):
+    """Bekleme kuyruğu dolu; istek işlenmeden reddedilir (HTTP 503)."""
+
+
+class DeadlineExceeded(Exception):
+    """İsteğin süresi, sonucu hazır olmadan doldu (HTTP 504)."""
+
+
+class MicroBatcher:
+    """
+    Eşzamanlı istekleri kısa bir pencerede toplayıp tek çağrıda işleyen asyncio toplayıcı.
+    - Pencere ilk bekleyen isteğin geliş zamanından başlar; önceki toplu iş sürerken kuyrukta
+      bekleyen istekler ayrıca beklemez, toplu iş `max_batch_size` dolunca hemen başlar.
+    - Toplu işler sırayla, event loop'u bloklamadan bir iş parçacığında çalışır.
+    - Kuyruk `max_queue` ile sınırlıdır; doluysa `ServiceOverloaded` yükseltilir.
+    - Süresi dolmuş veya iptal edilmiş istekler kodlayıcıya gönderilmeden atlanır.
+    """
+
+    def __init__(self, handler, max_batch_size=32, max_wait_ms=5, max_queue=256):
+        """
+        :param handler: Girdi listesi alıp aynı sırayla sonuç listesi döndüren senkron fonksiyon
+        :param max_batch_size: Tek toplu işteki en fazla istek
+        :param max_wait_ms: İlk istekten sonra diğerleri için beklenecek en uzun süre (ms)
+        :param max_queue: Bekleyebilecek en fazla istek (geri basınç)
+        """
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._arrived = asyncio.Event()
+        self._worker = None
+        self._batch_sizes = tracer.metrics.histogram("query_service_batch_size",
+                                                     "Toplu iş başına sorgu sayısı", BATCH_SIZE_BUCKETS)
+
+    @property
+    def queued(self):
+        return self._queue.qsize()
+
+    async def submit(self, item, deadline):
+        """
+        Girdiyi kuyruğa ekler ve sonucunu bekler.
+        :param deadline: `loop.time()` cinsinden son an; dolarsa `DeadlineExceeded`
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is None:
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        try:
+            self._queue.put_nowait((item, future, deadline, loop.time()))
+        except asyncio.QueueFull:
+            raise ServiceOverloaded() from None
+        self._arrived.set()
+        try:
+            return await asyncio.wait_for(future, max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded() from None
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        window_end = batch[0][3] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = window_end - loop.time()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            now = loop.time()
+            live = [(item, future) for item, future, deadline, _ in batch
+                    if not future.done() and deadline > now]
+            if not live:
+                continue
+            self._batch_sizes.observe(len(live))
+            try:
+                results = await asyncio.to_thread(self.handler, [item for item, _ in live])
+            except Exception as e:
+                for _, future in live:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(live, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+class QueryService:
+    """
+    Programatik erişim için arayüzsüz (headless) asyncio HTTP sorgu servisi.
+    - `POST /search` {"query": ..., "filters": {...}}: pasajları döndürür; `POST /ask`: ayrıca LLM
+      yanıtı üretir. Meta veri filtreleri (bkz. `metadata.normalize_filters`) isteğe bağlıdır.
+    - Eşzamanlı sorgular `MicroBatcher` ile birkaç ms içinde toplanır ve `retrieve_many` ile tek
+      kodlayıcı geçişi ve tek FAISS matris aramasıyla yanıtlanır.
+    - Kuyruk doluysa 503 (Retry-After), istek süresi (`timeout_ms`, default `timeout`) dolarsa 504 döner.
+    - `GET /health` kuyruk durumunu, `GET /metrics` Prometheus metriklerini verir.
+    """
+
+    def __init__(self, retriever, generator=None, host="127.0.0.1", port=8080, max_batch_size=32,
+                 max_wait_ms=5, max_queue=256, timeout=10.0):
+        """
+        :param retriever: `DocumentRetriever` veya her toplu işte güncel getiriciyi döndüren fonksiyon
+                          (ör. `lambda: resources.get_retriever()`, yeni dizin sürümleri devreye girer)
+        :param generator: `AnswerGenerator` (None: `/ask` kapalı)
+        :param port: 0 verilirse boş bir port seçilir
+        :param max_batch_size: Tek toplu işteki en fazla sorgu
+        :param max_wait_ms: Toplu iş penceresi (ms)
+        :param max_queue: Bekleyebilecek en fazla sorgu; aşılırsa istek 503 ile reddedilir
+        :param timeout: İstek başına varsayılan ve en uzun süre (sn)
+        """
+        self.retriever = retriever
+        self.generator = generator
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.batcher_options = {"max_batch_size": max_batch_size, "max_wait_ms": max_wait_ms,
+                                "max_queue": max_queue}
+        self.batcher = None
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._connections = set()  # Açık (keep-alive) bağlantıların görevleri
+        self._requests = tracer.metrics.counter("query_service_requests_total",
+                                                "Uç nokta ve durum koduna göre istek sayısı")
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _current_retriever(self):
+        return self.retriever() if callable(self.retriever) else self.retriever
+
+    def _retrieve_batch(self, items):
+        """
+        Toplu iş iş parçacığında çalışır: aynı filtreyi paylaşan sorgular için tek `retrieve_many`
+        çağrısı (filtresiz sorgular tek grupta toplanır).
+        """
+        retriever = self._current_retriever()
+        groups = {}
+        for i, (_, filters) in enumerate(items):
+            groups.setdefault(filter_key(filters), []).append(i)
+        results = [None] * len(items)
+        with span("query_batch", queries=len(items), groups=len(groups)):
+            for indices in groups.values():
+                queries = [items[i][0] for i in indices]
+                filters = items[indices[0]][1]
+                found = retriever.retrieve_many(queries, filters=filters) if filters else \
+                    retriever.retrieve_many(queries)
+                for i, documents in zip(indices, found):
+                    results[i] = documents
+        return results
+
+    async def _search(self, query, deadline, filters=None):
+        return await self.batcher.submit((query, filters or {}), deadline)
+
+    async def _ask(self, query, deadline, filters=None):
+        documents = await self._search(query, deadline, filters)
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            answer = await asyncio.wait_for(self.generator.agenerate_answer(query, documents),
+                                            max(remaining, 0))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded() from None
+        return documents, answer
+
+    @staticmethod
+    def _documents_payload(documents):
+        return [{"chunk_id": chunk_id, "content": content, "score": float(score)}
+                for chunk_id, content, score in documents]
+
+    async def _dispatch(self, method, path, body):
+        """İsteği yönlendirir: (durum, gövde, ek başlıklar) döndürür."""
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "queued": self.batcher.queued}, {}
+        if path == "/metrics" and method == "GET":
+            return 200, render_prometheus(), {}
+        if path not in ("/search", "/ask"):
+            return 404, {"error": "Bulunamadı."}, {}
+        if method != "POST":
+            return 405, {"error": "Yalnızca POST desteklenir."}, {"Allow": "POST"}
+        if path == "/ask" and self.generator is None:
+            return 501, {"error": "Yanıt üretici yapılandırılmadı."}, {}
+
+        try:
+            payload = json.loads(body or b"{}")
+            query = payload["query"]
+            timeout = min(float(payload.get("timeout_ms", self.timeout * 1000)) / 1000, self.timeout)
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": "Gövde {\"query\": \"...\"} biçiminde JSON olmalıdır."}, {}
+        if not isinstance(query, str) or not query.strip():
+            return 400, {"error": "Sorgu boş olamaz."}, {}
+        try:
+            filters = normalize_filters(payload.get("filters"))
+        except (ValueError, TypeError, AttributeError) as e:
+            return 400, {"error": f"Geçersiz filtre: {e}"}, {}
+
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            if path == "/search":
+                documents = await self._search(query, deadline, filters)
+                return 200, {"query": query, "results": self._documents_payload(documents)}, {}
+            documents, answer = await self._ask(query, deadline, filters)
+            return 200, {"query": query, "answer": answer, "results": self._documents_payload(documents)}, {}
+        except ServiceOverloaded:
+            return 503, {"error": "Servis yoğun, lütfen tekrar deneyin."}, {"Retry-After": "1"}
+        except DeadlineExceeded:
+            return 504, {"error": f"İstek {timeout:.3f} sn içinde tamamlanamadı."}, {}
+        except Exception as e:
+            print(f"❌ Sorgu işlenirken hata oluştu: {e}")
+            return 500, {"error": "Sorgu işlenirken hata oluştu."}, {}
+
+    @staticmethod
+    async def _read_request(reader):
+        """HTTP/1.1 isteğini okur: (yöntem, yol, sürüm, başlıklar, gövde) veya bağlantı kapandıysa None."""
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, path, version = request_line.decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, value = line.decode("latin-1").split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY_BYTES:
+            raise ValueError("body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path, version, headers, body
+
+    @staticmethod
+    def _write_response(writer, status, payload, headers, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json"
+        lines = [f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}",
+                 f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+    async def _handle_connection(self, reader, writer):
+        """Bağlantıdaki istekleri (keep-alive) sırayla yanıtlar."""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError:
+                    self._write_response(writer, 413, {"error": "İstek geçersiz veya çok büyük."}, {}, False)
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+                status, payload, extra = await self._dispatch(method, path, body)
+                self._requests.inc(endpoint=path.split("?", 1)[0], status=status)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                self._write_response(writer, status, payload, extra, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            self._connections.discard(task)
+
+    async def start_server(self):
+        """Sunucuyu çalışan event loop'ta başlatır."""
+        self.batcher = MicroBatcher(self._retrieve_batch, **self.batcher_options)
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        print(f"🚀 Sorgu servisi yayında: {self.url} (/search, /ask, /health, /metrics)")
+        return self._server
+
+    async def serve_forever(self):
+        await self.start_server()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self):
+        """Servisi kendi event loop'uyla arka plan iş parçacığında başlatır (testler ve gömülü kullanım)."""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start_server())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        async def shutdown():
+            self._server.close()
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            await self.batcher.close()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Kullanım
+if __name__ == "__main__":
+    import argparse
+    from resources import ResourceManager
+    from utils import load_yaml_config
+    from tracing import configure_tracing
+
+    model_config = load_yaml_config("configs/model_config.yaml")
+    config = dict(model_config.get("service", {}))
+    parser = argparse.ArgumentParser(description="Arayüzsüz sorgu servisi")
+    parser.add_argument("--host", default=config.pop("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=config.pop("port", 8080))
+    parser.add_argument("--vector-store", default=config.pop("vector_store", "faiss"))
+    parser.add_argument("--top-k", type=int, default=config.pop("top_k", 5))
+    args = parser.parse_args()
+
+    configure_tracing(model_config.get("tracing"))
+    resources = ResourceManager(model_config)
+    service = QueryService(lambda: resources.get_retriever(args.vector_store, top_k=args.top_k),
+                           generator=resources.get_generator(), host=args.host, port=args.port, **config)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,96 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from tracing import span, record_cache
+
+
+def load_cross_encoder(model_name, device='cpu'):
+    """CrossEncoder modelini yükler (torch içe aktarması burada gerçekleşir)."""
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(model_name, device=device)
+
+
+class CrossEncoderReranker:
+    """
+    Çapraz kodlayıcı ile yeniden sıralama.
+    - İlk aşamanın aday pasajlarını (sorgu, pasaj) çiftleri halinde, gruplar hâlinde CPU'da skorlar.
+    - Süre bütçesi aşılırsa kalan adaylar skorlanmaz ve ilk aşama sırasıyla sona eklenir.
+    - Çift skorları LRU önbellekte tutulur; aynı soru tekrarlandığında model çalışmaz.
+    """
+
+    def __init__(self, model_name='cross-encoder/mmarco-mMiniLMv2-L12-H384-v1', batch_size=16,
+                 time_budget=0.5, cache_size=10_000, model=None):
+        """
+        :param model_name: sentence-transformers CrossEncoder model ismi (çok dilli)
+        :param batch_size: Modele tek seferde verilecek çift sayısı
+        :param time_budget: Yeniden sıralama için en fazla süre (sn); None: sınırsız
+        :param cache_size: Önbellekte tutulacak en fazla çift skoru
+        :param model: Önceden yüklenmiş, paylaşılan CrossEncoder (verilmezse `model_name` yüklenir)
+        """
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.cache_size = cache_size
+        self.model = model if model is not None else load_cross_encoder(model_name)
+        self._cache = OrderedDict()     # blake2b(sorgu, pasaj) -> skor
+        self._lock = threading.Lock()   # Streamlit oturumları aynı önbelleği paylaşır
+
+    @staticmethod
+    def _pair_key(query, content):
+        return hashlib.blake2b(f"{query}\0{content}".encode("utf-8"), digest_size=16).digest()
+
+    def _cached(self, key):
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _remember(self, keys, scores):
+        with self._lock:
+            for key, score in zip(keys, scores):
+                self._cache[key] = score
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def rerank(self, query, candidates, top_k=5):
+        """
+        Adayları çapraz kodlayıcı skoruna göre yeniden sıralar.
+        :param query: Kullanıcının sorgusu
+        :param candidates: İlk aşama sırasıyla [(chunk_id, content, score), ...]
+        :param top_k: Döndürülecek sonuç sayısı
+        :return: [(chunk_id, content, score), ...]; skorlanan adaylar için skor çapraz kodlayıcı skorudur
+        """
+        with span("rerank", candidates=len(candidates)) as rerank_span:
+            reranked = self._rerank(query, candidates, rerank_span)
+        return reranked[:top_k]
+
+    def _rerank(self, query, candidates, rerank_span):
+        start = time.perf_counter()
+        keys = [self._pair_key(query, content) for _, content, _ in candidates]
+        scores = [self._cached(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        record_cache("rerank", True, len(scores) - len(missing))
+        record_cache("rerank", False, len(missing))
+
+        for offset in range(0, len(missing), self.batch_size):
+            if self.time_budget is not None and time.perf_counter() - start > self.time_budget:
+                rerank_span.set(budget_exceeded=True, unscored=len(missing) - offset)
+                print(f"⏱️ Yeniden sıralama bütçesi aşıldı, {len(missing) - offset} aday ilk aşama sırasında kaldı.")
+                break
+            batch = missing[offset:offset + self.batch_size]
+            predicted = self.model.predict([(query, candidates[i][1]) for i in batch],
+                                           batch_size=self.batch_size, show_progress_bar=False)
+            predicted = [float(score) for score in predicted]
+            for i, score in zip(batch, predicted):
+                scores[i] = score
+            self._remember([keys[i] for i in batch], predicted)
+
+        # Skorlanan adaylar kendi aralarında sıralanır; skorlanamayanlar ilk aşama sırasını korur
+        scored = sorted((i for i, score in enumerate(scores) if score is not None),
+                        key=lambda i: scores[i], reverse=True)
+        unscored = [i for i, score in enumerate(scores) if score is None]
+        reranked = [(candidates[i][0], candidates[i][1], scores[i]) for i in scored]
+        reranked += [candidates[i] for i in unscored]
+        return reranked
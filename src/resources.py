@@ -0,0 +1,241 @@
+import os
+import time
+import threading
+from vectorizer import DocumentVectorizer, load_embedding_model
+from retriever import DocumentRetriever
+from generator import AnswerGenerator
+from llm_client import LLMClient
+from lexical import BM25Index, LEXICAL_INDEX_FILE
+from reranker import CrossEncoderReranker
+from passage_store import PassageStore, PASSAGE_STORE_FILE
+from sharded_index import ShardedVectorizer
+from context_packer import ContextPacker
+from summarizer import MapReduceSummarizer, SummaryCache
+from query_cache import QueryCache
+from embedding_cache import EmbeddingCache
+
+
+class ResourceManager:
+    """
+    Süreç genelinde paylaşılan kaynak yöneticisi.
+    - Gömme modelini, kayıtlı dizini ve LLM istemcisini süreç başına bir kez yükler;
+      tüm Streamlit oturumları aynı nesneleri kullanır.
+    - Kalıcı gömme önbelleği de süreç başına tektir; sorgu, alım ve yeniden yüklenen tüm
+      vektörleştiriciler aynı kilitli `EmbeddingCache` örneğini kullanır.
+    - Yeni bir dizin anlık görüntüsü yayımlandığında (CURRENT işaretçisi değiştiğinde) yeni dizini
+      yükleyip paylaşılan referansı değiştirir; eski nesneyi tutan sorgular onunla tamamlanır.
+    """
+
+    def __init__(self, model_config=None, check_interval=5.0):
+        """
+        :param model_config: `configs/model_config.yaml` içeriği
+        :param check_interval: Yeni dizin sürümü için kontroller arası en kısa süre (sn)
+        """
+        self.model_config = model_config or {}
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._models = {}       # model adı -> SentenceTransformer
+        self._vectorizers = {}  # vector_store -> DocumentVectorizer
+        self._embedding_cache = None
+        self._last_check = 0.0
+        self._swapping = set()  # Yeni sürümü şu an (kilit dışında) yüklenen depolar
+        self._generator = None
+        self._lexical_index = None
+        self._lexical_key = None    # (yol, mtime)
+        self._reranker = None
+        self._passage_store = None
+        self._passage_key = None
+        # Sorgu gömmeleri ve arama sonuçları dizin değişimlerinde de paylaşılır (sonuçlar sürüm etiketlidir)
+        config = dict(self.model_config.get("query_cache", {}))
+        self.query_cache = QueryCache(**config) if config.pop("enabled", True) else None
+
+    def _vectorizer_options(self):
+        """`vectorization` ve `index` ayarlarını `DocumentVectorizer` parametrelerine çevirir."""
+        config = self.model_config.get("vectorization", {})
+        return {
+            "model_name": config.get("model_name", "all-mpnet-base-v2"),
+            "batch_size": config.get("batch_size", 64),
+            "encode_workers": config.get("encode_workers", 1),
+            "add_block_size": config.get("add_block_size", 2048),
+            "embedding_cache": self.get_embedding_cache(),
+            "index_config": self.model_config.get("index"),
+        }
+
+    def get_embedding_cache(self):
+        """
+        Süreç genelinde tek kalıcı gömme önbelleğini döndürür (`embedding_cache_dir` boşsa None).
+        Aynı dosyaları ayrı örneklerle açmak yerine tüm vektörleştiriciler bu örneği paylaşır.
+        """
+        config = self.model_config.get("vectorization", {})
+        if not config.get("embedding_cache_dir"):
+            return None
+        with self._lock:
+            if self._embedding_cache is None:
+                model_name = config.get("model_name", "all-mpnet-base-v2")
+                model = self.get_model(model_name)
+                self._embedding_cache = EmbeddingCache(model_name, model.get_sentence_embedding_dimension(),
+                                                       cache_dir=config["embedding_cache_dir"],
+                                                       max_entries=config.get("embedding_cache_size", 200_000))
+            return self._embedding_cache
+
+    def _mmap_index(self):
+        """Sorgu tarafı dizini salt okunur, bellek eşlemeli mi yüklensin (`index.mmap`)."""
+        return self.model_config.get("index", {}).get("mmap", False)
+
+    def get_model(self, model_name):
+        """Gömme modelini ilk istendiğinde yükler, sonra aynı nesneyi döndürür."""
+        with self._lock:
+            if model_name not in self._models:
+                start = time.perf_counter()
+                self._models[model_name] = load_embedding_model(model_name)
+                print(f"🧠 Gömme modeli yüklendi: {model_name} ({time.perf_counter() - start:.1f} sn)")
+            return self._models[model_name]
+
+    def new_vectorizer(self, vector_store='faiss'):
+        """
+        Paylaşılan modeli kullanan, boş (yüklenmemiş) yeni bir vektörleştirici oluşturur.
+        FAISS için `sharding.enabled` açıksa parçalı depo (`ShardedVectorizer`) döner.
+        """
+        options = self._vectorizer_options()
+        sharding = dict(self.model_config.get("sharding", {}))
+        if vector_store == 'faiss' and sharding.pop("enabled", False):
+            return ShardedVectorizer(model=self.get_model(options["model_name"]), query_cache=self.query_cache,
+                                     **sharding, **options)
+        return DocumentVectorizer(vector_store=vector_store, model=self.get_model(options["model_name"]),
+                                  query_cache=self.query_cache, **options)
+
+    def ingest_vectorizer(self, vector_store='faiss'):
+        """
+        Belge alımında kullanılacak vektörleştirici.
+        FAISS için ayrı bir örnek döner (yayımlandığında sorgu tarafı yeni dizine geçer);
+        Chroma tek bir kalıcı koleksiyon olduğundan paylaşılan örnek kullanılır.
+        """
+        if vector_store == 'chroma':
+            return self.get_vectorizer(vector_store)
+        return self.new_vectorizer(vector_store)
+
+    def _swap_due(self, vector_store):
+        """
+        (Kilit altında çağrılır) Yayımlanan sürüm yüklü olandan farklıysa ve başka bir iş parçacığı
+        onu zaten yüklemiyorsa yayımlanan sürümü döndürür; aksi halde None.
+        """
+        now = time.monotonic()
+        if vector_store != 'faiss' or vector_store in self._swapping or now - self._last_check < self.check_interval:
+            return None
+        self._last_check = now
+        current = self._vectorizers[vector_store]
+        published = current.published_version()
+        if published is None or published == current.index_version:
+            return None
+        self._swapping.add(vector_store)
+        return published
+
+    def _swap(self, vector_store, published):
+        """
+        Yeni dizini kilit dışında yükler; bu sırada diğer oturumlar eski dizinle sorgulamaya devam eder.
+        Kilit yalnızca paylaşılan referans değiştirilirken tutulur.
+        """
+        try:
+            fresh = self.new_vectorizer(vector_store)
+            fresh.load(mmap=self._mmap_index())
+            with self._lock:
+                self._vectorizers[vector_store] = fresh
+        finally:
+            with self._lock:
+                self._swapping.discard(vector_store)
+        print(f"🔄 Yeni dizin sürümü devreye alındı: {published}")
+        return fresh
+
+    def get_vectorizer(self, vector_store='faiss'):
+        """Paylaşılan, kayıtlı dizini yüklenmiş vektörleştiriciyi döndürür."""
+        with self._lock:
+            if vector_store not in self._vectorizers:
+                vectorizer = self.new_vectorizer(vector_store)
+                vectorizer.load(mmap=self._mmap_index())
+                self._vectorizers[vector_store] = vectorizer
+                self._last_check = time.monotonic()
+                return vectorizer
+            published = self._swap_due(vector_store)
+            current = self._vectorizers[vector_store]
+        if published is None:
+            return current
+        return self._swap(vector_store, published)
+
+    def _side_file(self, vector_store, path):
+        """
+        Yan dosyanın (BM25, pasaj deposu) okunacağı yol: FAISS'te paylaşılan dizinin yüklendiği anlık
+        görüntüdeki kopyası (dizinle aynı sürüm), yoksa eski düzendeki sabit yol.
+        """
+        if vector_store == 'faiss':
+            found = self.get_vectorizer(vector_store).snapshot_file(os.path.basename(path))
+            if found is not None:
+                return found
+        return path
+
+    def get_lexical_index(self, vector_store='faiss'):
+        """
+        Paylaşılan BM25 dizinini döndürür; dizin yeni bir anlık görüntüden yüklendiyse (veya eski
+        düzendeki dosya yeniden yazıldıysa) yenisini yükler.
+        Hibrit arama kapalıysa veya dizin henüz oluşturulmadıysa None döner.
+        """
+        if not self.model_config.get("retrieval", {}).get("hybrid", True):
+            return None
+        path = self._side_file(vector_store, LEXICAL_INDEX_FILE)
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            key = (path, os.path.getmtime(path))
+            if key != self._lexical_key:
+                self._lexical_index = BM25Index.load(path)
+                self._lexical_key = key
+            return self._lexical_index
+
+    def get_passage_store(self, vector_store='faiss'):
+        """Paylaşılan, bellek eşlemeli pasaj deposunu döndürür; dosya değiştiyse yenisini açar."""
+        path = self._side_file(vector_store, PASSAGE_STORE_FILE)
+        with self._lock:
+            if not os.path.exists(path):
+                return None
+            key = (path, os.path.getmtime(path))
+            if key != self._passage_key:
+                self._passage_store = PassageStore(path, **self.model_config.get("passage_store", {}))
+                self._passage_key = key
+            return self._passage_store
+
+    def get_reranker(self):
+        """Yapılandırmada açıksa paylaşılan çapraz kodlayıcı yeniden sıralayıcıyı döndürür."""
+        config = dict(self.model_config.get("rerank", {}))
+        if not config.pop("enabled", False):
+            return None
+        config.pop("candidates", None)
+        with self._lock:
+            if self._reranker is None:
+                start = time.perf_counter()
+                self._reranker = CrossEncoderReranker(**config)
+                print(f"🧠 Yeniden sıralama modeli yüklendi ({time.perf_counter() - start:.1f} sn)")
+            return self._reranker
+
+    def get_retriever(self, vector_store='faiss', top_k=5):
+        """Paylaşılan vektörleştiriciyi (ve varsa BM25 dizinini) kullanan hafif bir getirici döndürür."""
+        config = self.model_config.get("retrieval", {})
+        return DocumentRetriever(vector_store=vector_store, top_k=top_k,
+                                 vectorizer=self.get_vectorizer(vector_store),
+                                 lexical_index=self.get_lexical_index(vector_store),
+                                 fusion_k=config.get("fusion_k", 60),
+                                 candidate_multiplier=config.get("candidate_multiplier", 4),
+                                 reranker=self.get_reranker(),
+                                 passage_store=self.get_passage_store(vector_store),
+                                 rerank_candidates=self.model_config.get("rerank", {}).get("candidates", 20),
+                                 query_cache=self.query_cache)
+
+    def get_generator(self):
+        """Tek bir bağlantı havuzlu LLM istemcisini paylaşan yanıt üreticiyi döndürür."""
+        with self._lock:
+            if self._generator is None:
+                client = LLMClient.from_env(**self.model_config.get("llm_client", {}))
+                packer = ContextPacker(**self.model_config.get("context", {}))
+                config = dict(self.model_config.get("summarization", {}))
+                cache = SummaryCache(config.pop("cache_file", None), config.pop("cache_size", 10_000))
+                summarizer = MapReduceSummarizer(client, cache=cache, **config)
+                self._generator = AnswerGenerator(client=client, context_packer=packer, summarizer=summarizer)
+            return self._generator
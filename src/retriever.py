@@ -1,22 +1,52 @@
 import os
+import numpy as np
 from vectorizer import DocumentVectorizer
+from chunker import split_chunk_id
+from lexical import is_citation_query, reciprocal_rank_fusion
+from metadata import normalize_filters
+from tracing import span
 
 class DocumentRetriever:
     """
     Belge getirici sınıf.
     - FAISS veya Chroma'dan en yakın belgeleri getirir.
-    - İşlenmiş metinleri okur ve yanıt üretimi için hazır hale getirir.
+    - BM25 dizini verilirse yoğun ve sözcüksel sonuçları RRF ile birleştirir; yalnızca kanun/madde
+      atfından oluşan sorgular kodlayıcı çalıştırılmadan sözcüksel dizinden yanıtlanır.
+    - Yeniden sıralayıcı verilirse daha fazla aday getirip çapraz kodlayıcıyla top_k'ya indirir.
+    - Pasaj metinlerini paketlenmiş pasaj deposundan (yoksa işlenmiş belgelerden) okur.
+    - Sorgu önbelleği verilirse ilk aşama sonuçları normalleştirilmiş sorgu ve dizin sürümüyle
+      önbelleklenir; tekrar eden sorgular dizine ve kodlayıcıya gitmez.
     """
     
-    def __init__(self, vector_store='faiss', top_k=5, processed_folder='data/processed'):
+    def __init__(self, vector_store='faiss', top_k=5, processed_folder='data/processed', vectorizer=None,
+                 lexical_index=None, fusion_k=60, candidate_multiplier=4, reranker=None,
+                 rerank_candidates=20, passage_store=None, query_cache=None):
         """
         :param vector_store: "faiss" veya "chroma"
         :param top_k: En yakın kaç sonuç getirileceği
         :param processed_folder: İşlenmiş belgelerin tutulduğu klasör
+        :param vectorizer: Paylaşılan, yüklenmiş `DocumentVectorizer` (bkz. `ResourceManager`)
+        :param lexical_index: `BM25Index` (None: yalnızca yoğun arama)
+        :param fusion_k: RRF sabiti; büyüdükçe alt sıralardaki sonuçların ağırlığı artar
+        :param candidate_multiplier: Birleştirme öncesi her yöntemden alınacak aday sayısı çarpanı
+        :param reranker: `CrossEncoderReranker` (None: ilk aşama sırası kullanılır)
+        :param rerank_candidates: Yeniden sıralama için getirilecek aday sayısı
+        :param passage_store: Bellek eşlemeli `PassageStore` (None: pasajlar belge dosyalarından dilimlenir)
+        :param query_cache: Paylaşılan `QueryCache` (None: sonuçlar önbelleklenmez)
         """
-        self.vectorizer = DocumentVectorizer(vector_store=vector_store)
+        if vectorizer is None:
+            vectorizer = DocumentVectorizer(vector_store=vector_store)
+            vectorizer.load()
+        self.vectorizer = vectorizer
         self.top_k = top_k
         self.processed_folder = processed_folder
+        self.lexical_index = lexical_index
+        self.fusion_k = fusion_k
+        self.candidate_multiplier = candidate_multiplier
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        self.passage_store = passage_store
+        self.query_cache = query_cache
 
     def _load_document_content(self, doc_id):
         """İşlenmiş belgeyi dosyadan okur."""
@@ -28,23 +58,185 @@ class DocumentRetriever:
             print(f"❌ Belge bulunamadı: {file_path}")
             return None
 
-    def retrieve(self, query):
+    def _load_chunk_content(self, chunk_id):
         """
-        Kullanıcı sorgusuna en yakın belgeleri getirir.
-        :param query: Kullanıcının sorgusu
-        :return: [(doc_id, content, score), ...]
+        Pasaj kimliğindeki ofsetleri kullanarak yalnızca ilgili metin dilimini döndürür.
+        Kimlik bir pasajı göstermiyorsa (eski, belge düzeyindeki dizinler) tüm belgeyi döndürür.
+        """
+        if self.passage_store is not None:
+            content = self.passage_store.get(chunk_id)
+            if content is not None:
+                return content
+        doc_id, start, end = split_chunk_id(chunk_id)
+        content = self._load_document_content(doc_id)
+        if content is None or start is None:
+            return content
+        return content[start:end]
+
+    def embed_query(self, query):
+        """Sorguyu vektörleştirir; sonuç `retrieve(query_vector=...)` ile tekrar kullanılabilir."""
+        return self.vectorizer.embed_query(query)
+
+    def embed_queries(self, queries):
+        """Sorguları tek kodlayıcı geçişiyle vektörleştirir (bkz. `retrieve_many`)."""
+        return self.vectorizer.embed_queries(queries)
+
+    @property
+    def index_version(self):
+        return self.vectorizer.index_version
+
+    def is_citation_query(self, query):
+        """Sorgu, kodlayıcıya gitmeden sözcüksel dizinle yanıtlanacaksa True döner."""
+        return self.lexical_index is not None and is_citation_query(query)
+
+    @staticmethod
+    def _scope(collections, filters=None):
+        """Koleksiyon kısıtı (yalnızca parçalı depoda) ve meta veri filtreleri yalnızca verildiğinde iletilir."""
+        scope = {} if collections is None else {"collections": collections}
+        if filters:
+            scope["filters"] = filters
+        return scope
+
+    def _lexical_search(self, query, top_k, collections=None, filters=None):
         """
-        results = self.vectorizer.search(query, top_k=self.top_k)
+        BM25 araması; koleksiyon veya filtre verildiyse top_k yalnızca onlara uyan pasajlar arasından
+        seçilir (küçük bir koleksiyonun isabetleri büyük koleksiyonlarınkilerin arkasında kaybolmaz).
+        """
+        if collections is None and not filters:
+            return self.lexical_index.search(query, top_k=top_k)
+
+        def allowed(chunk_ids):
+            if collections is not None:
+                chunk_ids = [chunk_id for chunk_id in chunk_ids if self.vectorizer.shard_of(chunk_id) in collections]
+            if filters and chunk_ids:
+                chunk_ids = self.vectorizer.filter_chunk_ids(chunk_ids, filters)
+            return chunk_ids
+
+        return self.lexical_index.search(query, top_k=top_k, allowed=allowed)
+
+    def _search(self, query, top_k, query_vector=None, collections=None, filters=None):
+        """Yoğun, sözcüksel veya birleşik aramayla [(chunk_id, score), ...] döndürür."""
+        scope = self._scope(collections, filters)
+        if self.lexical_index is None:
+            return self.vectorizer.search(query, top_k=top_k, query_vector=query_vector, **scope)
+
+        if query_vector is None and is_citation_query(query):
+            hits = self._lexical_search(query, top_k, collections, filters)
+            if hits:
+                print("⚡ Atıf sorgusu sözcüksel dizinden yanıtlandı.")
+                return hits
+
+        candidates = top_k * self.candidate_multiplier
+        dense = self.vectorizer.search(query, top_k=candidates, query_vector=query_vector, **scope)
+        lexical = self._lexical_search(query, candidates, collections, filters)
+        return reciprocal_rank_fusion([[chunk_id for chunk_id, _ in dense],
+                                       [chunk_id for chunk_id, _ in lexical]],
+                                      k=self.fusion_k, top_k=top_k)
+
+    def _search_many(self, queries, top_k, query_vectors=None, collections=None, filters=None):
+        """`_search`in toplu sürümü: yoğun arama tüm sorgular için tek matris aramasıyla yapılır."""
+        scope = self._scope(collections, filters)
+        if self.lexical_index is None:
+            return self.vectorizer.search_many(queries, top_k=top_k, query_vectors=query_vectors, **scope)
+
+        results = [None] * len(queries)
+        if query_vectors is None:
+            for i, query in enumerate(queries):
+                if is_citation_query(query):
+                    results[i] = self._lexical_search(query, top_k, collections, filters) or None
+
+        pending = [i for i, hits in enumerate(results) if hits is None]
+        if pending:
+            candidates = top_k * self.candidate_multiplier
+            vectors = None if query_vectors is None else np.asarray(query_vectors)[pending]
+            dense = self.vectorizer.search_many([queries[i] for i in pending], top_k=candidates,
+                                                query_vectors=vectors, **scope)
+            for i, dense_hits in zip(pending, dense):
+                lexical = self._lexical_search(queries[i], candidates, collections, filters)
+                results[i] = reciprocal_rank_fusion([[chunk_id for chunk_id, _ in dense_hits],
+                                                     [chunk_id for chunk_id, _ in lexical]],
+                                                    k=self.fusion_k, top_k=top_k)
+        return results
+
+    def _candidate_count(self):
+        return max(self.top_k, self.rerank_candidates) if self.reranker else self.top_k
+
+    def _cached_search(self, queries, query_vectors=None, collections=None, filters=None):
+        """
+        İlk aşama sonuçlarını sorgu önbelleğinden döndürür; yalnızca ıskalanan sorgular aranır
+        (tek sorgu `_search`, birden fazlası `_search_many` ile).
+        """
+        top_k = self._candidate_count()
+
+        def search(pending):
+            vectors = None if query_vectors is None else np.asarray(query_vectors)[pending]
+            if len(pending) == 1:
+                return [self._search(queries[pending[0]], top_k, None if vectors is None else vectors[0],
+                                     collections, filters)]
+            return self._search_many([queries[i] for i in pending], top_k, vectors, collections, filters)
+
+        if self.query_cache is None:
+            return search(list(range(len(queries))))
+        vector_store = getattr(self.vectorizer, "vector_store", None)
+        keys = [self.query_cache.result_key(query, top_k, self.lexical_index is not None, collections, filters,
+                                            vector_store)
+                for query in queries]
+        return self.query_cache.search_many(keys, self.index_version, search)
+
+    def _materialize(self, query, results):
+        """[(chunk_id, score)] sonuçlarına pasaj metinlerini ekler ve gerekirse yeniden sıralar."""
         retrieved_docs = []
+        with span("content_load", passages=len(results)) as load_span:
+            for doc_id, score in results:
+                content = self._load_chunk_content(doc_id)
+                if content:
+                    retrieved_docs.append((doc_id, content, score))
+            load_span.set(chars=sum(len(content) for _, content, _ in retrieved_docs))
 
-        for doc_id, score in results:
-            content = self._load_document_content(doc_id)
-            if content:
-                retrieved_docs.append((doc_id, content, score))
+        if self.reranker:
+            retrieved_docs = self.reranker.rerank(query, retrieved_docs, top_k=self.top_k)
+        return retrieved_docs
+
+    def retrieve(self, query, query_vector=None, collections=None, filters=None):
+        """
+        Kullanıcı sorgusuna en yakın belgeleri getirir.
+        :param query: Kullanıcının sorgusu
+        :param query_vector: Önceden hesaplanmış sorgu vektörü (varsa)
+        :param collections: Aramanın sınırlanacağı koleksiyonlar (yalnızca parçalı depoda; None: tümü)
+        :param filters: Meta veri filtreleri, ör. {"doc_type": "kanun", "law_number": "6098"}
+                        (bkz. `metadata.normalize_filters`); dizin aramasının içinde uygulanır
+        :return: [(chunk_id, content, score), ...]; birleşik aramada skor RRF skorudur, yeniden
+                 sıralamada çapraz kodlayıcı skorudur (yüksek daha alakalı)
+        """
+        with span("retrieve", top_k=self.top_k, hybrid=self.lexical_index is not None) as retrieve_span:
+            results = self._cached_search([query], None if query_vector is None else [query_vector],
+                                          collections, normalize_filters(filters))[0]
+            retrieved_docs = self._materialize(query, results)
+            retrieve_span.set(results=len(retrieved_docs))
 
         print(f"🔍 {len(retrieved_docs)} belge bulundu.")
         return retrieved_docs
 
+    def retrieve_many(self, queries, query_vectors=None, collections=None, filters=None):
+        """
+        Birden çok sorgu için belgeleri getirir (toplu değerlendirme ve inceleme işleri için).
+        Sorgular tek kodlayıcı geçişiyle vektörleştirilir ve dizinde tek matris aramasıyla aranır.
+        :param queries: Sorgu metinleri
+        :param query_vectors: Önceden hesaplanmış (n, dim) sorgu matrisi (varsa)
+        :param collections: Aramanın sınırlanacağı koleksiyonlar (yalnızca parçalı depoda; None: tümü)
+        :param filters: Tüm sorgulara uygulanacak meta veri filtreleri (bkz. `retrieve`)
+        :return: Her sorgu için [(chunk_id, content, score), ...] listesi (girdi sırasıyla)
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        with span("retrieve_many", queries=len(queries), top_k=self.top_k):
+            results = self._cached_search(queries, query_vectors, collections, normalize_filters(filters))
+            retrieved = [self._materialize(query, hits) for query, hits in zip(queries, results)]
+
+        print(f"🔍 {len(queries)} sorgu için {sum(len(docs) for docs in retrieved)} belge bulundu.")
+        return retrieved
+
 
 # Kullanım
 if __name__ == "__main__":
@@ -0,0 +1,249 @@
+import os
+import uuid
+import zlib
+import heapq
+import hashlib
+import fnmatch
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from vectorizer import EmbeddingVectorizer, DocumentVectorizer
+from chunker import split_chunk_id
+from metadata import normalize_filters
+from snapshot import EMBEDDINGS_DIR, publish_snapshot, snapshot_path, current_snapshot
+from tracing import span
+
+# Her parça kendi anlık görüntülerini ve CURRENT işaretçisini <kök>/<parça>/ altında tutar;
+# parçaların ortak yan dosyaları (BM25, pasaj deposu, alım manifestosu) <kök>/snapshots/ altındadır
+SHARDS_DIR = os.path.join(EMBEDDINGS_DIR, "shards")
+SHARD_STRATEGIES = ('hash', 'collection')
+DEFAULT_COLLECTION = "default"
+
+
+class ShardedVectorizer(EmbeddingVectorizer):
+    """
+    Parçalı FAISS deposu.
+    - Derlem, belge kimliğine göre parçalara ayrılır: `hash` (sabit parça sayısına dağıtım) veya
+      `collection` (dosya adı kalıplarıyla koleksiyon/kanun kategorisi; eşleşmeyenler `default`).
+      Bir belgenin tüm pasajları aynı parçadadır.
+    - Her parça bağımsız bir `DocumentVectorizer`dır: ayrı dizin, meta veri ve anlık görüntü;
+      ekleme, eğitim ve kayıt parçalar arasında iş parçacığı havuzunda paralel yürür.
+    - Parçalar kaydedildikten sonra ortak yan dosyalar, parça sürümlerini listeleyen üst düzey bir
+      anlık görüntüde yayımlanır.
+    - Sorgular tek kodlayıcı geçişiyle vektörleştirilir, parçalarda paralel aranır ve sonuçlar
+      uzaklığa göre yığın (heap) birleştirmesiyle top_k'ya indirilir. Koleksiyonla sınırlanan
+      sorgular yalnızca ilgili parçalara gider.
+    """
+
+    def __init__(self, shard_by='hash', num_shards=4, collections=None, search_workers=4, root=SHARDS_DIR,
+                 index_config=None, model_name='all-mpnet-base-v2', batch_size=64, encode_workers=1,
+                 add_block_size=2048, embedding_cache_dir=None, embedding_cache_size=200_000, model=None,
+                 query_cache=None, embedding_cache=None):
+        """
+        :param shard_by: "hash" veya "collection"
+        :param num_shards: `hash` için parça sayısı
+        :param collections: `collection` için {koleksiyon: [dosya adı kalıpları (fnmatch)]}
+        :param search_workers: Parçaları paralel arayan/yazan iş parçacığı sayısı
+        :param root: Parça klasörlerinin kökü
+        :param index_config: Her parçanın FAISS dizin ayarları (bkz. `ann_index`)
+        Diğer parametreler için bkz. `EmbeddingVectorizer`; model tüm parçalarca paylaşılır.
+        """
+        super().__init__(model_name=model_name, batch_size=batch_size, encode_workers=encode_workers,
+                         add_block_size=add_block_size, embedding_cache_dir=embedding_cache_dir,
+                         embedding_cache_size=embedding_cache_size, model=model, query_cache=query_cache,
+                         embedding_cache=embedding_cache)
+        if shard_by not in SHARD_STRATEGIES:
+            raise ValueError(f"❌ Geçersiz parçalama: {shard_by}. Seçenekler: {', '.join(SHARD_STRATEGIES)}")
+        self.vector_store = 'faiss'
+        self.shard_by = shard_by
+        self.collections = {name: list(patterns) for name, patterns in (collections or {}).items()}
+        if shard_by == 'hash':
+            names = [f"shard-{i:02d}" for i in range(num_shards)]
+        else:
+            names = list(self.collections) + [DEFAULT_COLLECTION] * (DEFAULT_COLLECTION not in self.collections)
+        self.root = root
+        self.snapshot_dir = None  # Ortak yan dosyaların anlık görüntüsü
+        self._side_version = None  # Yalnızca yan dosyalar değiştiğinde yenilenen sürüm bileşeni
+        self.shards = {name: DocumentVectorizer(vector_store='faiss', model=self.model, batch_size=batch_size,
+                                                add_block_size=add_block_size, index_config=index_config,
+                                                root=os.path.join(root, name))
+                       for name in names}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, min(search_workers, len(names))),
+                                        thread_name_prefix="shard")
+        print(f"✅ Parçalı FAISS deposu başlatıldı ({shard_by}, {len(names)} parça).")
+
+    def shard_of(self, chunk_id):
+        """Pasaj veya belge kimliğinin ait olduğu parçanın adı."""
+        doc_id = split_chunk_id(chunk_id)[0]
+        if self.shard_by == 'hash':
+            names = list(self.shards)
+            return names[zlib.crc32(doc_id.encode("utf-8")) % len(names)]
+        name = os.path.basename(doc_id)
+        for collection, patterns in self.collections.items():
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                return collection
+        return DEFAULT_COLLECTION
+
+    def _select(self, collections=None):
+        if collections is None:
+            return list(self.shards)
+        unknown = [name for name in collections if name not in self.shards]
+        if unknown:
+            raise ValueError(f"❌ Bilinmeyen koleksiyon: {', '.join(unknown)}. Seçenekler: {', '.join(self.shards)}")
+        return list(dict.fromkeys(collections))
+
+    def _map(self, func, names):
+        """`func(parça adı, parça)`yı parçalar üzerinde (birden fazlaysa havuzda paralel) çalıştırır."""
+        if len(names) == 1:
+            return [func(names[0], self.shards[names[0]])]
+        return list(self._pool.map(lambda name: func(name, self.shards[name]), names))
+
+    @property
+    def index_version(self):
+        """Parça sürümlerinden (ve yan dosya sürümünden) türetilen sürüm; herhangi biri değişince değişir."""
+        return self._combine({name: shard.index_version for name, shard in self.shards.items()},
+                             self._side_version)
+
+    def published_version(self):
+        """
+        Yayımlanmış parça sürümlerinden türetilen sürüm (yayımlanmamış parça için yüklü sürüm).
+        Ortak yan dosyaların anlık görüntüsü parçalara henüz yetişmediyse yüklü sürüm döner.
+        """
+        versions = {name: shard.published_version() or shard.index_version
+                    for name, shard in self.shards.items()}
+        snapshot = current_snapshot(self.root)
+        if snapshot is None:
+            return self._combine(versions)
+        manifest = snapshot[1]
+        return manifest["version"] if manifest.get("shards") == versions else self.index_version
+
+    @staticmethod
+    def _combine(versions, side_version=None):
+        key = "|".join(f"{name}:{version}" for name, version in sorted(versions.items()))
+        if side_version:
+            key += f"|side:{side_version}"
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+    @property
+    def read_only(self):
+        return any(shard.read_only for shard in self.shards.values())
+
+    def _add_block(self, doc_ids, contents, vectors, metadatas=None):
+        """Bloğu parçalara dağıtır; her parça kendi payını (meta verisiyle) paralel olarak yazar."""
+        groups = {}
+        for i, doc_id in enumerate(doc_ids):
+            groups.setdefault(self.shard_of(doc_id), []).append(i)
+        vectors = np.asarray(vectors, dtype='float32')
+        metadatas = metadatas or [None] * len(doc_ids)
+        self._map(lambda name, shard: shard._add_block([doc_ids[i] for i in groups[name]],
+                                                       [contents[i] for i in groups[name]],
+                                                       vectors[groups[name]],
+                                                       [metadatas[i] for i in groups[name]]),
+                  list(groups))
+
+    def remove_documents(self, doc_ids):
+        """Belgelerin vektörlerini yalnızca ait oldukları parçalardan siler; silinen vektör sayısını döndürür."""
+        groups = {}
+        for doc_id in set(doc_ids):
+            groups.setdefault(self.shard_of(doc_id), []).append(doc_id)
+        return sum(self.shards[name].remove_documents(ids) for name, ids in groups.items())
+
+    def filter_chunk_ids(self, chunk_ids, filters):
+        """Pasaj kimliklerinden filtreye uyanları, her kimliği kendi parçasında denetleyerek döndürür."""
+        groups = {}
+        for chunk_id in chunk_ids:
+            groups.setdefault(self.shard_of(chunk_id), []).append(chunk_id)
+        allowed = {chunk_id for name, ids in groups.items()
+                   for chunk_id in self.shards[name].filter_chunk_ids(ids, filters)}
+        return [chunk_id for chunk_id in chunk_ids if chunk_id in allowed]
+
+    def search_many(self, queries, top_k=5, query_vectors=None, collections=None, filters=None):
+        """
+        Sorguları seçilen parçalarda paralel arar.
+        :param collections: Aranacak parça/koleksiyon adları (None: tüm parçalar)
+        :param filters: Her parçanın dizin aramasına itilen meta veri filtreleri
+                        (bkz. `DocumentVectorizer.search_many`)
+        :return: Her sorgu için uzaklığa göre sıralı [(chunk_id, distance), ...] listesi
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        names = self._select(collections)
+        filters = normalize_filters(filters)
+        if query_vectors is None:
+            query_vectors = self.embed_queries(queries)
+        query_vectors = np.asarray(query_vectors, dtype='float32').reshape(len(queries), -1)
+        with span("search", queries=len(queries), top_k=top_k, store="faiss", shards=len(names)):
+            per_shard = self._map(lambda _, shard: shard._search_vectors(queries, query_vectors, top_k, filters),
+                                  names)
+            # Her parçanın sonuçları zaten sıralı olduğundan k-yollu yığın birleştirmesi yeterlidir
+            return [list(islice(heapq.merge(*(hits[i] for hits in per_shard), key=lambda hit: hit[1]), top_k))
+                    for i in range(len(queries))]
+
+    def search(self, query, top_k=5, query_vector=None, collections=None, filters=None):
+        """Tek sorguyu arar (bkz. `search_many`)."""
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        results = self.search_many([query], top_k=top_k, query_vectors=[query_vector], collections=collections,
+                                   filters=filters)[0]
+        print(f"🔍 Parçalı FAISS sonuçları: {results}")
+        return results
+
+    def persist(self, side_files=None):
+        """
+        Parçaları paralel olarak kaydeder; her parça kendi anlık görüntüsünü atomik yayımlar.
+        Ardından ortak yan dosyalar parça sürümleriyle birlikte üst düzey anlık görüntüde yayımlanır.
+        :param side_files: {dosya adı: yola yazan fonksiyon} (bkz. `DocumentVectorizer.persist`)
+        """
+        self._map(lambda _, shard: shard.persist(), list(self.shards))
+        if side_files and os.path.exists(snapshot_path(self.index_version, self.root)):
+            # Parçalar değişmeden yan dosyalar değişti; yeni bir yan dosya sürümüyle yayımlanır
+            self._side_version = uuid.uuid4().hex
+
+        def write_files(directory):
+            for name, write in (side_files or {}).items():
+                write(os.path.join(directory, name))
+
+        self.snapshot_dir = publish_snapshot(self.index_version, write_files, root=self.root, manifest={
+            "shards": {name: shard.index_version for name, shard in self.shards.items()},
+            "side": self._side_version,
+        })
+
+    def load(self, mmap=False):
+        """
+        Parçaları paralel yükler.
+        :return: Tüm parçaların kayıtlı dizini varsa True (eksik parça varsa belgeler yeniden işlenmeli)
+        """
+        loaded = all(self._map(lambda _, shard: shard.load(mmap=mmap), list(self.shards)))
+        # Yan dosyalar yalnızca yüklenen parça sürümleriyle yayımlanmışlarsa kullanılır
+        snapshot = current_snapshot(self.root)
+        self.snapshot_dir, self._side_version = None, None
+        versions = {name: shard.index_version for name, shard in self.shards.items()}
+        if snapshot is not None and snapshot[1].get("shards") == versions:
+            self.snapshot_dir, self._side_version = snapshot[0], snapshot[1].get("side")
+        return loaded
+
+    def snapshot_file(self, name):
+        """Ortak anlık görüntüdeki dosyanın yolu; yoksa None."""
+        if self.snapshot_dir is None:
+            return None
+        path = os.path.join(self.snapshot_dir, name)
+        return path if os.path.exists(path) else None
+
+    def stats(self):
+        """Parça başına vektör sayısı."""
+        return {name: len(shard.doc_map) for name, shard in self.shards.items()}
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+
+
+# Kullanım
+if __name__ == "__main__":
+    vectorizer = ShardedVectorizer(shard_by='collection', collections={"borclar": ["tbk*"], "ceza": ["tck*"]})
+    vectorizer.add_documents([("tbk.txt#0-40", "Sözleşme, tarafların iradeleriyle kurulur."),
+                              ("tck.txt#0-35", "Kasten öldürme suçunun cezası."),
+                              ("kvkk.txt#0-30", "Kişisel veriler korunur.")])
+    print(vectorizer.stats())
+    print(vectorizer.search("sözleşme nasıl kurulur", top_k=2, collections=["borclar"]))
+    vectorizer.persist()
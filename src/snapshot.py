@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import shutil
+import sqlite3
+import threading
+from collections.abc import Mapping
+import numpy as np
+from chunker import split_chunk_id
+
+# Anlık görüntüler <kök>/snapshots/<sürüm>/ altında tutulur; yayımlanan sürümün adı
+# atomik olarak değiştirilen <kök>/CURRENT işaretçisindedir
+EMBEDDINGS_DIR = "models/embeddings"
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "faiss_index.bin"
+METADATA_FILE = "metadata.sqlite"
+
+
+class MetadataStore:
+    """
+    Vektör kimliği -> pasaj meta verisi (chunk_id, belge, ofsetler) için SQLite deposu.
+    - Kimlik birincil anahtardır; belge kimliği üzerinde ayrıca dizin vardır.
+    - Metin satırlarının aksine, virgül veya yeni satır içeren kimlikleri güvenle saklar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()  # Bağlantı sunum iş parçacıkları arasında paylaşılır
+        # Meta veri alanlarından önce yazılmış anlık görüntülerde madde sütunu ve belge tablosu yoktur
+        columns = {row[1] for row in self._query("PRAGMA table_info(vectors)")}
+        self.has_metadata = "article" in columns
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    @staticmethod
+    def write(path, doc_map, meta=None, articles=None, documents=None):
+        """
+        Yeni bir depo dosyası oluşturur (dosya yayımlanmadan önce yazıldığından günlük tutulmaz).
+        :param doc_map: {vektör kimliği: chunk_id}
+        :param meta: Ek anahtar/değer çiftleri (ör. next_id)
+        :param articles: {chunk_id: madde numarası}
+        :param documents: {doc_id: belge meta verisi} (bkz. `metadata.extract_metadata`)
+        """
+        articles = articles or {}
+        if os.path.exists(path):
+            os.remove(path)
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE vectors (id INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL, "
+                         "doc_id TEXT NOT NULL, start INTEGER, end INTEGER, article INTEGER)")
+            conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            conn.execute("CREATE TABLE documents (doc_id TEXT PRIMARY KEY, metadata TEXT NOT NULL)")
+            conn.executemany("INSERT INTO vectors VALUES (?, ?, ?, ?, ?, ?)",
+                             ((vector_id, chunk_id, *split_chunk_id(chunk_id), articles.get(chunk_id))
+                              for vector_id, chunk_id in sorted(doc_map.items())))
+            conn.executemany("INSERT INTO meta VALUES (?, ?)",
+                             ((key, json.dumps(value)) for key, value in (meta or {}).items()))
+            conn.executemany("INSERT INTO documents VALUES (?, ?)",
+                             ((doc_id, json.dumps(metadata, ensure_ascii=False))
+                              for doc_id, metadata in sorted((documents or {}).items())))
+            conn.execute("CREATE INDEX vectors_doc_id ON vectors (doc_id)")
+            conn.execute("CREATE INDEX vectors_chunk_id ON vectors (chunk_id)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def read_map(self):
+        """Tüm {vektör kimliği: chunk_id} eşlemesini tek sorguyla okur."""
+        return dict(self._query("SELECT id, chunk_id FROM vectors"))
+
+    def read_articles(self):
+        """Madde numarası bilinen pasajlar: {chunk_id: madde}."""
+        if not self.has_metadata:
+            return {}
+        return dict(self._query("SELECT chunk_id, article FROM vectors WHERE article IS NOT NULL"))
+
+    def read_documents(self):
+        """Belge meta verileri: {doc_id: {...}}."""
+        if not self.has_metadata:
+            return {}
+        return {doc_id: json.loads(metadata) for doc_id, metadata in self._query("SELECT * FROM documents")}
+
+    def filter_columns(self):
+        """Filtre seçicisi için tüm kayıtların (kimlik, belge, madde) sütunları."""
+        article = "article" if self.has_metadata else "NULL"
+        return self._query(f"SELECT id, doc_id, {article} FROM vectors ORDER BY id")
+
+    def chunk_articles(self, chunk_ids):
+        """Pasajların madde numaraları: {chunk_id: madde} (bilinmeyenler atlanır)."""
+        if not self.has_metadata:
+            return {}
+        chunk_ids, rows = list(chunk_ids), []
+        for offset in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[offset:offset + 500]
+            rows += self._query(f"SELECT chunk_id, article FROM vectors WHERE article IS NOT NULL "
+                                f"AND chunk_id IN ({','.join('?' * len(batch))})", batch)
+        return dict(rows)
+
+    def get_meta(self, key, default=None):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def _select_ids(self, columns, vector_ids):
+        vector_ids = [int(vector_id) for vector_id in vector_ids]
+        rows = []
+        for offset in range(0, len(vector_ids), 500):
+            batch = vector_ids[offset:offset + 500]
+            rows += self._query(f"SELECT {columns} FROM vectors WHERE id IN ({','.join('?' * len(batch))})",
+                                batch)
+        return rows
+
+    def chunk_ids(self, vector_ids):
+        """Kimliklerin chunk_id'lerini döndürür: {id: chunk_id} (depoda olmayanlar atlanır)."""
+        return dict(self._select_ids("id, chunk_id", vector_ids))
+
+    def lookup(self, vector_ids):
+        """Kimliklerin meta verisini döndürür: {id: {"chunk_id", "doc_id", "start", "end"}}."""
+        return {vector_id: {"chunk_id": chunk_id, "doc_id": doc_id, "start": start, "end": end}
+                for vector_id, chunk_id, doc_id, start, end
+                in self._select_ids("id, chunk_id, doc_id, start, end", vector_ids)}
+
+    def vector_ids_for(self, doc_ids):
+        """Belgelere ait vektör kimliklerini (belge dizini üzerinden) döndürür."""
+        ids = []
+        for doc_id in doc_ids:
+            ids.extend(row[0] for row in self._query("SELECT id FROM vectors WHERE doc_id = ?", (doc_id,)))
+        return ids
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM vectors")[0][0]
+
+    def close(self):
+        self._conn.close()
+
+
+class MetadataMap(Mapping):
+    """
+    Salt okunur {vektör kimliği: chunk_id} görünümü.
+    Kayıtlar süreç belleğine yüklenmez; istendikçe SQLite dosyasından (süreçlerin paylaştığı
+    sayfa önbelleği üzerinden) okunur, böylece yükleme kayıt sayısından bağımsızdır.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._length = len(store)
+
+    def __getitem__(self, vector_id):
+        found = self.store.chunk_ids([vector_id])
+        if not found:
+            raise KeyError(vector_id)
+        return found[int(vector_id)]
+
+    def __iter__(self):
+        return iter(row[0] for row in self.store._query("SELECT id FROM vectors ORDER BY id"))
+
+    def __len__(self):
+        return self._length
+
+    def resolve(self, vector_ids):
+        """Kimlik matrisini aynı biçimde chunk_id matrisine çevirir; bulunamayanlar None olur."""
+        vector_ids = np.asarray(vector_ids)
+        present = vector_ids >= 0
+        unique = np.unique(vector_ids[present])
+        found = self.store.chunk_ids(unique.tolist())
+        values = np.array([found.get(vector_id) for vector_id in unique.tolist()], dtype=object)
+        names = np.full(vector_ids.shape, None, dtype=object)
+        names[present] = values[np.searchsorted(unique, vector_ids[present])]
+        return names
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def snapshot_path(version, root=EMBEDDINGS_DIR):
+    """Sürümün anlık görüntü klasörü (yayımlanmamış olabilir)."""
+    return os.path.join(root, "snapshots", version)
+
+
+def current_version(root=EMBEDDINGS_DIR):
+    """Yayımlanmış anlık görüntünün sürümünü döndürür (yoksa None)."""
+    pointer = os.path.join(root, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, 'r') as f:
+        return f.read().strip() or None
+
+
+def current_snapshot(root=EMBEDDINGS_DIR):
+    """Yayımlanmış anlık görüntünün klasörünü ve manifestosunu döndürür: (klasör, manifesto) veya None."""
+    version = current_version(root)
+    if version is None:
+        return None
+    directory = snapshot_path(version, root)
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        print(f"⚠️ CURRENT geçersiz bir anlık görüntüyü gösteriyor: {version}")
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return directory, json.load(f)
+
+
+def publish_snapshot(version, write_files, manifest, root=EMBEDDINGS_DIR, keep=2):
+    """
+    Anlık görüntüyü atomik olarak yayımlar.
+    Dosyalar geçici bir klasöre yazılır, klasör sürüm adıyla yerine taşınır ve son olarak
+    CURRENT işaretçisi değiştirilir; okuyucular ya eski ya da yeni görüntünün tamamını görür.
+    Sürüm zaten yayımlanmışsa dosyalar yeniden yazılmaz, yalnızca işaretçi ona çevrilir.
+    :param version: Anlık görüntü adı (dizin sürümü)
+    :param write_files: Dosyaları verilen klasöre yazan fonksiyon
+    :param manifest: Manifestoya yazılacak alanlar
+    :param keep: Saklanacak en fazla anlık görüntü sayısı (yayımlanan dahil)
+    :return: Yayımlanan klasör
+    """
+    snapshots = os.path.join(root, "snapshots")
+    directory = snapshot_path(version, root)
+    os.makedirs(snapshots, exist_ok=True)
+    if not os.path.exists(directory):
+        staging = f"{directory}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        write_files(staging)
+        manifest = {"version": version, "created_at": time.time(), **manifest,
+                    "files": {name: os.path.getsize(os.path.join(staging, name))
+                              for name in sorted(os.listdir(staging))}}
+        with open(os.path.join(staging, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        for name in os.listdir(staging):
+            with open(os.path.join(staging, name), 'rb') as f:
+                os.fsync(f.fileno())
+        os.rename(staging, directory)
+        _fsync_dir(snapshots)
+
+    pointer = os.path.join(root, "CURRENT")
+    with open(f"{pointer}.tmp", 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f"{pointer}.tmp", pointer)
+    _fsync_dir(root)
+    _prune(snapshots, version, keep)
+    return directory
+
+
+def _prune(snapshots, current, keep):
+    """En eski anlık görüntüleri siler (yayımlanan görüntü her zaman korunur)."""
+    entries = [name for name in os.listdir(snapshots)
+               if name != current and not name.endswith(".tmp")
+               and os.path.isdir(os.path.join(snapshots, name))]
+    entries.sort(key=lambda name: os.path.getmtime(os.path.join(snapshots, name)), reverse=True)
+    for name in entries[max(keep - 1, 0):]:
+        shutil.rmtree(os.path.join(snapshots, name), ignore_errors=True)
+
+
+# Kullanım
+if __name__ == "__main__":
+    snapshot = current_snapshot()
+    if snapshot is None:
+        print("⚠️ Yayımlanmış anlık görüntü bulunamadı, önce belgeleri işleyin.")
+    else:
+        directory, manifest = snapshot
+        store = MetadataStore(os.path.join(directory, METADATA_FILE))
+        print(f"📦 {manifest['version']}: {len(store)} vektör, {manifest['files']}")
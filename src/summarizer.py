@@ -0,0 +1,182 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from chunker import DocumentChunker
+from tracing import span, record_cache
+
+# Prompt şablonları değiştiğinde eski özetlerin kullanılmaması için anahtara eklenir
+PROMPT_VERSION = "1"
+
+SECTION_PROMPT = """
+        Aşağıda uzun bir hukuki belgenin bir bölümü verilmiştir. Bu bölümü; taraflar, yükümlülükler,
+        süreler, tutarlar ve madde numaraları gibi önemli ayrıntıları koruyarak Türkçe özetle:
+
+        {text}
+
+        Bölüm özeti:
+        """
+
+REDUCE_PROMPT = """
+        Aşağıda aynı belgenin ardışık bölümlerinin özetleri verilmiştir. Bunları tekrarları çıkararak,
+        belge sırasını koruyan tek ve tutarlı bir Türkçe özette birleştir:
+
+        {text}
+
+        Birleştirilmiş özet:
+        """
+
+DOCUMENT_PROMPT = """
+        Aşağıda verilen belgeyi özetle:
+
+        {text}
+
+        Özet:
+        """
+
+
+class SummaryCache:
+    """
+    İçerik özetine (blake2b) göre anahtarlanan bölüm/birleştirme özeti önbelleği.
+    - Bellekte LRU olarak tutulur; `path` verilirse JSON dosyasına atomik olarak kaydedilir.
+    - Düzenlenen bir belgede yalnızca metni değişen bölümler yeniden özetlenir.
+    """
+
+    def __init__(self, path=None, max_entries=10_000):
+        """
+        :param path: Kalıcı önbellek dosyası (None: yalnızca bellekte)
+        :param max_entries: En fazla tutulacak özet sayısı
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries.update(json.load(f))
+
+    @staticmethod
+    def key(kind, text):
+        return hashlib.blake2b(f"{PROMPT_VERSION}\0{kind}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+            return summary
+
+    def put(self, key, summary):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def flush(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._lock:
+            entries = dict(self._entries)
+        with open(f"{self.path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(f"{self.path}.tmp", self.path)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MapReduceSummarizer:
+    """
+    Uzun belgeler için hiyerarşik (map-reduce) özetleyici.
+    - Belge, madde sınırlarına göre `section_chars` büyüklüğünde bölümlere ayrılır.
+    - Bölümler LLM istemcisinin eşzamanlılık sınırıyla paralel özetlenir (map).
+    - Kısmi özetler `fan_in`'lik gruplar halinde, tek özet kalana kadar birleştirilir (reduce);
+      tur sayısı logaritmik büyüdüğünden gecikme belge uzunluğuyla yaklaşık sabit kalır.
+    """
+
+    def __init__(self, client, section_chars=6000, fan_in=6, max_tokens=200, cache=None):
+        """
+        :param client: `LLMClient` (paralellik `max_concurrency` ile sınırlanır)
+        :param section_chars: Bir bölümün en fazla karakter sayısı
+        :param fan_in: Bir birleştirme isteğine verilecek en fazla kısmi özet
+        :param max_tokens: Her özet isteği için en fazla üretilecek token
+        :param cache: `SummaryCache` (default: bellekte önbellek)
+        """
+        if fan_in < 2:
+            raise ValueError("❌ fan_in en az 2 olmalıdır.")
+        self.client = client
+        self.fan_in = fan_in
+        self.max_tokens = max_tokens
+        self.cache = cache if cache is not None else SummaryCache()
+        self.chunker = DocumentChunker(max_chars=section_chars, overlap=0, min_chars=section_chars // 2)
+
+    def split_sections(self, content):
+        """Belgeyi madde sınırlarına saygılı, örtüşmesiz bölümlere ayırır."""
+        return [chunk.text for chunk in self.chunker.chunk_text("document", content)]
+
+    def _generate_all(self, kind, template, texts):
+        """
+        Metinleri önbellekte olmayanlar için eşzamanlı özetler; sonuçlar girdi sırasıyla döner.
+        Başarısız bir istek olursa ilk hata yükseltilir (kısmi sonuç önbellekte kalır).
+        """
+        keys = [SummaryCache.key(kind, text) for text in texts]
+        summaries = [self.cache.get(key) for key in keys]
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        record_cache("summary", True, len(texts) - len(missing))
+        record_cache("summary", False, len(missing))
+        if missing:
+            results = self.client.generate_many([template.format(text=texts[i]) for i in missing],
+                                                max_tokens=self.max_tokens)
+            error = None
+            for i, result in zip(missing, results):
+                if isinstance(result, Exception):
+                    error = error or result
+                    continue
+                summaries[i] = (result or "").strip()
+                self.cache.put(keys[i], summaries[i])
+            if error is not None:
+                raise error
+        return summaries, len(missing)
+
+    def summarize(self, content):
+        """
+        Belgeyi özetler.
+        :param content: Özetlenecek belge içeriği
+        :return: Özet metni
+        """
+        with span("summarize", chars=len(content)) as summary_span:
+            sections = self.split_sections(content)
+            if len(sections) <= 1:
+                summaries, calls = self._generate_all("document", DOCUMENT_PROMPT, [content.strip()])
+                summary_span.set(sections=1, llm_calls=calls)
+                self.cache.flush()
+                return summaries[0]
+
+            summaries, calls = self._generate_all("section", SECTION_PROMPT, sections)
+            rounds = 0
+            while len(summaries) > 1:
+                groups = ["\n\n".join(f"- {summary}" for summary in summaries[i:i + self.fan_in])
+                          for i in range(0, len(summaries), self.fan_in)]
+                summaries, round_calls = self._generate_all("reduce", REDUCE_PROMPT, groups)
+                calls += round_calls
+                rounds += 1
+            summary_span.set(sections=len(sections), reduce_rounds=rounds, llm_calls=calls)
+            self.cache.flush()
+            print(f"📝 {len(sections)} bölüm, {rounds} birleştirme turu, {calls} LLM çağrısı.")
+            return summaries[0]
+
+
+# Kullanım
+if __name__ == "__main__":
+    from mock_llm_server import MockLLMServer
+    from llm_client import LLMClient
+
+    document = "\n".join(f"MADDE {i} - " + f"Kiracı, kira bedelini her ayın {i}. günü öder. " * 20
+                         for i in range(1, 40))
+    with MockLLMServer(response=lambda prompt: f"özet ({len(prompt)} karakter)", latency=0.05) as server:
+        summarizer = MapReduceSummarizer(LLMClient(server.url, "demo", max_concurrency=8))
+        print(summarizer.summarize(document))
+        print(f"🔁 Tekrar: {summarizer.summarize(document)} ({len(server.requests)} istek)")
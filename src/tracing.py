@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import uuid
+import bisect
+import threading
+import contextvars
+from functools import wraps
+
+DEFAULT_TRACE_FILE = "logs/traces.jsonl"
+# Saniye cinsinden gecikme kovaları (Prometheus histogramı)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_span = contextvars.ContextVar("rag_current_span", default=None)
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Etiketli, yalnızca artan sayaç."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Etiketli, sabit kovalı histogram (toplam ve sayıyla birlikte)."""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._values = {}  # etiketler -> [kova sayıları..., toplam, adet]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def count(self, **labels):
+        return self._values.get(_label_key(labels), [0])[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, counts in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {counts[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {counts[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {counts[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Süreç genelindeki metrikler; Prometheus metin biçiminde dışa aktarılır."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text=""):
+        with self._lock:
+            return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        with self._lock:
+            return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class _NoopSpan:
+    """İzleme kapalıyken dönen, hiçbir şey yapmayan aralık."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        return self
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """
+    Tek bir aşamanın zamanlaması (perf_counter) ve öznitelikleri.
+    Kök aralık bittiğinde tüm alt aralıklarıyla birlikte tek bir JSONL satırı olarak yazılır.
+    """
+
+    def __init__(self, tracer, name, attrs, activate=True):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.activate = activate
+        self.parent = _current_span.get()
+        self.span_id = uuid.uuid4().hex[:16]
+        self.root = self.parent.root if self.parent is not None else self
+        if self.root is self:
+            self.trace_id = uuid.uuid4().hex
+            self.records = []
+            self.lock = threading.Lock()
+        self._token = None
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        """Aralığa boyut, önbellek isabeti gibi öznitelikler ekler."""
+        self.attrs.update(attrs)
+        return self
+
+    def __enter__(self):
+        if self.activate:
+            self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.end()
+        return False
+
+    def end(self):
+        duration = time.perf_counter() - self.start
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        self.tracer._finish(self, duration)
+
+
+class Tracer:
+    """
+    İstek başına iç içe aralıkları kaydeden izleyici.
+    - Kapalıyken `span` paylaşılan boş bir nesne döndürür; maliyet tek bir bayrak kontrolüdür.
+    - Açıkken her aralığın süresi `rag_stage_duration_seconds` histogramına işlenir ve kök
+      aralıklar JSONL dosyasına yazılır.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_file = DEFAULT_TRACE_FILE
+        self.metrics = MetricsRegistry()
+        self._write_lock = threading.Lock()
+        self._durations = self.metrics.histogram("rag_stage_duration_seconds",
+                                                 "Aşama başına süre (sn)")
+        self._errors = self.metrics.counter("rag_stage_errors_total", "Hata ile biten aşama sayısı")
+        self._cache = self.metrics.counter("rag_cache_requests_total", "Önbellek isabet/ıska sayısı")
+
+    def configure(self, enabled=False, trace_file=DEFAULT_TRACE_FILE):
+        """
+        :param enabled: İzleme açık mı
+        :param trace_file: Kök aralıkların yazılacağı JSONL dosyası (None: dosyaya yazılmaz)
+        """
+        self.enabled = enabled
+        self.trace_file = trace_file
+        if enabled and trace_file:
+            os.makedirs(os.path.dirname(trace_file) or '.', exist_ok=True)
+
+    def span(self, name, activate=True, **attrs):
+        """
+        Aşama aralığı başlatır: `with span("embed", texts=10) as s: ...; s.set(cache_hits=3)`.
+        :param activate: False ise aralık alt aralıkların üstü olmaz (ör. generator içinde kullanım)
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs, activate)
+
+    def record_cache(self, cache, hit, count=1):
+        """Önbellek isabetini/ıskasını sayaçlara ve etkin aralığa işler."""
+        if not self.enabled:
+            return
+        self._cache.inc(count, cache=cache, result="hit" if hit else "miss")
+        current = _current_span.get()
+        if current is not None:
+            key = f"{cache}_cache_{'hits' if hit else 'misses'}"
+            current.attrs[key] = current.attrs.get(key, 0) + count
+
+    def _finish(self, span, duration):
+        self._durations.observe(duration, stage=span.name)
+        if "error" in span.attrs:
+            self._errors.inc(stage=span.name)
+        root = span.root
+        record = {
+            "name": span.name,
+            "span_id": span.span_id,
+            "parent_id": span.parent.span_id if span.parent is not None else None,
+            "start_ms": round((span.start - root.start) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **span.attrs,
+        }
+        with root.lock:
+            root.records.append(record)
+        if span is root and self.trace_file:
+            self._write(root, duration)
+
+    def _write(self, root, duration):
+        line = json.dumps({
+            "trace_id": root.trace_id,
+            "name": root.name,
+            "timestamp": time.time(),
+            "duration_ms": round(duration * 1000, 3),
+            "spans": root.records,
+        }, ensure_ascii=False, default=str)
+        with self._write_lock, open(self.trace_file, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+tracer = Tracer()
+span = tracer.span
+record_cache = tracer.record_cache
+
+
+def traced(name=None):
+    """Fonksiyonu bir aralıkla sarar (izleme kapalıyken doğrudan çağırır)."""
+    def decorator(func):
+        stage = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_tracing(config=None):
+    """`configs/model_config.yaml` içindeki `tracing` bölümüyle izleyiciyi ayarlar."""
+    config = config or {}
+    tracer.configure(enabled=config.get("enabled", False),
+                     trace_file=config.get("trace_file", DEFAULT_TRACE_FILE))
+    if tracer.enabled and config.get("metrics_port"):
+        start_metrics_server(config["metrics_port"])
+    return tracer
+
+
+def render_prometheus():
+    """Tüm metrikleri Prometheus metin biçiminde döndürür."""
+    return tracer.metrics.render()
+
+
+_metrics_servers = {}
+
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """`/metrics` uç noktasını arka planda sunar (aynı port için bir kez başlatılır)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    if port in _metrics_servers:
+        return _metrics_servers[port]
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _metrics_servers[port] = server
+    print(f"📈 Metrikler yayında: http://{host}:{server.server_address[1]}/metrics")
+    return server
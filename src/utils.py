@@ -1,7 +1,11 @@
 import logging
 import os
-from datetime import datetime
+import sys
+import importlib.util
+from functools import wraps
+import time
 import yaml
+from tracing import tracer
 
 # === Loglama Ayarları ===
 LOG_FILE = "logs/app.log"
@@ -30,11 +34,45 @@ def load_yaml_config(file_path):
 
 # === Zaman Hesaplayıcı ===
 def timeit(func):
-    """Fonksiyonun çalışma süresini hesaplar."""
+    """
+    Fonksiyonun çalışma süresini (perf_counter) hesaplayıp loglar.
+    İzleme açıksa çağrı, fonksiyon adıyla bir aralık olarak da kaydedilir (bkz. `tracing`).
+    """
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = datetime.now()
-        result = func(*args, **kwargs)
-        duration = datetime.now() - start_time
-        log_info(f"{func.__name__} çalıştı. Süre: {duration.total_seconds()} saniye")
+        start_time = time.perf_counter()
+        with tracer.span(func.__name__):
+            result = func(*args, **kwargs)
+        duration = time.perf_counter() - start_time
+        log_info(f"{func.__name__} çalıştı. Süre: {duration:.4f} saniye")
         return result
     return wrapper
+
+# === Ertelenmiş İçe Aktarma ===
+class _MissingModule:
+    """Kurulu olmayan bir modülün yerine geçer; ilk kullanımda anlamlı hata verir."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        raise ImportError(f"❌ '{self._name}' modülü bulunamadı. Lütfen requirements.txt bağımlılıklarını yükleyin.")
+
+
+def lazy_import(name):
+    """
+    Ağır modülleri (faiss, torch vb.) ilk kullanımda içe aktarır.
+    Modül kurulu değilse hata, yalnızca modül gerçekten kullanıldığında yükselir.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return _MissingModule(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
@@ -1,32 +1,239 @@
 import os
-import faiss
-import chromadb
+import shutil
+import time
+import uuid
+from itertools import islice
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from chromadb.config import Settings
+from utils import lazy_import
+from tracing import span, record_cache
+from embedding_cache import EmbeddingCache
+from chunker import split_chunk_id
+from float_store import FloatVectorStore, FLOAT_STORE_FILE
+from snapshot import (MetadataStore, MetadataMap, publish_snapshot, snapshot_path, current_snapshot, current_version,
+                      INDEX_FILE, METADATA_FILE, EMBEDDINGS_DIR)
+from ann_index import (resolve_index_config, build_faiss_index, apply_search_params, filtered_search_params,
+                       min_training_points, supports_remove, mmap_read_flags, uses_native_ids,
+                       unwrap_native_ids)
+from metadata import (DOCUMENT_FIELDS, CHUNK_FIELDS, chunk_metadata, split_metadata, normalize_filters,
+                      filter_key, matches, to_chroma_where)
 
-class DocumentVectorizer:
+# faiss, chromadb ve sentence-transformers (torch) yalnızca seçilen depo gerektirdiğinde yüklenir
+faiss = lazy_import("faiss")
+
+# Filtre başına önbelleklenen en fazla kimlik seçicisi (dizin değişince tümü yenilenir)
+MAX_CACHED_FILTERS = 32
+
+
+def load_embedding_model(model_name):
+    """SentenceTransformer modelini yükler (torch içe aktarması burada gerçekleşir)."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name)
+
+class EmbeddingVectorizer:
+    """
+    Vektörleştiricilerin ortak gömme tarafı.
+    - Metinleri (varsa kalıcı gömme önbelleği üzerinden) tekli veya toplu kodlar.
+    - Toplu eklemede girdiyi bloklara böler; her bloğu alt sınıfın `_add_block`una yazar.
+    """
+
+    def __init__(self, model_name='all-mpnet-base-v2', batch_size=64, encode_workers=1, add_block_size=2048,
+                 embedding_cache_dir=None, embedding_cache_size=200_000, model=None, query_cache=None,
+                 embedding_cache=None):
+        """
+        :param model_name: SentenceTransformer model ismi
+        :param batch_size: Kodlayıcıya tek seferde verilecek metin sayısı
+        :param encode_workers: Toplu kodlamada kullanılacak CPU süreç sayısı (1: tek süreç)
+        :param add_block_size: Toplu eklemede depoya tek seferde yazılacak vektör sayısı
+        :param embedding_cache_dir: Verilirse gömmeler bu klasördeki kalıcı önbellekte tutulur
+        :param embedding_cache_size: Önbellekte en fazla tutulacak vektör sayısı
+        :param model: Önceden yüklenmiş, paylaşılan SentenceTransformer (verilmezse `model_name` yüklenir)
+        :param query_cache: Sorgu gömmeleri için paylaşılan `QueryCache` (None: her sorgu kodlanır)
+        :param embedding_cache: Paylaşılan `EmbeddingCache` (verilirse `embedding_cache_dir` yok sayılır)
+        """
+        self.batch_size = batch_size
+        self.query_cache = query_cache
+        self.encode_workers = encode_workers
+        self.add_block_size = add_block_size
+        self.model = model if model is not None else load_embedding_model(model_name)
+        self.embedding_dim = self.model.get_sentence_embedding_dimension()
+        self.embedding_cache = embedding_cache
+        if embedding_cache is None and embedding_cache_dir:
+            self.embedding_cache = EmbeddingCache(model_name, self.embedding_dim,
+                                                  cache_dir=embedding_cache_dir,
+                                                  max_entries=embedding_cache_size)
+
+    def _embed_text(self, text):
+        """Metni vektör haline getirir; önbellek varsa önce ona bakar."""
+        with span("embed", texts=1):
+            if self.embedding_cache is not None:
+                vector = self.embedding_cache.get(text)
+                record_cache("embedding", vector is not None)
+                if vector is not None:
+                    return vector
+            vector = self.model.encode(text)
+            if self.embedding_cache is not None:
+                self.embedding_cache.put(text, vector)
+            return vector
+
+    def _encode_batch(self, texts, pool=None):
+        if pool is not None:
+            return self.model.encode_multi_process(texts, pool, batch_size=self.batch_size)
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+
+    def _embed_batch(self, texts, pool=None):
+        """
+        Metin listesini toplu olarak vektörleştirir; `pool` verilirse çok süreçli kodlar.
+        Önbellek varsa yalnızca önbellekte bulunmayan metinler kodlayıcıya gider.
+        """
+        with span("embed", texts=len(texts)):
+            if self.embedding_cache is None:
+                return self._encode_batch(texts, pool=pool)
+
+            vectors, missing = self.embedding_cache.get_many(texts)
+            record_cache("embedding", True, len(texts) - len(missing))
+            record_cache("embedding", False, len(missing))
+            if missing:
+                missing_texts = [texts[i] for i in missing]
+                encoded = self._encode_batch(missing_texts, pool=pool)
+                self.embedding_cache.put_many(missing_texts, encoded)
+                for i, vector in zip(missing, encoded):
+                    vectors[i] = vector
+            return np.vstack(vectors).astype('float32')
+
+    def add_documents(self, documents, batch_size=None, encode_workers=None):
+        """
+        Belgeleri toplu olarak vektörleştirip depoya ekler.
+        Girdi akış halinde `add_block_size` büyüklüğünde bloklarla okunur; her blok
+        kodlayıcıdan `batch_size`'lık gruplarla geçer ve depoya tek çağrıda yazılır.
+        :param documents: [(doc_id, content), ...] veya [(doc_id, content, metadata), ...] biçiminde
+                          bir iterable (meta veri için bkz. `metadata.chunk_metadata`)
+        :param batch_size: Kodlayıcı grup boyutu (default: yapıcıdaki değer)
+        :param encode_workers: CPU süreç sayısı; 1'den büyükse çok süreçli kodlama havuzu açılır
+        :return: Eklenen belge sayısı
+        """
+        if batch_size is not None:
+            self.batch_size = batch_size
+        workers = encode_workers or self.encode_workers
+
+        pool = None
+        if workers > 1:
+            pool = self.model.start_multi_process_pool(target_devices=['cpu'] * workers)
+
+        documents = iter(documents)
+        count = 0
+        start_time = time.perf_counter()
+        try:
+            while True:
+                block = list(islice(documents, self.add_block_size))
+                if not block:
+                    break
+                doc_ids, contents, *metadatas = zip(*block)
+                vectors = self._embed_batch(list(contents), pool=pool)
+                self._add_block(doc_ids, contents, vectors, metadatas[0] if metadatas else None)
+                count += len(block)
+        finally:
+            if pool is not None:
+                self.model.stop_multi_process_pool(pool)
+            if self.embedding_cache is not None:
+                self.embedding_cache.flush()
+
+        elapsed = time.perf_counter() - start_time
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(f"✅ {count} belge {elapsed:.1f} sn'de eklendi ({rate:.1f} belge/sn).")
+        if self.embedding_cache is not None:
+            print(f"📦 Gömme önbelleği: {self.embedding_cache.stats()}")
+        return count
+
+    def add_chunks(self, chunks, **kwargs):
+        """
+        Pasajları (bkz. `chunker.Chunk`) toplu olarak vektörleştirip depoya ekler.
+        Her pasaj, `<doc_id>#<start>-<end>` kimliğiyle aranabilir birim olur; belge meta verisi ve
+        madde numarası filtreli arama için pasajla birlikte saklanır.
+        """
+        return self.add_documents(((chunk.chunk_id, chunk.text, chunk_metadata(chunk.metadata, chunk.article))
+                                   for chunk in chunks), **kwargs)
+
+    def embed_query(self, query):
+        """
+        Sorgu metnini vektörleştirir (aynı vektör `search` ve önbelleklerde tekrar kullanılabilir).
+        Sorgu önbelleği varsa normalleştirilmiş hali daha önce sorulmuş sorgular kodlayıcıya gitmez.
+        """
+        if self.query_cache is None:
+            return self._embed_text(query)
+        return self.query_cache.embed(query, self._embed_text)
+
+    def embed_queries(self, queries):
+        """Sorgu listesini tek kodlayıcı geçişiyle vektörleştirir; (n, dim) float32 matris döner."""
+        if self.query_cache is None:
+            return self._embed_batch(list(queries))
+        return self.query_cache.embed_many(queries, self._embed_batch)
+
+    def _add_block(self, doc_ids, contents, vectors, metadatas=None):
+        raise NotImplementedError
+
+
+class DocumentVectorizer(EmbeddingVectorizer):
     """
     Belge vektörleştirme sınıfı.
     - FAISS ve Chroma desteği içerir.
     - İlgili yapılandırmalara göre doğru depolama mekanizmasını seçer.
+    - Meta veri filtreleri dizinin içinde uygulanır: FAISS'te filtreye uyan kimliklerin bit eşlemi
+      seçici olarak aramaya verilir, Chroma'da `where` ifadesine çevrilir.
     """
 
-    def __init__(self, vector_store='faiss', model_name='all-mpnet-base-v2'):
+    def __init__(self, vector_store='faiss', model_name='all-mpnet-base-v2',
+                 batch_size=64, encode_workers=1, add_block_size=2048,
+                 embedding_cache_dir=None, embedding_cache_size=200_000, index_config=None,
+                 model=None, root=EMBEDDINGS_DIR, query_cache=None, embedding_cache=None):
         """
         :param vector_store: "faiss" veya "chroma" seçeneği (default: faiss)
         :param model_name: SentenceTransformer model ismi
+        :param batch_size: Kodlayıcıya tek seferde verilecek metin sayısı
+        :param encode_workers: Toplu kodlamada kullanılacak CPU süreç sayısı (1: tek süreç)
+        :param add_block_size: Toplu eklemede depoya tek seferde yazılacak vektör sayısı
+        :param embedding_cache_dir: Verilirse gömmeler bu klasördeki kalıcı önbellekte tutulur
+        :param embedding_cache_size: Önbellekte en fazla tutulacak vektör sayısı
+        :param index_config: FAISS dizin ayarları; flat, ivf_flat, ivf_pq veya hnsw, vektör kodlaması
+                             ve yeniden skorlama (bkz. `ann_index`)
+        :param model: Önceden yüklenmiş, paylaşılan SentenceTransformer (verilmezse `model_name` yüklenir)
+        :param root: FAISS anlık görüntülerinin ve tam vektör deposunun kök klasörü (parçalı dizinde parça klasörü)
+        :param query_cache: Sorgu gömmeleri için paylaşılan `QueryCache`
+        :param embedding_cache: Paylaşılan kalıcı gömme önbelleği (`EmbeddingCache`)
         """
+        super().__init__(model_name=model_name, batch_size=batch_size, encode_workers=encode_workers,
+                         add_block_size=add_block_size, embedding_cache_dir=embedding_cache_dir,
+                         embedding_cache_size=embedding_cache_size, model=model, query_cache=query_cache,
+                         embedding_cache=embedding_cache)
         self.vector_store = vector_store
-        self.model = SentenceTransformer(model_name)
-        self.embedding_dim = self.model.get_sentence_embedding_dimension()
-        
+        self.root = root
+        # Dizin her değiştiğinde yenilenen sürüm; önbellekler bununla geçersiz kılınır
+        self.index_version = uuid.uuid4().hex
+
         if vector_store == 'faiss':
-            self.index = faiss.IndexFlatL2(self.embedding_dim)
+            self.index_config = resolve_index_config(index_config)
+            # Kurulu dizinin ayarları; eğitim örneği yetersizken geçici olarak flat'e düşer
+            self.active_config = self.index_config
+            self.index = self._new_faiss_index()
             self.doc_map = {}  # Vektör ID -> Doküman Adı Eşleşmesi
-            print("✅ FAISS vektör deposu başlatıldı.")
+            self.next_id = 0
+            self._pending = []  # Dizin eğitilene kadar bekletilen (ids, vectors) blokları
+            self._lookup = None      # Vektör ID -> chunk_id dizisi (toplu arama için)
+            self._lookup_key = None
+            self.read_only = False   # mmap ile yüklenen dizin yalnızca aranabilir
+            self.snapshot_dir = None   # Yüklenen/yayımlanan anlık görüntünün klasörü
+            self.doc_metadata = {}     # doc_id -> belge meta verisi (bkz. `metadata.extract_metadata`)
+            self.chunk_articles = {}   # chunk_id -> madde numarası
+            self._reset_filter_cache()
+            # Sıkıştırılmış dizinlerde adaylar diskteki tam vektörlerle yeniden skorlanır
+            self.float_store = None
+            if self.index_config["rescore_factor"] > 0:
+                self.float_store = FloatVectorStore(self.embedding_dim, path=self._float_store_path())
+            print(f"✅ FAISS vektör deposu başlatıldı ({self.index_config['type']}, "
+                  f"{self.index_config['encoding']}).")
         
         elif vector_store == 'chroma':
+            import chromadb
+            from chromadb.config import Settings
             self.client = chromadb.Client(Settings(chroma_db_impl="duckdb+parquet",
                                                    persist_directory="models/embeddings"))
             self.collection = self.client.get_or_create_collection(name="documents")
@@ -35,70 +242,539 @@ class DocumentVectorizer:
         else:
             raise ValueError("❌ Geçersiz vector_store seçimi. Sadece 'faiss' veya 'chroma' kullanılabilir.")
 
-    def _embed_text(self, text):
-        """Metni vektör haline getirir."""
-        return self.model.encode(text)
+    def _new_faiss_index(self):
+        """
+        Kimlik eşlemeli dizin: vektörler kalıcı int64 kimliklerle eklenir ve silinebilir.
+        IVF dizinleri kimlikleri kendileri sakladığından sarmalanmaz (bkz. `ann_index.uses_native_ids`).
+        """
+        index = build_faiss_index(self.embedding_dim, self.active_config)
+        if not uses_native_ids(index):
+            index = faiss.IndexIDMap2(index)
+        apply_search_params(index, self.active_config)
+        return index
+
+    def _float_store_path(self):
+        """Henüz yayımlanmamış tam vektörlerin çalışma dosyası (yayımlanınca anlık görüntüye taşınır)."""
+        return os.path.join(self.root, os.path.basename(FLOAT_STORE_FILE))
+
+    def snapshot_file(self, name):
+        """Yüklü (veya son yayımlanan) anlık görüntüdeki dosyanın yolu; yoksa None."""
+        if self.vector_store != 'faiss' or self.snapshot_dir is None:
+            return None
+        path = os.path.join(self.snapshot_dir, name)
+        return path if os.path.exists(path) else None
+
+    def _check_writable(self):
+        if self.vector_store == 'faiss' and self.read_only:
+            raise RuntimeError("❌ Dizin salt okunur (mmap) yüklendi; ekleme/silme için mmap=False ile yükleyin.")
+
+    def train(self, sample=None):
+        """
+        IVF dizinlerini bir vektör örneğiyle eğitir ve bekleyen vektörleri dizine ekler.
+        Örnek yetersizse (ör. küçük derlemler) bu kurulum için kesin arama yapan flat dizine geri
+        düşülür; ayarlar değişmez ve yeterli vektör birikince dizin ayarlanan tiple yeniden kurulur.
+        :param sample: Eğitim vektörleri (default: eğitim için bekletilen vektörler)
+        """
+        if sample is None:
+            sample = np.vstack([vectors for _, vectors in self._pending])
+        if not self.index.is_trained:
+            needed = min_training_points(self.active_config)
+            if len(sample) < needed:
+                print(f"⚠️ {self.active_config['type']}/{self.active_config['encoding']} için en az {needed} "
+                      f"eğitim vektörü gerekli ({len(sample)} var); şimdilik flat dizin kullanılıyor.")
+                fallback = {**self.active_config, "type": 'flat'}
+                if min_training_points(fallback) > len(sample):
+                    fallback["encoding"] = 'float32'
+                self.active_config = fallback
+                self.index = self._new_faiss_index()
+            else:
+                start = time.perf_counter()
+                self.index.train(np.asarray(sample, dtype='float32'))
+                print(f"🎯 {self.active_config['type']} dizini {len(sample)} vektörle "
+                      f"{time.perf_counter() - start:.1f} sn'de eğitildi.")
+
+        for ids, vectors in self._pending:
+            self.index.add_with_ids(vectors, ids)
+        self._pending = []
+
+    def _live_vectors(self, ids):
+        """
+        Canlı kimliklerin vektörleri: sıkıştırılmış kodlamalarda diskteki tam vektörlerden,
+        aksi halde dizinin kendisinden geri oluşturulur.
+        """
+        if (self.float_store is not None and self.float_store.capacity >= self.next_id
+                and self.active_config["encoding"] != 'float32'):
+            return self.float_store.get(ids)
+        if uses_native_ids(self.index):
+            faiss.extract_index_ivf(self.index).make_direct_map()
+        return np.vstack([self.index.reconstruct(int(vector_id)) for vector_id in ids]).astype('float32')
+
+    def _rebuild_index(self, config=None):
+        """
+        Dizini yalnızca canlı vektörlerle, aynı kimliklerle yeniden kurar (silinmişler atılır).
+        :param config: Verilirse dizin bu ayarlarla kurulur (eğitim örneği en fazla `train_size` vektördür)
+        """
+        ids = np.array(sorted(self.doc_map), dtype='int64')
+        vectors = self._live_vectors(ids) if len(ids) else None
+        if config is not None:
+            self.active_config = config
+        self.index = self._new_faiss_index()
+        if vectors is not None:
+            if not self.index.is_trained:
+                sample = vectors
+                if len(vectors) > self.active_config["train_size"]:
+                    rows = np.random.default_rng(0).choice(len(vectors), self.active_config["train_size"],
+                                                           replace=False)
+                    sample = vectors[rows]
+                self.index.train(sample)
+            self.index.add_with_ids(vectors, ids)
+        self._lookup, self._lookup_key = None, None
+
+    def _retrain_if_ready(self, threshold):
+        """Geçici flat dizin kullanılıyorsa ve en az `threshold` canlı vektör varsa ayarlanan dizine geçer."""
+        if self.active_config is self.index_config:
+            return
+        if len(self.doc_map) >= max(threshold, min_training_points(self.index_config)):
+            start = time.perf_counter()
+            self._rebuild_index(self.index_config)
+            print(f"🎯 {self.index_config['type']} dizini {len(self.doc_map)} vektörle "
+                  f"{time.perf_counter() - start:.1f} sn'de yeniden kuruldu.")
+
+    def _flush_pending(self):
+        if self.vector_store == 'faiss' and self._pending:
+            self.train()
+
+    def _add_block(self, doc_ids, contents, vectors, metadatas=None):
+        """Bir blok vektörü (varsa pasaj meta verileriyle) depoya tek çağrıda ekler."""
+        with span("index_add", vectors=len(doc_ids), store=self.vector_store):
+            self._write_block(doc_ids, contents, vectors, metadatas or [None] * len(doc_ids))
+
+    def _write_block(self, doc_ids, contents, vectors, metadatas):
+        self._check_writable()
+        self.index_version = uuid.uuid4().hex
+        if self.vector_store == 'faiss':
+            ids = np.arange(self.next_id, self.next_id + len(doc_ids), dtype='int64')
+            vectors = np.asarray(vectors, dtype='float32')
+            for vector_id, doc_id, metadata in zip(ids.tolist(), doc_ids, metadatas):
+                self.doc_map[vector_id] = doc_id
+                fields, article = split_metadata(metadata)
+                if fields:
+                    self.doc_metadata[split_chunk_id(doc_id)[0]] = fields
+                if article is not None:
+                    self.chunk_articles[doc_id] = article
+            self.next_id += len(doc_ids)
+            if self.float_store is not None:
+                self.float_store.put(ids, vectors)
+
+            if self.index.is_trained:
+                self.index.add_with_ids(vectors, ids)
+                self._retrain_if_ready(self.index_config["train_size"])
+            else:
+                # IVF dizinleri eğitim örneği birikene kadar vektörleri bekletir
+                self._pending.append((ids, vectors))
+                if sum(len(p) for p, _ in self._pending) >= self.index_config["train_size"]:
+                    self.train()
+
+        elif self.vector_store == 'chroma':
+            self.collection.upsert(
+                embeddings=np.asarray(vectors).tolist(),
+                ids=list(doc_ids),
+                documents=list(contents),
+                metadatas=[{**{key: value for key, value in (metadata or {}).items() if value is not None},
+                            "doc_id": split_chunk_id(doc_id)[0]}
+                           for doc_id, metadata in zip(doc_ids, metadatas)]
+            )
 
     def add_document(self, doc_id, content):
         """Belgeyi vektörleştirip seçilen depoya ekler."""
         vector = self._embed_text(content)
+        self._add_block([doc_id], [content], np.array([vector]))
 
         if self.vector_store == 'faiss':
-            self.index.add(np.array([vector]))
-            self.doc_map[len(self.doc_map)] = doc_id
             print(f"✅ Belge FAISS deposuna eklendi: {doc_id}")
 
         elif self.vector_store == 'chroma':
-            self.collection.add(
-                embeddings=[vector.tolist()],
-                ids=[doc_id],
-                documents=[content]
-            )
             print(f"✅ Belge ChromaDB deposuna eklendi: {doc_id}")
 
-    def search(self, query, top_k=5):
-        """Sorgu vektörünü arar ve en yakın `top_k` sonuçları döndürür."""
-        query_vector = self._embed_text(query)
+    def remove_documents(self, doc_ids):
+        """
+        Belgelere ait tüm vektörleri (belge düzeyi veya pasaj) depodan siler.
+        Güncellenen belgeler için önce silinip sonra yeniden eklenir.
+        :param doc_ids: Silinecek belge kimlikleri (ör. "kanun.pdf")
+        :return: Silinen vektör sayısı
+        """
+        doc_ids = set(doc_ids)
+        if not doc_ids:
+            return 0
+        self._check_writable()
+        self.index_version = uuid.uuid4().hex
 
         if self.vector_store == 'faiss':
-            distances, indices = self.index.search(np.array([query_vector]), top_k)
-            results = [(self.doc_map[i], d) for i, d in zip(indices[0], distances[0])]
-            print(f"🔍 FAISS sonuçları: {results}")
-            return results
+            self._flush_pending()
+            stale = [vector_id for vector_id, chunk_id in self.doc_map.items()
+                     if split_chunk_id(chunk_id)[0] in doc_ids]
+            if stale:
+                # HNSW silmeyi desteklemez; eşlemeden çıkarılan vektörler aramada atlanır
+                if supports_remove(self.index):
+                    self.index.remove_ids(np.array(stale, dtype='int64'))
+                for vector_id in stale:
+                    self.chunk_articles.pop(self.doc_map.pop(vector_id), None)
+                # Aramalar silinmişler kadar fazla aday istediğinden birikmeleri sınırlanır
+                tombstones = self.index.ntotal - len(self.doc_map)
+                if tombstones > self.index_config["compact_ratio"] * self.index.ntotal:
+                    self._rebuild_index()
+                    print(f"🧹 {tombstones} silinmiş vektör dizinden atıldı (dizin yeniden kuruldu).")
+            for doc_id in doc_ids:
+                self.doc_metadata.pop(doc_id, None)
+            removed = len(stale)
 
         elif self.vector_store == 'chroma':
+            removed = 0
+            for doc_id in doc_ids:
+                stale = self.collection.get(where={"doc_id": doc_id})["ids"]
+                if stale:
+                    self.collection.delete(ids=stale)
+                removed += len(stale)
+
+        print(f"🗑️ {len(doc_ids)} belgeye ait vektörler silindi.")
+        return removed
+
+    def _chunk_lookup(self):
+        """
+        Vektör ID'sinden chunk_id'ye giden dizi; silinmiş kimlikler None'dır.
+        Toplu aramada sonuç matrisi tek bir indekslemeyle kimliklere çevrilir.
+        """
+        key = (self.index_version, len(self.doc_map), self.next_id)
+        if self._lookup_key != key:
+            lookup = np.full(self.next_id, None, dtype=object)
+            if self.doc_map:
+                ids = np.fromiter(self.doc_map.keys(), dtype='int64', count=len(self.doc_map))
+                lookup[ids] = np.array(list(self.doc_map.values()), dtype=object)
+            self._lookup, self._lookup_key = lookup, key
+        return self._lookup
+
+    def _reset_filter_cache(self):
+        self._columns, self._columns_key = None, None
+        self._selections = {}
+
+    def _filter_columns(self):
+        """
+        Filtre değerlendirmesi için vektör kimlikleri, belge kodları ve madde numaraları (eksikse -1).
+        Dizin değişene kadar önbellekte tutulur; mmap modunda SQLite deposundan okunur.
+        """
+        key = (self.index_version, len(self.doc_map), self.next_id)
+        if self._columns_key != key:
+            if isinstance(self.doc_map, MetadataMap):
+                rows = self.doc_map.store.filter_columns()
+            else:
+                rows = [(vector_id, split_chunk_id(chunk_id)[0], self.chunk_articles.get(chunk_id))
+                        for vector_id, chunk_id in self.doc_map.items()]
+            ids = np.array([row[0] for row in rows], dtype='int64')
+            documents, doc_codes = np.unique(np.array([row[1] for row in rows], dtype=object),
+                                             return_inverse=True)
+            articles = np.array([-1 if row[2] is None else row[2] for row in rows], dtype='int64')
+            self._columns, self._columns_key = (ids, documents, doc_codes, articles), key
+            self._selections = {}
+        return self._columns
+
+    def _selection(self, filters):
+        """
+        Normalize edilmiş filtreye uyan vektörler için (seçici, bit eşlem, izin maskesi, uyan sayısı).
+        Koşullar belge ve madde başına bir kez değerlendirilip vektörlere dizi indekslemesiyle yayılır.
+        """
+        ids, documents, doc_codes, articles = self._filter_columns()
+        key = filter_key(filters)
+        selection = self._selections.get(key)
+        if selection is None:
+            allowed = np.ones(len(ids), dtype=bool)
+            if any(field in DOCUMENT_FIELDS for field in filters):
+                document_ok = np.array([matches(self.doc_metadata.get(doc_id, {}), filters, fields=DOCUMENT_FIELDS)
+                                        for doc_id in documents], dtype=bool)
+                allowed &= document_ok[doc_codes]
+            if any(field in CHUNK_FIELDS for field in filters):
+                values, article_codes = np.unique(articles, return_inverse=True)
+                article_ok = np.array([matches({"article": None if value < 0 else int(value)}, filters,
+                                               fields=CHUNK_FIELDS) for value in values.tolist()], dtype=bool)
+                allowed &= article_ok[article_codes]
+            mask = np.zeros(self.next_id, dtype=bool)
+            mask[ids[allowed]] = True
+            count = int(allowed.sum())
+            # Bit eşlem dizisi, onu gösteren seçici kullanıldığı sürece bellekte tutulmalıdır
+            bitmap = np.packbits(mask, bitorder='little')
+            selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap)) if count else None
+            selection = (selector, bitmap, mask, count)
+            if len(self._selections) >= MAX_CACHED_FILTERS:
+                self._selections.pop(next(iter(self._selections)))
+            self._selections[key] = selection
+        return selection
+
+    def filter_chunk_ids(self, chunk_ids, filters):
+        """
+        Pasaj kimliklerinden filtreye uyanları (sırası korunarak) döndürür; dizin dışındaki
+        aday listeleri (ör. BM25 sonuçları) için.
+        """
+        filters = normalize_filters(filters)
+        chunk_ids = list(chunk_ids)
+        if not filters or not chunk_ids:
+            return chunk_ids
+        if self.vector_store == 'chroma':
+            allowed = set(self.collection.get(ids=chunk_ids, where=to_chroma_where(filters))["ids"])
+            return [chunk_id for chunk_id in chunk_ids if chunk_id in allowed]
+        if isinstance(self.doc_map, MetadataMap):
+            articles = self.doc_map.store.chunk_articles(chunk_ids)
+        else:
+            articles = self.chunk_articles
+        return [chunk_id for chunk_id in chunk_ids
+                if matches({**self.doc_metadata.get(split_chunk_id(chunk_id)[0], {}),
+                            "article": articles.get(chunk_id)}, filters)]
+
+    def search_many(self, queries, top_k=5, query_vectors=None, filters=None):
+        """
+        Birden çok sorguyu tek kodlayıcı geçişi ve tek dizin çağrısıyla arar.
+        :param queries: Sorgu metinleri
+        :param query_vectors: Önceden hesaplanmışsa (n, dim) sorgu matrisi (kodlayıcı çalışmaz)
+        :param filters: Meta veri filtreleri, ör. {"doc_type": "kanun", "year": {"$gte": 2015}}
+                        (bkz. `metadata.normalize_filters`); dizin aramasının içinde uygulanır
+        :return: Her sorgu için [(chunk_id, distance), ...] listesi (girdi sırasıyla)
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        filters = normalize_filters(filters)
+        if query_vectors is None:
+            query_vectors = self.embed_queries(queries)
+        query_vectors = np.asarray(query_vectors, dtype='float32').reshape(len(queries), -1)
+        with span("search", queries=len(queries), top_k=top_k, store=self.vector_store, filtered=bool(filters)):
+            return self._search_vectors(queries, query_vectors, top_k, filters)
+
+    def _search_vectors(self, queries, query_vectors, top_k, filters=None):
+
+        if self.vector_store == 'faiss':
+            self._flush_pending()
+            if not self.doc_map:
+                return [[] for _ in queries]
+            params, allowed = None, None
+            if filters:
+                selector, _, allowed, count = self._selection(filters)
+                if count == 0:
+                    return [[] for _ in queries]
+                params = filtered_search_params(self.index, self.index_config, selector)
+            rescore = self.float_store is not None and self.float_store.capacity > 0
+            fetch = top_k * self.index_config["rescore_factor"] if rescore else top_k
+            # Silinmiş ama dizinde kalmış (HNSW) vektörler kadar fazladan aday istenir
+            tombstones = self.index.ntotal - len(self.doc_map)
+            k = min(fetch + tombstones, self.index.ntotal) or fetch
+            if filters and params is None:
+                # Seçici desteklemeyen dizinde (IndexPQ) uyan oranı kadar fazla aday alınıp süzülür
+                k = min(k * -(-len(self.doc_map) // count), self.index.ntotal)
+            distances, indices = self.index.search(query_vectors, k, params=params)
+            if rescore:
+                # Nicemlenmiş uzaklıklar yerine diskteki vektörlerle kesin L2 uzaklığına göre sıralanır
+                with span("rescore", candidates=int(indices.size)):
+                    distances = self.float_store.rescore(query_vectors, indices)
+                    order = np.argsort(distances, axis=1, kind='stable')
+                    indices = np.take_along_axis(indices, order, axis=1)
+                    distances = np.take_along_axis(distances, order, axis=1)
+
+            if isinstance(self.doc_map, MetadataMap):
+                names = self.doc_map.resolve(indices)
+            else:
+                names = self._chunk_lookup()[np.where(indices >= 0, indices, 0)]
+            valid = (indices >= 0) & np.not_equal(names, None)
+            if allowed is not None:
+                valid &= allowed[np.where(indices >= 0, indices, 0)]
+            # Geçerli sonuçlar, sıraları korunarak her satırın başına toplanır
+            order = np.argsort(~valid, axis=1, kind='stable')[:, :top_k]
+            names = np.take_along_axis(names, order, axis=1).tolist()
+            distances = np.take_along_axis(distances, order, axis=1).tolist()
+            counts = np.minimum(valid.sum(axis=1), top_k).tolist()
+            return [list(zip(row_names[:count], row_distances[:count]))
+                    for row_names, row_distances, count in zip(names, distances, counts)]
+
+        elif self.vector_store == 'chroma':
+            where = to_chroma_where(filters) if filters else None
             results = self.collection.query(
-                query_embeddings=[query_vector.tolist()],
-                n_results=top_k
+                query_embeddings=query_vectors.tolist(),
+                n_results=top_k,
+                **({"where": where} if where else {})
             )
-            matches = list(zip(results["ids"], results["distances"]))
-            print(f"🔍 ChromaDB sonuçları: {matches}")
-            return matches
+            return [list(zip(ids, distances))
+                    for ids, distances in zip(results["ids"], results["distances"])]
 
-    def persist(self):
-        """FAISS veya Chroma deposunu kaydeder."""
+    def search(self, query, top_k=5, query_vector=None, filters=None):
+        """
+        Sorgu vektörünü arar ve en yakın `top_k` sonuçları döndürür.
+        :param query_vector: Önceden hesaplanmışsa sorgu vektörü (kodlayıcı tekrar çalışmaz)
+        :param filters: Meta veri filtreleri (bkz. `search_many`)
+        """
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+
+        results = self.search_many([query], top_k=top_k, query_vectors=[query_vector], filters=filters)[0]
+        store = "FAISS" if self.vector_store == 'faiss' else "ChromaDB"
+        print(f"🔍 {store} sonuçları: {results}")
+        return results
+
+    def _write_snapshot(self, directory, side_files=None):
+        faiss.write_index(self.index, os.path.join(directory, INDEX_FILE))
+        MetadataStore.write(os.path.join(directory, METADATA_FILE), self.doc_map,
+                            meta={"next_id": self.next_id}, articles=self.chunk_articles,
+                            documents=self.doc_metadata)
+        if self.float_store is not None and os.path.exists(self.float_store.path):
+            # Yayımlanan dosya bir daha yazılmaz (yazıcı sonraki eklemelerde kendi kopyasına geçer,
+            # bkz. `_adopt_float_store`); bu yüzden kopyalanmadan sabit bağlantıyla paylaşılır
+            target = os.path.join(directory, os.path.basename(FLOAT_STORE_FILE))
+            try:
+                os.link(self.float_store.path, target)
+            except OSError:
+                shutil.copyfile(self.float_store.path, target)
+        for name, write in (side_files or {}).items():
+            write(os.path.join(directory, name))
+
+    def persist(self, side_files=None):
+        """
+        FAISS veya Chroma deposunu kaydeder.
+        FAISS dizini, meta veri deposu, tam vektörler ve verilen yan dosyalar manifestoyla birlikte
+        sürümlü bir anlık görüntü olarak atomik biçimde yayımlanır (bkz. `snapshot.publish_snapshot`).
+        :param side_files: {dosya adı: yola yazan fonksiyon}; FAISS'te anlık görüntüye yazılır
+                           (ör. BM25 dizini, pasaj deposu, alım manifestosu)
+        """
         if self.vector_store == 'faiss':
-            faiss.write_index(self.index, "models/embeddings/faiss_index.bin")
-            with open("models/embeddings/faiss_map.txt", 'w') as f:
-                for idx, doc_id in self.doc_map.items():
-                    f.write(f"{idx},{doc_id}\n")
-            print("💾 FAISS deposu kaydedildi.")
+            if self.read_only:
+                print("ℹ️ Salt okunur dizin değiştirilemez; kayıt atlandı.")
+                return
+            self._flush_pending()
+            self._retrain_if_ready(0)
+            if side_files and os.path.exists(snapshot_path(self.index_version, self.root)):
+                # Vektörler değişmeden yan dosyalar değişti (ör. BM25 yeniden kuruldu, manifesto tazelendi);
+                # yayımlanmış görüntü yerinde değiştirilmez, yan dosyalar yeni bir sürümle yayımlanır
+                self.index_version = uuid.uuid4().hex
+            if self.float_store is not None:
+                self.float_store.flush()
+            directory = publish_snapshot(self.index_version,
+                                         lambda staging: self._write_snapshot(staging, side_files),
+                                         root=self.root, manifest={
+                "vectors": len(self.doc_map),
+                "next_id": self.next_id,
+                "embedding_dim": self.embedding_dim,
+                "index_type": self.active_config["type"],
+                "encoding": self.active_config["encoding"],
+            })
+            self.snapshot_dir = directory
+            self._adopt_float_store(directory)
+            print(f"💾 FAISS deposu kaydedildi (anlık görüntü {self.index_version}).")
 
         elif self.vector_store == 'chroma':
+            if side_files:
+                raise ValueError("❌ ChromaDB anlık görüntü tutmaz; yan dosyalar kendi yollarına yazılmalı.")
             print("💾 ChromaDB deposu zaten anlık olarak kaydediliyor.")
 
-    def load(self):
-        """FAISS veya Chroma deposunu yükler."""
+    def _adopt_float_store(self, directory):
+        """
+        Yayımlanan tam vektör dosyası yazıcıda paylaşılan (değişmez) dosya olarak açılır; sonraki
+        eklemeler önce çalışma dosyasına kopyalanır, anlık görüntüdeki dosya yerinde değiştirilmez.
+        Aynı dosyaya bağlı çalışma dosyası silinir.
+        """
+        published = os.path.join(directory, os.path.basename(FLOAT_STORE_FILE))
+        if self.float_store is None or not os.path.exists(published):
+            return
+        working = self._float_store_path()
+        if os.path.exists(working) and os.path.samefile(working, published):
+            os.remove(working)
+        self.float_store = FloatVectorStore(self.embedding_dim, path=published, working_path=working)
+
+    def _load_legacy(self):
+        """Anlık görüntülerden önceki `faiss_index.bin` + `faiss_map.txt` düzenini yükler."""
+        self.index = unwrap_native_ids(faiss.read_index(os.path.join(self.root, "faiss_index.bin")))
+        self.doc_map = {}
+        with open(os.path.join(self.root, "faiss_map.txt"), 'r') as f:
+            for line in f:
+                idx, doc_id = line.rstrip("\n").split(',', 1)
+                self.doc_map[int(idx)] = doc_id
+        self.next_id = max(self.doc_map, default=-1) + 1
+        self.doc_metadata, self.chunk_articles = {}, {}
+        version_path = os.path.join(self.root, "faiss_version.txt")
+        if os.path.exists(version_path):
+            with open(version_path, 'r') as f:
+                self.index_version = f.read().strip()
+
+    def published_version(self):
+        """Diskte yayımlanmış anlık görüntünün sürümü (yüklü sürümden farklıysa yeniden yüklenmeli)."""
+        return current_version(self.root) if self.vector_store == 'faiss' else None
+
+    def load(self, mmap=False):
+        """
+        FAISS veya Chroma deposunu yükler.
+        :param mmap: True ise anlık görüntü salt okunur, bellek eşlemeli yüklenir: dizin kodları,
+                     meta veri ve tam vektörler RAM'e kopyalanmaz; aynı makinedeki sunum süreçleri
+                     işletim sisteminin sayfa önbelleğini paylaşır. Bu dizine ekleme/silme yapılamaz.
+        :return: Kayıtlı bir depo yüklendiyse (Chroma'da koleksiyon boş değilse) True
+        """
         if self.vector_store == 'faiss':
-            self.index = faiss.read_index("models/embeddings/faiss_index.bin")
-            with open("models/embeddings/faiss_map.txt", 'r') as f:
-                for line in f:
-                    idx, doc_id = line.strip().split(',')
-                    self.doc_map[int(idx)] = doc_id
-            print("✅ FAISS deposu yüklendi.")
+            start = time.perf_counter()
+            snapshot = current_snapshot(self.root)
+            self.read_only = False
+            self.snapshot_dir = None
+            float_path = self._float_store_path()
+            if snapshot is not None:
+                directory, manifest = snapshot
+                self.snapshot_dir = directory
+                published = os.path.join(directory, os.path.basename(FLOAT_STORE_FILE))
+                if os.path.exists(published):
+                    float_path = published
+                index_path = os.path.join(directory, INDEX_FILE)
+                store = MetadataStore(os.path.join(directory, METADATA_FILE))
+                # Silinmiş kimlikler yeniden kullanılmaz (HNSW'de dizinde kalmaya devam ederler)
+                self.next_id = store.get_meta("next_id")
+                self.doc_metadata = store.read_documents()
+                if mmap:
+                    # Madde numaraları da diğer pasaj kayıtları gibi istendikçe depodan okunur
+                    self.index = faiss.read_index(index_path, mmap_read_flags(manifest["index_type"]))
+                    self.doc_map = MetadataMap(store)
+                    self.chunk_articles = {}
+                    self.read_only = True
+                else:
+                    self.index = unwrap_native_ids(faiss.read_index(index_path))
+                    self.doc_map = store.read_map()
+                    self.chunk_articles = store.read_articles()
+                    store.close()
+                if self.next_id is None:
+                    self.next_id = max(self.doc_map, default=-1) + 1
+                self.index_version = manifest["version"]
+                active = {**self.index_config, "type": manifest["index_type"],
+                          "encoding": manifest.get("encoding", self.index_config["encoding"])}
+                self.active_config = self.index_config if active == self.index_config else active
+            elif os.path.exists(os.path.join(self.root, "faiss_index.bin")):
+                if mmap:
+                    print("⚠️ Eski kayıt düzeni bellek eşlemeli yüklenemez; tamamı belleğe okunuyor.")
+                self._load_legacy()
+                self.active_config = self.index_config
+            else:
+                print("⚠️ Kayıtlı FAISS deposu bulunamadı, boş dizinle devam ediliyor.")
+                return False
+            apply_search_params(self.index, self.active_config)
+            self._pending = []
+            self._lookup, self._lookup_key = None, None
+            self._reset_filter_cache()
+            if self.index_config["rescore_factor"] > 0:
+                self.float_store = FloatVectorStore(self.embedding_dim, path=float_path, read_only=self.read_only,
+                                                    working_path=None if self.read_only else self._float_store_path())
+                if self.float_store.capacity < self.next_id:
+                    print("⚠️ Yeniden skorlama için tam vektörler eksik, yeniden skorlama kapatıldı.")
+                    self.float_store = None
+            mode = "salt okunur, mmap" if self.read_only else "bellekte"
+            print(f"✅ FAISS deposu yüklendi ({len(self.doc_map)} vektör, {mode}, "
+                  f"{time.perf_counter() - start:.2f} sn).")
+            return True
 
         elif self.vector_store == 'chroma':
-            print("✅ ChromaDB deposu anlık yükleniyor, manuel yükleme gerekmez.")
+            # Koleksiyon kalıcıdır; boşsa alım hattı manifestoya güvenmeyip her şeyi yeniden işler
+            count = self.collection.count()
+            if not count:
+                print("⚠️ ChromaDB koleksiyonu boş.")
+                return False
+            print(f"✅ ChromaDB deposu yüklendi ({count} vektör).")
+            return True
 
 # Kullanım
 if __name__ == "__main__":
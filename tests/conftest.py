@@ -0,0 +1,35 @@
+import os
+import sys
+import zlib
+import numpy as np
+import pytest
+
+# Kaynak modüller birbirini `from vectorizer import ...` biçiminde içe aktarır
+# (`streamlit run src/app.py` ile uyumlu); testlerde de src/ yolda olmalıdır.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+class RandomModel:
+    """Metin başına sabit, rastgele vektör üreten model; aynı metin en yakın komşu olarak kendini bulur."""
+
+    dimension = 32
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _vector(self, text):
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        return rng.standard_normal(self.dimension).astype('float32')
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        if not texts:
+            return np.zeros((0, self.dimension), 'float32')
+        return np.vstack([self._vector(text) for text in texts])
+
+
+@pytest.fixture
+def random_model():
+    """Gerçek gömme modeli yüklemeden FAISS dizinini sınamak için hafif model."""
+    return RandomModel()
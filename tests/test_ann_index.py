@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import faiss
+from src.ann_index import evaluate_index, resolve_index_config, compression_report, unwrap_native_ids
+
+def test_evaluate_index_reports_recall_and_latency():
+    """HNSW ölçümü, flat referansa karşı recall@k ve p50/p99 gecikme döndürmeli."""
+    rng = np.random.default_rng(0)
+    vectors = rng.random((500, 16), dtype='float32')
+    rows = evaluate_index(vectors, vectors[:20], {"type": "hnsw"}, k=5, sweep=[16, 64])
+
+    assert [row["type"] for row in rows] == ["flat", "hnsw", "hnsw"]
+    assert rows[-1]["recall@5"] > 0.9
+    assert all(row["p99_ms"] >= row["p50_ms"] for row in rows)
+
+def test_invalid_index_type():
+    with pytest.raises(ValueError):
+        resolve_index_config({"type": "lsh"})
+
+def test_compression_report_trades_memory_for_recall():
+    """Sıkıştırılmış kodlamalar daha az bellek kullanmalı; yeniden skorlama recall'ü geri kazandırmalı."""
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((32, 32)).astype('float32')
+    vectors = centers[rng.integers(0, 32, 2000)] + 0.3 * rng.standard_normal((2000, 32)).astype('float32')
+    rows = {row["encoding"]: row for row in
+            compression_report(vectors, vectors[:50], {"pq_m": 4}, k=5, rescore_factor=8)}
+
+    assert rows["fp16"]["bytes_per_vector"] < rows["float32"]["bytes_per_vector"] / 1.9
+    assert rows["sq8"]["memory_saved"] > 0.7
+    assert rows["pq"]["memory_saved"] > rows["sq8"]["memory_saved"]
+    assert rows["pq"]["recall@5_rescored"] >= rows["pq"]["recall@5"]
+
+def test_invalid_encoding():
+    with pytest.raises(ValueError):
+        resolve_index_config({"encoding": "int4"})
+
+def test_unwrap_native_ids_converts_legacy_ivf():
+    """IndexIDMap2 ile sarmalanmış eski IVF dizini, dış kimlikleri ters listelerde saklayan dizine çevrilmeli."""
+    rng = np.random.default_rng(0)
+    vectors = rng.random((200, 16), dtype='float32')
+    wrapped = faiss.IndexIDMap2(faiss.IndexIVFFlat(faiss.IndexFlatL2(16), 16, 4))
+    wrapped.train(vectors)
+    wrapped.add_with_ids(vectors, np.arange(1000, 1200))
+
+    index = unwrap_native_ids(wrapped)
+    assert isinstance(index, faiss.IndexIVFFlat)
+    index.nprobe = 4
+    index.remove_ids(np.array([1000, 1003], dtype='int64'))
+    _, found = index.search(vectors[[1, 2, 199]], 1)
+    assert found.ravel().tolist() == [1001, 1002, 1199]
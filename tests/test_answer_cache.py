@@ -0,0 +1,40 @@
+import numpy as np
+from src.answer_cache import SemanticAnswerCache
+
+def test_similar_query_hits_same_documents():
+    """Benzer sorgu, aynı pasajlar ve aynı dizin sürümüyle önbellekten yanıtlanmalı."""
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    cache.store(np.array([1.0, 0.0, 0.1]), ["kanun.pdf#0-100"], "v1", "İhbar süresi iki haftadır.")
+
+    assert cache.lookup(np.array([0.98, 0.0, 0.12]), ["kanun.pdf#0-100"], "v1") == "İhbar süresi iki haftadır."
+    assert cache.lookup(np.array([0.0, 1.0, 0.0]), ["kanun.pdf#0-100"], "v1") is None
+    assert cache.lookup(np.array([1.0, 0.0, 0.1]), ["baska.pdf#0-50"], "v1") is None
+
+def test_index_change_invalidates():
+    """Yeni dizin sürümü eski kayıtlara isabet etmemeli."""
+    cache = SemanticAnswerCache()
+    cache.store(np.ones(3), ["a#0-1"], "v1", "Yanıt")
+
+    assert cache.lookup(np.ones(3), ["a#0-1"], "v2") is None
+
+def test_switching_vector_stores_keeps_both_caches():
+    """FAISS ile Chroma arasında geçiş, iki deponun yanıtlarını da silmemeli ve karıştırmamalı."""
+    cache = SemanticAnswerCache()
+    cache.store(np.ones(3), ["a#0-1"], "faiss-v1", "FAISS yanıtı", vector_store="faiss")
+    cache.store(np.ones(3), ["a#0-1"], "chroma-v1", "Chroma yanıtı", vector_store="chroma")
+
+    assert cache.lookup(np.ones(3), ["a#0-1"], "faiss-v1", vector_store="faiss") == "FAISS yanıtı"
+    assert cache.lookup(np.ones(3), ["a#0-1"], "chroma-v1", vector_store="chroma") == "Chroma yanıtı"
+    assert cache.lookup(np.ones(3), ["a#0-1"], "faiss-v1", vector_store="chroma") is None
+    assert cache.stats()["entries"] == 2
+
+def test_lru_and_ttl_eviction():
+    """Kapasite aşılınca en eski kayıt, TTL dolunca süresi geçen kayıt atılmalı."""
+    cache = SemanticAnswerCache(max_entries=1)
+    cache.store(np.ones(3), ["a#0-1"], "v1", "Eski")
+    cache.store(np.ones(3), ["b#0-1"], "v1", "Yeni")
+    assert cache.lookup(np.ones(3), ["a#0-1"], "v1") is None
+
+    expired = SemanticAnswerCache(ttl_seconds=0)
+    expired.store(np.ones(3), ["a#0-1"], "v1", "Yanıt")
+    assert expired.lookup(np.ones(3), ["a#0-1"], "v1") is None
@@ -30,7 +30,7 @@ def test_document_retrieval():
 
 def test_answer_generation(mocker):
     """Groq LLM yanıt üretimi testi."""
-    mocker.patch("requests.post", return_value=mocker.Mock(status_code=200, json=lambda: {
+    mocker.patch("requests.Session.post", return_value=mocker.Mock(status_code=200, json=lambda: {
         "response": "Hukuki süreçler mahkemelerde yürütülür."
     }))
     generator = AnswerGenerator()
@@ -0,0 +1,40 @@
+import os
+import time
+import numpy as np
+from benchmarks.synthetic_corpus import generate_corpus
+from benchmarks.run_benchmarks import bench_query, compare_results
+
+def test_synthetic_corpus_is_reproducible(tmp_path):
+    """Aynı tohum aynı belgeleri ve bilinen yanıtları üretmeli."""
+    first = generate_corpus(str(tmp_path / "a"), n_documents=5, formats=("txt",), seed=7)
+    second = generate_corpus(str(tmp_path / "b"), n_documents=5, formats=("txt",), seed=7)
+
+    assert first == second
+    assert len(first) == 5
+    with open(os.path.join(tmp_path, "a", first[0]["doc_id"]), encoding="utf-8") as f:
+        assert f"MADDE {first[0]['article']} -" in f.read()
+
+def test_compare_results_flags_regressions():
+    """Toleransı aşan kötüleşmeler gerileme olarak raporlanmalı."""
+    baseline = {"stages": {"query": {"p95_ms": 10.0}, "recall": {"dense_recall_at_k": 0.9}}}
+    current = {"stages": {"query": {"p95_ms": 10.5}, "recall": {"dense_recall_at_k": 0.7}}}
+
+    assert compare_results(current, baseline, tolerance=0.1) == [("recall", "dense_recall_at_k", 0.9, 0.7)]
+
+class SlowEncoder:
+    """Kodlaması aramadan belirgin biçimde yavaş olan vektörleştirici."""
+
+    def embed_queries(self, queries):
+        time.sleep(0.01)
+        return np.ones((len(queries), 2), dtype='float32')
+
+    def search_many(self, queries, top_k=5, query_vectors=None):
+        return [[] for _ in queries]
+
+def test_query_latency_includes_encoding():
+    """Sorgu gecikmesi kodlamayı da kapsamalı; parçalar ayrı metrikler olarak raporlanmalı."""
+    stats = bench_query(SlowEncoder(), ["kira", "ihbar"], top_k=1)
+
+    assert stats["encode_p50_ms"] >= 10
+    assert stats["p50_ms"] >= stats["encode_p50_ms"] + stats["search_p50_ms"] - 1e-6
+    assert stats["search_p50_ms"] < stats["encode_p50_ms"]
@@ -0,0 +1,33 @@
+import pytest
+from src.chunker import DocumentChunker, split_chunk_id
+
+@pytest.fixture
+def sample_law():
+    return (
+        "TÜRK BORÇLAR KANUNU\n"
+        "MADDE 1 - (1) Sözleşme, tarafların iradelerini karşılıklı ve birbirine uygun olarak "
+        "açıklamalarıyla kurulur.\n(2) İrade açıklaması, açık veya örtülü olabilir.\n"
+        "MADDE 2 - (1) Taraflar esaslı noktalarda uyuşmuşlarsa, ikinci derecedeki noktalar "
+        "üzerinde durulmamış olsa bile, sözleşme kurulmuş sayılır.\n"
+        "(2) İkinci derecedeki noktalarda uyuşulamazsa hâkim, bunları işin özelliğine "
+        "bakarak karara bağlar.\n"
+    )
+
+def test_chunks_follow_articles(sample_law):
+    """Her madde ayrı pasaj olmalı ve ofsetler metinle birebir eşleşmeli."""
+    chunker = DocumentChunker(max_chars=400, overlap=50, min_chars=50)
+    chunks = chunker.chunk_text("borclar.txt", sample_law)
+
+    assert [c.article for c in chunks] == ["1", "2"]
+    for chunk in chunks:
+        assert sample_law[chunk.start:chunk.end] == chunk.text
+        assert split_chunk_id(chunk.chunk_id) == ("borclar.txt", chunk.start, chunk.end)
+
+def test_long_article_split_with_overlap(sample_law):
+    """Sığmayan madde fıkralardan bölünmeli ve pasajlar örtüşmeli."""
+    chunker = DocumentChunker(max_chars=160, overlap=30, min_chars=50)
+    chunks = [c for c in chunker.chunk_text("borclar.txt", sample_law) if c.article == "2"]
+
+    assert len(chunks) > 1
+    assert all(len(c.text) <= 160 for c in chunks)
+    assert chunks[1].start < chunks[0].end
@@ -0,0 +1,36 @@
+from src.context_packer import ContextPacker, ApproximateTokenizer
+
+TEXT = ("MADDE 1 - Sözleşme, tarafların iradelerini karşılıklı ve birbirine uygun olarak açıklamalarıyla kurulur. "
+        "İrade açıklaması, açık veya örtülü olabilir. "
+        "MADDE 2 - Taraflar, sözleşmenin esaslı noktalarında uyuşmuşlarsa, ikinci derecedeki noktalar "
+        "üzerinde durulmamış olsa bile sözleşme kurulmuş sayılır.")
+
+def _passage(start, end, score=1.0):
+    return (f"tbk.txt#{start}-{end}", TEXT[start:end], score)
+
+def test_overlapping_passages_are_merged_and_duplicates_dropped():
+    """Aynı belgenin örtüşen pasajları tek kaynakta birleşmeli; aynı metin iki kez yer almamalı."""
+    documents = [_passage(60, 160), _passage(0, 100), ("kopya.txt", TEXT[0:100], 0.5)]
+    packed = ContextPacker(token_budget=1000).pack("sözleşme", documents)
+
+    assert [p.source for p in packed] == ["tbk.txt#0-160"]
+    assert packed[0].text == TEXT[0:160]
+
+def test_budget_is_respected_and_relevant_sentences_kept():
+    """Bütçeyi aşan pasajdan soruyla ilgili cümle seçilmeli; toplam token bütçeyi geçmemeli."""
+    packer = ContextPacker(token_budget=50, min_passage_tokens=8)
+    packed = packer.pack("esaslı noktalarda uyuşma", [_passage(0, len(TEXT)), ("diger.txt", "Başka bir metin.", 0.1)])
+    tokenizer = ApproximateTokenizer()
+
+    assert len(packed) == 1 and packed[0].trimmed
+    assert "esaslı noktalarında" in packed[0].text
+    assert "İrade açıklaması" not in packed[0].text
+    assert tokenizer.count(packer.render(packed)) <= 50
+
+def test_ranking_order_and_citations_preserved():
+    """Pasajlar getirici sırasıyla ve numaralı kaynak etiketleriyle yer almalı."""
+    documents = [("b.txt#0-5", "İkinci", 0.9), ("a.txt#0-5", "Birinc", 0.8)]
+    packer = ContextPacker()
+    rendered = packer.render(packer.pack("soru", documents))
+
+    assert rendered.index("[1] Kaynak: b.txt#0-5") < rendered.index("[2] Kaynak: a.txt#0-5")
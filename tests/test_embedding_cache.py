@@ -0,0 +1,43 @@
+import numpy as np
+from src.embedding_cache import EmbeddingCache
+
+def test_cache_roundtrip_and_persistence(tmpdir):
+    """Önbelleğe yazılan vektör, normalleştirilmiş metinle ve yeniden açılışta bulunmalı."""
+    cache = EmbeddingCache("test-model", 4, cache_dir=str(tmpdir), max_entries=8)
+    cache.put("Hukuki  süreç", np.arange(4, dtype='float32'))
+    cache.flush()
+
+    reopened = EmbeddingCache("test-model", 4, cache_dir=str(tmpdir), max_entries=8)
+    assert np.array_equal(reopened.get("Hukuki süreç"), np.arange(4, dtype='float32'))
+    assert reopened.get("Başka metin") is None
+    assert reopened.stats()["hits"] == 1
+    assert reopened.stats()["misses"] == 1
+
+def test_cache_evicts_least_recently_used(tmpdir):
+    """Kapasite aşıldığında en uzun süredir kullanılmayan kayıt boşaltılmalı."""
+    cache = EmbeddingCache("test-model", 2, cache_dir=str(tmpdir), max_entries=2)
+    cache.put("a", np.zeros(2))
+    cache.put("b", np.ones(2))
+    cache.get("a")
+    cache.put("c", np.ones(2))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["entries"] == 2
+
+def test_instances_sharing_files_do_not_collide(tmpdir):
+    """Aynı dosyaları açan iki örnek farklı metinleri aynı slota yazmamalı ve birbirinin kayıtlarını görmeli."""
+    first = EmbeddingCache("test-model", 2, cache_dir=str(tmpdir), max_entries=4)
+    second = EmbeddingCache("test-model", 2, cache_dir=str(tmpdir), max_entries=4)
+    first.put("kira", np.zeros(2))
+    second.put("kanun", np.ones(2))
+    first.put_many(["madde", "dava"], [np.full(2, 2.0), np.full(2, 3.0)])
+
+    assert np.array_equal(second.get("kira"), np.zeros(2))
+    assert np.array_equal(first.get("kanun"), np.ones(2))
+    assert np.array_equal(second.get("dava"), np.full(2, 3.0))
+    assert first.stats()["entries"] == second.stats()["entries"] == 4
+
+    second.put("tahliye", np.full(2, 4.0))
+    assert np.array_equal(first.get("tahliye"), np.full(2, 4.0))
+    assert first.stats()["entries"] == 4
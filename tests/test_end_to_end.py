@@ -34,7 +34,7 @@ def test_end_to_end_workflow(tmpdir):
 
     # 4️⃣ Generate Answer
     mocker = pytest.importorskip("pytest_mock")
-    mocker.patch("requests.post", return_value=mocker.Mock(status_code=200, json=lambda: {
+    mocker.patch("requests.Session.post", return_value=mocker.Mock(status_code=200, json=lambda: {
         "response": "Hukuki süreçler mahkemelerde yürütülür."
     }))
     
@@ -0,0 +1,37 @@
+import numpy as np
+from src.float_store import FloatVectorStore
+
+def test_put_grows_and_rescore_is_exact(tmp_path):
+    """Depo kimlik büyüdükçe genişlemeli; yeniden skorlama float16 hassasiyetinde kesin L2 vermeli."""
+    rng = np.random.default_rng(0)
+    vectors = rng.random((1500, 8), dtype='float32')
+    store = FloatVectorStore(8, path=str(tmp_path / "vectors.f16"))
+    store.put(np.arange(1000), vectors[:1000])
+    store.put(np.arange(1000, 1500), vectors[1000:])
+    store.flush()
+
+    reopened = FloatVectorStore(8, path=str(tmp_path / "vectors.f16"))
+    assert reopened.capacity >= 1500
+    np.testing.assert_allclose(reopened.get([3, 1499]), vectors[[3, 1499]], atol=1e-3)
+
+    candidates = np.array([[5, 7, -1]])
+    distances = reopened.rescore(vectors[5][None, :], candidates)
+    assert distances[0, 0] < 1e-5
+    np.testing.assert_allclose(distances[0, 1], ((vectors[7] - vectors[5]) ** 2).sum(), rtol=1e-2)
+    assert np.isinf(distances[0, 2])
+
+def test_shared_file_is_copied_on_write(tmp_path):
+    """Paylaşılan (yayımlanmış) dosya yerinde değişmemeli; ilk yazma çalışma dosyasına kopyalanmalı."""
+    vectors = np.random.default_rng(1).random((20, 8), dtype='float32')
+    published = str(tmp_path / "published.f16")
+    FloatVectorStore(8, path=published).put(np.arange(10), vectors[:10])
+    original = open(published, 'rb').read()
+
+    store = FloatVectorStore(8, path=published, working_path=str(tmp_path / "working.f16"))
+    assert store.shared
+    store.put(np.arange(10, 2000), np.resize(vectors, (1990, 8)))
+    store.flush()
+
+    assert not store.shared and store.path == str(tmp_path / "working.f16")
+    assert open(published, 'rb').read() == original
+    np.testing.assert_allclose(store.get([3]), vectors[[3]], atol=1e-3)
@@ -10,10 +10,55 @@ def sample_documents():
 
 def test_generate_answer(sample_documents, mocker):
     """Groq LLM yanıt üretimi testi."""
-    mocker.patch("requests.post", return_value=mocker.Mock(status_code=200, json=lambda: {
+    mocker.patch("requests.Session.post", return_value=mocker.Mock(status_code=200, json=lambda: {
         "response": "Hukuki süreçler mahkemelerde yürütülür."
     }))
 
     generator = AnswerGenerator()
     answer = generator.generate_answer("Hukuki süreçler nedir?", sample_documents)
     assert answer == "Hukuki süreçler mahkemelerde yürütülür."
+
+def test_generate_answer_stream(sample_documents, monkeypatch):
+    """Akış modunda yanıt, yerel SSE sunucusundan parça parça gelmeli."""
+    from src.mock_llm_server import MockLLMServer
+
+    with MockLLMServer(response="Dava süreçleri kanunlarla belirlenmiştir.") as server:
+        monkeypatch.setenv("GROQ_API_URL", server.url)
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        generator = AnswerGenerator()
+        stream = generator.generate_answer_stream("Dava süreci nedir?", sample_documents)
+        pieces = list(stream)
+
+    assert len(pieces) > 1
+    assert "".join(pieces).strip() == "Dava süreçleri kanunlarla belirlenmiştir."
+    assert server.requests[0]["stream"] is True
+    assert stream.completed
+
+def test_interrupted_stream_is_not_completed(sample_documents, monkeypatch):
+    """Bitiş işareti gelmeden kesilen akış tamamlanmış sayılmamalı (kısmi yanıt önbelleğe yazılmaz)."""
+    from src.mock_llm_server import MockLLMServer
+
+    with MockLLMServer(response="Dava süreçleri kanunlarla belirlenmiştir.", cut_stream_after=2) as server:
+        monkeypatch.setenv("GROQ_API_URL", server.url)
+        monkeypatch.setenv("GROQ_API_KEY", "test-key")
+        generator = AnswerGenerator()
+        stream = generator.generate_answer_stream("Dava süreci nedir?", sample_documents)
+        pieces = list(stream)
+        assert "".join(pieces).strip() == "Dava süreçleri"
+        assert not stream.completed
+
+        stream = generator.generate_answer_stream("Dava süreci nedir?", sample_documents)
+        next(iter(stream))
+        assert not stream.completed  # Okuması yarıda bırakılan akış da tamamlanmamıştır
+
+def test_prompt_is_token_budgeted_with_citations():
+    """Prompt bağlamı token bütçesini aşmamalı ve numaralı kaynakları içermeli."""
+    from src.context_packer import ContextPacker
+
+    long_passage = "Kira bedeli her yıl artırılır. " * 200
+    documents = [("kira.txt#0-6200", long_passage, 0.9), ("dava.txt", "Dava süreçleri kanunlarla belirlenmiştir.", 0.8)]
+    generator = AnswerGenerator(client=object(), context_packer=ContextPacker(token_budget=120))
+    prompt = generator._prepare_prompt("Kira bedeli nasıl artırılır?", documents)
+
+    assert "[1] Kaynak: kira.txt#0-6200" in prompt
+    assert len(prompt) < len(long_passage) / 5
@@ -0,0 +1,196 @@
+import os
+import numpy as np
+import pytest
+from src.ingest import IngestPipeline, manifest_path_for
+from src.preprocess import DocumentPreprocessor
+from src.vectorizer import DocumentVectorizer
+from src.passage_store import PassageStore
+from src.snapshot import current_snapshot
+
+class FailingVectorizer:
+    """Kaydı başarısız olan, pasajları yalnızca sayan vektörleştirici."""
+
+    vector_store = 'faiss'
+    root = "index"
+
+    def snapshot_file(self, name):
+        return None
+
+    def load(self):
+        return False
+
+    def remove_documents(self, doc_ids):
+        return 0
+
+    def add_chunks(self, chunks):
+        return sum(1 for _ in chunks)
+
+    def persist(self, side_files=None):
+        raise OSError("disk dolu")
+
+def test_manifest_is_not_saved_when_persist_fails(tmpdir):
+    """Dizin kaydedilemezse manifesto yazılmamalı; sonraki alım belgeleri yeniden işlemeli."""
+    raw = tmpdir.mkdir("raw")
+    raw.join("a.txt").write("Madde 1 - Kiracı kira bedelini öder.")
+    manifest_path = tmpdir.join("manifest.json")
+    preprocessor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(tmpdir.mkdir("processed")),
+                                        manifest_path=str(manifest_path), max_workers=1)
+    pipeline = IngestPipeline(FailingVectorizer(), preprocessor=preprocessor, lexical_path=None,
+                              passage_path=None)
+
+    with pytest.raises(OSError):
+        pipeline.run()
+    assert not manifest_path.exists()
+    assert preprocessor.process_documents(save_manifest=False)["added"] == ["a.txt"]
+
+def test_passage_staging_is_discarded_when_persist_fails(tmpdir, monkeypatch):
+    """Kayıt başarısız olursa geçici pasaj dosyası kalmamalı; geçici dosya dizinin kökünde açılmalı."""
+    monkeypatch.chdir(tmpdir)
+    raw = tmpdir.mkdir("raw")
+    raw.join("a.txt").write("Madde 1 - Kiracı kira bedelini öder.")
+    preprocessor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(tmpdir.mkdir("processed")),
+                                        max_workers=1)
+    staged = []
+    monkeypatch.setattr(FailingVectorizer, "add_chunks",
+                        lambda self, chunks: staged.extend(os.listdir("index")) or sum(1 for _ in chunks))
+    pipeline = IngestPipeline(FailingVectorizer(), preprocessor=preprocessor, lexical_path=None,
+                              passage_path="models/embeddings/passages.bin")
+
+    with pytest.raises(OSError):
+        pipeline.run()
+    assert staged == ["passages.bin.data.tmp"]
+    assert os.listdir("index") == [] and not tmpdir.join("models").exists()
+
+class CountingVectorizer:
+    """Kayıtlı deposu hep varmış gibi davranan, eklenen pasajları sayan vektörleştirici."""
+
+    def __init__(self, vector_store):
+        self.vector_store = vector_store
+
+    def snapshot_file(self, name):
+        path = os.path.join("snapshot", name)
+        return path if self.vector_store == 'faiss' and os.path.exists(path) else None
+
+    def load(self):
+        return True
+
+    def remove_documents(self, doc_ids):
+        return 0
+
+    def add_chunks(self, chunks):
+        return sum(1 for _ in chunks)
+
+    def persist(self, side_files=None):
+        os.makedirs("snapshot", exist_ok=True)
+        for name, write in (side_files or {}).items():
+            write(os.path.join("snapshot", name))
+
+def test_manifests_are_per_store(tmpdir, monkeypatch):
+    """Bir depoya alınan belge, diğer depoda değişmemiş sayılmamalı."""
+    monkeypatch.chdir(tmpdir)
+    tmpdir.mkdir("data").mkdir("raw").join("a.txt").write("Madde 1 - Kiracı kira bedelini öder.")
+
+    def run(vector_store):
+        return IngestPipeline(CountingVectorizer(vector_store), lexical_path=None, passage_path=None).run()
+
+    assert run('faiss') > 0
+    assert run('chroma') > 0
+    assert run('faiss') == 0
+    assert tmpdir.join(manifest_path_for('chroma')).exists()
+    assert not tmpdir.join(manifest_path_for('faiss')).exists()
+
+def test_side_files_are_published_with_the_index(tmpdir, random_model):
+    """FAISS'te BM25 dizini, pasaj deposu ve manifesto dizinle aynı anlık görüntüde yayımlanmalı."""
+    raw = tmpdir.mkdir("raw")
+    raw.join("a.txt").write("Madde 1 - Kiracı kira bedelini öder.")
+    root, legacy = tmpdir.mkdir("embeddings"), tmpdir.mkdir("legacy")
+
+    def run():
+        preprocessor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(tmpdir.join("processed")),
+                                            manifest_path=str(tmpdir.join("manifest.json")), max_workers=1)
+        vectorizer = DocumentVectorizer(vector_store='faiss', model=random_model, root=str(root))
+        pipeline = IngestPipeline(vectorizer, preprocessor=preprocessor, lexical_path=str(legacy.join("bm25.npz")),
+                                  passage_path=str(legacy.join("passages.bin")))
+        return pipeline.run()
+
+    assert run() == 1
+    first, _ = current_snapshot(str(root))
+    assert {"bm25.npz", "passages.bin", "ingest_manifest.json"} <= set(os.listdir(first))
+    assert legacy.listdir() == [] and not tmpdir.join("manifest.json").exists()
+    assert run() == 0
+
+    raw.join("a.txt").write("Madde 1 - Kiracı kira bedelini her ay öder.")
+    assert run() == 1
+    second, _ = current_snapshot(str(root))
+    assert second != first
+    old, new = PassageStore(os.path.join(first, "passages.bin")), PassageStore(os.path.join(second, "passages.bin"))
+    assert "her ay" not in old.get(old.chunk_ids[0]) and "her ay" in new.get(new.chunk_ids[0])
+
+def test_stale_lexical_index_is_rebuilt_from_passages(tmpdir, monkeypatch):
+    """Eski kök bulucuyla kaydedilmiş BM25 dizini, belgeler yeniden işlenmeden pasaj deposundan kurulmalı."""
+    from src.lexical import BM25Index
+
+    monkeypatch.chdir(tmpdir)
+    tmpdir.mkdir("data").mkdir("raw").join("a.txt").write("Madde 1 - Kiracı kanunun öngördüğü kira bedelini öder.")
+
+    def run():
+        return IngestPipeline(CountingVectorizer('chroma'), lexical_path="bm25.npz", passage_path="passages.bin").run()
+
+    # İlk alım eski kök bulucuyla ("kanunun" -> "kan"); hat modülleri src/ yolundan yüklenir
+    with monkeypatch.context() as patch:
+        patch.setattr("lexical.PROTECTED_STEMS", set())
+        assert run() == 1
+    # Kök bulucu sürümünden önce kaydedilmiş dizin: "stemmer" alanı yok
+    with np.load("bm25.npz") as data:
+        arrays = {name: data[name] for name in data.files if name != "stemmer"}
+    np.savez_compressed("bm25.npz", **arrays)
+    stale = BM25Index.load("bm25.npz")
+    assert stale.stale and stale.search("kanun") == []
+
+    assert run() == 0
+    rebuilt = BM25Index.load("bm25.npz")
+    assert not rebuilt.stale and len(rebuilt) == 1
+    assert rebuilt.search("kanun")[0][0].startswith("a.txt")
+
+def test_side_file_only_changes_are_published(tmpdir, monkeypatch, random_model):
+    """FAISS'te vektörler değişmese de yeniden kurulan BM25 dizini ve tazelenen manifesto yayımlanmalı."""
+    from src.lexical import BM25Index
+
+    raw = tmpdir.mkdir("raw")
+    raw.join("a.txt").write("Madde 1 - Kiracı kanunun öngördüğü kira bedelini öder.")
+    root = tmpdir.mkdir("embeddings")
+
+    def run():
+        preprocessor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(tmpdir.join("processed")),
+                                            manifest_path=str(tmpdir.join("manifest.json")), max_workers=1)
+        vectorizer = DocumentVectorizer(vector_store='faiss', model=random_model, root=str(root))
+        pipeline = IngestPipeline(vectorizer, preprocessor=preprocessor, lexical_path="bm25_index.npz",
+                                  passage_path="passages.bin")
+        return pipeline.run()
+
+    # İlk alım eski kök bulucuyla; dizin sürüm alanı olmadan (eski biçimde) yayımlanmış gibi yapılır
+    with monkeypatch.context() as patch:
+        patch.setattr("lexical.PROTECTED_STEMS", set())
+        assert run() == 1
+    first, _ = current_snapshot(str(root))
+    with np.load(os.path.join(first, "bm25_index.npz")) as data:
+        arrays = {name: data[name] for name in data.files if name != "stemmer"}
+    np.savez_compressed(os.path.join(first, "bm25_index.npz"), **arrays)
+
+    assert run() == 0
+    second, _ = current_snapshot(str(root))
+    rebuilt = BM25Index.load(os.path.join(second, "bm25_index.npz"))
+    assert second != first and not rebuilt.stale and rebuilt.search("kanun")
+
+    # Güncel dizinle değişiklik yoksa yeni anlık görüntü yayımlanmaz
+    assert run() == 0
+    assert current_snapshot(str(root))[0] == second
+
+    # Yalnızca mtime'ı değişen belgenin tazelenen manifesto kaydı da yayımlanmalı
+    os.utime(str(raw.join("a.txt")), (1_000_000_000, 1_000_000_000))
+    assert run() == 0
+    third, _ = current_snapshot(str(root))
+    assert third != second
+    with open(os.path.join(third, "ingest_manifest.json"), encoding='utf-8') as f:
+        assert '1000000000' in f.read()
+    assert not [name for name in os.listdir(str(root)) if name.endswith(".tmp")]
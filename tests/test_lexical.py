@@ -0,0 +1,78 @@
+import pytest
+from src.lexical import (BM25Index, turkish_casefold, tokenize, is_citation_query,
+                         reciprocal_rank_fusion)
+
+@pytest.fixture
+def sample_index():
+    index = BM25Index()
+    index.add("borclar.txt#0-100", "6098 sayılı Türk Borçlar Kanunu. Sözleşme, tarafların iradeleriyle kurulur.")
+    index.add("ceza.txt#0-100", "5237 sayılı Türk Ceza Kanunu. Suç ve cezalarda kanunilik ilkesi.")
+    index.add("medeni.txt#0-100", "4721 sayılı Türk Medeni Kanunu. Herkes haklarını dürüstlük kurallarına uymakla yükümlüdür.")
+    return index
+
+def test_turkish_casefold_and_stemming():
+    """İ/ı dönüşümü doğru yapılmalı; çekimli biçimler aynı köke inmeli."""
+    assert turkish_casefold("İSTANBUL IRMAK") == "istanbul ırmak"
+    assert tokenize("sözleşmenin")[0] == tokenize("Sözleşmeler")[0]
+    assert "6098" in tokenize("6098 sayılı")
+
+def test_exact_law_number_ranks_first(sample_index):
+    """Kanun numarası geçen pasaj ilk sırada dönmeli."""
+    results = sample_index.search("6098 sayılı kanun", top_k=3)
+    assert results[0][0] == "borclar.txt#0-100"
+
+def test_remove_and_persist(sample_index, tmp_path):
+    """Silinen belgeler aramada görünmemeli; kaydedilip yüklenen dizin aynı sonucu vermeli."""
+    sample_index.remove_documents(["ceza.txt"])
+    assert sample_index.search("5237 ceza") == []
+
+    path = str(tmp_path / "bm25_index.npz")
+    sample_index.save(path)
+    loaded = BM25Index.load(path)
+    assert len(loaded) == 2
+    assert loaded.search("dürüstlük kuralları")[0][0] == "medeni.txt#0-100"
+
+    loaded.add("is.txt#0-50", "4857 sayılı İş Kanunu.")
+    assert loaded.search("4857")[0][0] == "is.txt#0-50"
+
+def test_citation_query_and_fusion():
+    """Yalnızca atıf içeren sorgular tanınmalı; RRF iki listede de geçeni öne almalı."""
+    assert is_citation_query("6098 sayılı kanun madde 12")
+    assert not is_citation_query("kira sözleşmesi nasıl feshedilir")
+
+    fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]], top_k=3)
+    assert fused[0][0] == "b"
+
+def test_legal_terms_are_not_overstemmed():
+    """Korunan hukuk terimleri kısa, anlamı farklı köklere ("kan", "kir") inmemeli."""
+    assert tokenize("kanun kanunu kanunun kira kiracı") == ["kanun", "kanun", "kanun", "kira", "kirac"]
+    assert tokenize("maddesi maddelerin kiraların davanın") == ["madde", "madde", "kira", "dava"]
+    assert tokenize("kan kir") == ["kan", "kir"]
+
+def test_index_from_older_stemmer_is_stale(sample_index, tmp_path, monkeypatch):
+    """Farklı kök bulma sürümüyle kaydedilmiş dizin eski (stale) olarak işaretlenmeli."""
+    path = str(tmp_path / "bm25_index.npz")
+    sample_index.save(path)
+    assert not BM25Index.load(path).stale
+
+    monkeypatch.setattr("src.lexical.STEMMER_VERSION", 1)
+    sample_index.save(path)
+    monkeypatch.undo()
+    assert BM25Index.load(path).stale
+
+def test_scoped_search_takes_top_k_among_allowed():
+    """İzin süzgeci verilirse top_k yalnızca izin verilen pasajlardan seçilmeli (geç süzme isabet kaybettirmez)."""
+    index = BM25Index()
+    for i in range(200):
+        index.add(f"buyuk.txt#{i}-{i + 1}", "kira kira kira bedeli")
+    index.add("kucuk.txt#0-1", "kira bedeli ve uzun bir açıklama metni burada yer alır")
+    calls = []
+
+    def allowed(chunk_ids):
+        calls.append(len(chunk_ids))
+        return [chunk_id for chunk_id in chunk_ids if chunk_id.startswith("kucuk")]
+
+    assert "kucuk.txt#0-1" not in [chunk_id for chunk_id, _ in index.search("kira", top_k=5)]
+    assert [chunk_id for chunk_id, _ in index.search("kira", top_k=5, allowed=allowed)] == ["kucuk.txt#0-1"]
+    assert index.search("kira", top_k=3, allowed=lambda ids: ids[:1])[0][0].startswith("buyuk")
+    assert sum(calls) == 201
@@ -0,0 +1,26 @@
+import pytest
+import requests
+from src.llm_client import LLMClient
+from src.mock_llm_server import MockLLMServer
+
+def test_retries_on_server_errors():
+    """503 yanıtlarından sonra istemci yeniden denemeli ve yanıtı almalı."""
+    with MockLLMServer(response="Tamam", fail_first=2) as server:
+        client = LLMClient(server.url, "test-key", max_retries=3, backoff_base=0.01)
+        assert client.generate("Soru?") == "Tamam"
+        assert len(server.requests) == 3
+
+def test_gives_up_after_max_retries():
+    """Denemeler tükenince hata yükseltilmeli."""
+    with MockLLMServer(fail_first=10, fail_status=429) as server:
+        client = LLMClient(server.url, "test-key", max_retries=1, backoff_base=0.01)
+        with pytest.raises(requests.HTTPError):
+            client.generate("Soru?")
+        assert len(server.requests) == 2
+
+def test_generate_many_keeps_order():
+    """Toplu sorular eşzamanlı gönderilmeli ve sonuçlar girdi sırasıyla dönmeli."""
+    with MockLLMServer(response=lambda prompt: prompt.upper(), latency=0.05) as server:
+        client = LLMClient(server.url, "test-key", max_concurrency=4)
+        prompts = [f"soru {i}" for i in range(8)]
+        assert client.generate_many(prompts) == [p.upper() for p in prompts]
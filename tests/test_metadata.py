@@ -0,0 +1,53 @@
+import pytest
+from src.metadata import extract_metadata, normalize_filters, matches, to_chroma_where, parse_date
+
+LAW_TEXT = ("TÜRK BORÇLAR KANUNU\nKanun Numarası: 6098\nKabul Tarihi: 11/1/2011\n"
+            "MADDE 1 - (1) Sözleşme, tarafların iradelerini karşılıklı olarak açıklamalarıyla kurulur.")
+REGULATION_TEXT = ("İŞ SAĞLIĞI VE GÜVENLİĞİ RİSK DEĞERLENDİRMESİ YÖNETMELİĞİ\n"
+                   "Resmî Gazete Tarihi: 29.12.2012\n"
+                   "MADDE 2 - Bu Yönetmelik, 6331 sayılı Kanunun 30 uncu maddesine dayanılarak hazırlanmıştır.")
+
+def test_extract_law_metadata():
+    """Kanun başlığından tür, kanun numarası ve kabul tarihi çıkarılmalı."""
+    metadata = extract_metadata("tbk.pdf", LAW_TEXT)
+    assert metadata == {"source": "tbk.pdf", "title": "TÜRK BORÇLAR KANUNU", "doc_type": "kanun",
+                        "law_number": "6098", "date": 20110111, "year": 2011}
+
+def test_extract_regulation_type_before_cited_law():
+    """Başlıktaki tür, metinde atıf yapılan kanundan önce gelmeli."""
+    metadata = extract_metadata("risk.txt", REGULATION_TEXT)
+    assert metadata["doc_type"] == "yonetmelik"
+    assert metadata["date"] == 20121229
+
+def test_normalize_and_match_filters():
+    """Tekil değer eşitlik, liste `$in` sayılmalı; tarihler karşılaştırılabilir sayıya çevrilmeli."""
+    filters = normalize_filters({"doc_type": "kanun", "law_number": [6098, "4721"],
+                                 "date": {"$gte": "2010-01-01"}})
+    assert filters == {"doc_type": {"$eq": "kanun"}, "law_number": {"$in": ["6098", "4721"]},
+                       "date": {"$gte": 20100101}}
+    metadata = extract_metadata("tbk.pdf", LAW_TEXT)
+    assert matches(metadata, filters)
+    assert not matches(metadata, normalize_filters({"year": {"$lt": 2011}}))
+    assert parse_date("15.01.2020") == parse_date("2020-01-15") == 20200115
+
+def test_missing_field_never_matches():
+    """Değeri olmayan alan `$ne`/`$nin` dahil hiçbir koşulu sağlamamalı (Chroma `where` ile aynı)."""
+    metadata = extract_metadata("tbk.pdf", LAW_TEXT)
+    assert matches(metadata, normalize_filters({"doc_type": {"$ne": "yonetmelik"}}))
+    assert not matches({}, normalize_filters({"doc_type": {"$ne": "yonetmelik"}}))
+    assert not matches({"article": None}, normalize_filters({"article": {"$nin": [1, 2]}}))
+    assert matches({"article": 3}, normalize_filters({"article": {"$nin": [1, 2]}}))
+
+def test_invalid_filters_are_rejected():
+    """Bilinmeyen alan veya operatör hata vermeli."""
+    with pytest.raises(ValueError):
+        normalize_filters({"author": "x"})
+    with pytest.raises(ValueError):
+        normalize_filters({"year": {"$regex": "20.*"}})
+
+def test_chroma_where_translation():
+    """Birden çok koşul `$and`, `$in` ise `$or` eşitlikleriyle ifade edilmeli."""
+    where = to_chroma_where(normalize_filters({"doc_type": "kanun", "article": [1, 2]}))
+    assert where == {"$and": [{"doc_type": {"$eq": "kanun"}},
+                              {"$or": [{"article": {"$eq": 1}}, {"article": {"$eq": 2}}]}]}
+    assert to_chroma_where({}) is None
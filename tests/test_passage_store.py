@@ -0,0 +1,32 @@
+import pytest
+from src.passage_store import PassageStore, PassageStoreWriter
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = str(tmp_path / "passages.bin")
+    writer = PassageStoreWriter(path)
+    writer.add("borclar.txt#0-40", "Sözleşme, tarafların iradeleriyle kurulur.")
+    writer.add("ceza.txt#0-30", "Kanunsuz suç ve ceza olmaz.")
+    writer.commit()
+    return path
+
+def test_passages_read_by_id(store_path):
+    """Pasajlar kimlikle, Türkçe karakterler bozulmadan okunmalı."""
+    store = PassageStore(store_path, cache_size=1)
+    assert len(store) == 2
+    assert store.get("borclar.txt#0-40") == "Sözleşme, tarafların iradeleriyle kurulur."
+    assert store.get("ceza.txt#0-30") == "Kanunsuz suç ve ceza olmaz."
+    assert store.get("yok.txt#0-10") is None
+
+def test_rewrite_keeps_unchanged_passages(store_path):
+    """Yeniden yazımda değişen belgenin pasajları atılmalı, diğerleri korunmalı."""
+    previous = PassageStore(store_path)
+    writer = PassageStoreWriter(store_path)
+    writer.copy_from(previous, exclude_doc_ids=["ceza.txt"])
+    previous.close()
+    writer.add("ceza.txt#0-20", "Cezalar kanunla konur.")
+    writer.commit()
+
+    store = PassageStore(store_path)
+    assert store.chunk_ids == ["borclar.txt#0-40", "ceza.txt#0-20"]
+    assert store.get("ceza.txt#0-20") == "Cezalar kanunla konur."
@@ -1,6 +1,7 @@
 import os
+import time
 import pytest
-from src.preprocess import DocumentPreprocessor
+from src.preprocess import DocumentPreprocessor, read_txt
 
 @pytest.fixture
 def setup_files(tmpdir):
@@ -25,3 +26,142 @@ def test_txt_preprocessing(setup_files):
     with open(processed_path, "r", encoding='utf-8') as f:
         content = f.read()
     assert "Bu bir test dökümanıdır." in content
+
+def test_incremental_processing_with_manifest(tmpdir):
+    """Manifesto ile yalnızca yeni/değişmiş belgeler işlenmeli, silinenler raporlanmalı."""
+    raw = tmpdir.mkdir("raw")
+    processed = tmpdir.mkdir("processed")
+    raw.join("a.txt").write("Birinci belge.")
+    raw.join("b.txt").write("İkinci belge.")
+    manifest_path = str(tmpdir.join("manifest.json"))
+
+    def make_processor():
+        return DocumentPreprocessor(input_folder=str(raw), output_folder=str(processed),
+                                    manifest_path=manifest_path)
+
+    changes = make_processor().process_documents()
+    assert sorted(changes["added"]) == ["a.txt", "b.txt"]
+
+    raw.join("a.txt").write("Birinci belge, güncellendi.")
+    raw.join("b.txt").remove()
+    changes = make_processor().process_documents()
+    assert changes["added"] == []
+    assert changes["modified"] == ["a.txt"]
+    assert changes["removed"] == ["b.txt"]
+    assert not processed.join("b.txt.processed.txt").exists()
+    assert "güncellendi" in processed.join("a.txt.processed.txt").read_text("utf-8")
+
+def test_parallel_processing_isolates_errors(tmpdir):
+    """Paralel çıkarımda okunamayan dosya atlanmalı, diğerleri işlenmeli."""
+    raw = tmpdir.mkdir("raw")
+    processed = tmpdir.mkdir("processed")
+    for i in range(4):
+        raw.join(f"belge_{i}.txt").write(f"Belge {i} metni.")
+    raw.join("bozuk.txt").write_binary(b"\xff\xfe\xfa")
+
+    processor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(processed),
+                                     max_workers=2, file_timeout=30)
+    processor.process_documents()
+
+    assert sorted(p.basename for p in processed.listdir()) == [
+        f"belge_{i}.txt.processed.txt" for i in range(4)
+    ]
+
+def test_manifest_update_is_deferred(tmpdir):
+    """save_manifest=False ile manifesto yazılmamalı; güncelleme commit_manifest ile uygulanmalı."""
+    raw = tmpdir.mkdir("raw")
+    raw.join("a.txt").write("Birinci belge.")
+    manifest_path = tmpdir.join("manifest.json")
+    processor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(tmpdir.mkdir("processed")),
+                                     manifest_path=str(manifest_path))
+
+    changes = processor.process_documents(save_manifest=False)
+    assert changes["added"] == ["a.txt"]
+    assert not manifest_path.exists() and processor.manifest.entries == {}
+
+    processor.commit_manifest(changes["manifest_update"])
+    assert manifest_path.exists() and list(processor.manifest.entries) == ["a.txt"]
+
+def test_failed_modified_file_drops_old_text(tmpdir):
+    """Değişmiş belge çıkarılamazsa eski işlenmiş metni kalmamalı; manifesto kaydı güncellenmemeli."""
+    raw, processed = tmpdir.mkdir("raw"), tmpdir.mkdir("processed")
+    raw.join("a.txt").write("Eski metin.")
+    processor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(processed),
+                                     manifest_path=str(tmpdir.join("manifest.json")), max_workers=1)
+    processor.process_documents()
+    assert processed.join("a.txt.processed.txt").exists()
+
+    raw.join("a.txt").write_binary(b"\xff\xfe\xfa")
+    assert processor.process_documents()["modified"] == ["a.txt"]
+    assert processed.listdir() == []
+    assert processor.process_documents()["modified"] == ["a.txt"]
+
+def hanging_reader(file_path):
+    """Adında "takili" geçen dosyada takılan okuyucu."""
+    if "takili" in file_path:
+        time.sleep(60)
+    return read_txt(file_path)
+
+@pytest.mark.parametrize("max_workers, names", [
+    (1, ["takili.txt", "belge_0.txt", "belge_1.txt", "belge_2.txt"]),
+    (2, ["takili.txt", "belge_0.txt", "belge_1.txt", "belge_2.txt"]),
+    (4, ["takili.txt"]),
+])
+def test_timeout_frees_the_worker(tmpdir, monkeypatch, max_workers, names):
+    """Takılan dosya süre sınırında sonlandırılmalı, diğer dosyalar kendi süreleriyle işlenmeli (tek görevde de)."""
+    monkeypatch.setattr("src.preprocess.read_txt", hanging_reader)
+    raw, processed = tmpdir.mkdir("raw"), tmpdir.mkdir("processed")
+    for name in names:
+        raw.join(name).write(f"{name} metni.")
+
+    processor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(processed),
+                                     max_workers=max_workers, file_timeout=1)
+    start = time.monotonic()
+    processor.process_documents()
+
+    assert time.monotonic() - start < 10
+    assert sorted(p.basename for p in processed.listdir()) == sorted(
+        f"{name}.processed.txt" for name in names if name != "takili.txt")
+
+def crashing_reader(file_path):
+    """Adında "cokuk" geçen dosyada süreci aniden sonlandıran okuyucu (ör. bozuk PDF'te çöken kütüphane)."""
+    if "cokuk" in file_path:
+        os._exit(1)
+    return read_txt(file_path)
+
+def test_crashed_worker_is_detected_immediately(tmpdir, monkeypatch):
+    """Çöken çıkarıcı süreç zaman aşımını beklemeden fark edilmeli; diğer dosyalar işlenmeli."""
+    monkeypatch.setattr("src.preprocess.read_txt", crashing_reader)
+    raw, processed = tmpdir.mkdir("raw"), tmpdir.mkdir("processed")
+    for name in ("cokuk.txt", "belge_0.txt", "belge_1.txt"):
+        raw.join(name).write(f"{name} metni.")
+
+    processor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(processed),
+                                     max_workers=2, file_timeout=30)
+    start = time.monotonic()
+    processor.process_documents()
+
+    assert time.monotonic() - start < 10
+    assert sorted(p.basename for p in processed.listdir()) == ["belge_0.txt.processed.txt",
+                                                                "belge_1.txt.processed.txt"]
+
+def pid_reader(file_path):
+    """Metin yerine dosyayı okuyan sürecin kimliğini döndüren okuyucu; "takili" dosyada takılır."""
+    if "takili" in file_path:
+        time.sleep(60)
+    return str(os.getpid())
+
+def test_workers_are_reused(tmpdir, monkeypatch):
+    """Çıkarıcı süreçler dosyadan dosyaya yeniden kullanılmalı; yalnızca takılanın yerine yenisi açılmalı."""
+    monkeypatch.setattr("src.preprocess.read_txt", pid_reader)
+    raw, processed = tmpdir.mkdir("raw"), tmpdir.mkdir("processed")
+    for name in ["takili.txt"] + [f"belge_{i}.txt" for i in range(8)]:
+        raw.join(name).write("metin")
+
+    processor = DocumentPreprocessor(input_folder=str(raw), output_folder=str(processed),
+                                     max_workers=2, file_timeout=1)
+    processor.process_documents()
+
+    pids = {path.read() for path in processed.listdir()}
+    assert len(processed.listdir()) == 8
+    assert len(pids) <= 2
@@ -0,0 +1,82 @@
+import numpy as np
+from src.query_cache import QueryCache, normalize_query
+from src.retriever import DocumentRetriever
+
+class FakeVectorizer:
+    """Arama çağrılarını sayan, sürümü elle değiştirilebilen vektörleştirici."""
+
+    def __init__(self):
+        self.index_version = "v1"
+        self.searches = []
+
+    def search_many(self, queries, top_k=5, query_vectors=None):
+        self.searches.append(list(queries))
+        return [[(f"{query}.txt#0-10", 0.1)] for query in queries]
+
+    def search(self, query, top_k=5, query_vector=None):
+        return self.search_many([query], top_k=top_k)[0]
+
+class FakePassageStore:
+    def get(self, chunk_id):
+        return f"{chunk_id} içeriği"
+
+def test_turkish_normalization():
+    """Büyük/küçük harf Türkçe kurallarıyla, noktalama ve boşluklar sadeleştirilerek eşlenmeli."""
+    assert normalize_query("  İŞÇİ   hakları NEDİR? ") == normalize_query("işçi hakları nedir") == "işçi hakları nedir"
+    assert normalize_query("KIRA") == "kıra" != normalize_query("kira")
+
+def test_repeated_queries_skip_encoder():
+    """Aynı sorgu yeniden kodlanmamalı; toplu çağrıda yalnızca ıskalanan farklı sorgular kodlanmalı."""
+    cache = QueryCache()
+    encoded = []
+    encode_batch = lambda texts: encoded.extend(texts) or np.ones((len(texts), 3))
+
+    cache.embed("Kira bedeli nedir?", lambda text: encode_batch([text])[0])
+    vectors = cache.embed_many(["kira bedeli nedir", "İhbar süresi", "ihbar süresi!"], encode_batch)
+
+    assert vectors.shape == (3, 3)
+    assert encoded == ["Kira bedeli nedir?", "İhbar süresi"]
+    stats = cache.stats()["embedding"]
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+    assert stats["saved_ms"] >= 0 and stats["entries"] == 2
+
+def test_results_are_tagged_with_index_version():
+    """Sonuçlar aynı sürümde önbellekten gelmeli; dizin değişince yeniden aranmalı."""
+    vectorizer = FakeVectorizer()
+    cache = QueryCache()
+    retriever = DocumentRetriever(vectorizer=vectorizer, top_k=1, passage_store=FakePassageStore(),
+                                  query_cache=cache)
+
+    first = retriever.retrieve("Kira bedeli?")
+    assert retriever.retrieve("kira bedeli") == first
+    assert retriever.retrieve_many(["KİRA BEDELİ", "fesih"]) == [first, [("fesih.txt#0-10", "fesih.txt#0-10 içeriği", 0.1)]]
+    assert vectorizer.searches == [["Kira bedeli?"], ["fesih"]]
+
+    vectorizer.index_version = "v2"
+    retriever.retrieve("kira bedeli")
+    assert len(vectorizer.searches) == 3
+    assert cache.stats()["results"]["hit_ratio"] == 2 / 5
+
+def test_lru_bound():
+    """Kapasite aşılınca en uzun süredir kullanılmayan kayıt atılmalı."""
+    cache = QueryCache(max_embeddings=2)
+    for query in ("a", "b", "a", "c"):
+        cache.embed(query, lambda text: np.zeros(2))
+    assert cache.stats()["embedding"]["entries"] == 2
+    assert cache.stats()["embedding"]["hits"] == 1
+    cache.embed("b", lambda text: np.zeros(2))
+    assert cache.stats()["embedding"]["misses"] == 4
+
+def test_results_are_kept_per_vector_store():
+    """Aynı sorgu farklı depolarda ayrı anahtar almalı; depolar arası geçiş diğerinin sonucunu ezmemeli."""
+    cache = QueryCache()
+    faiss, chroma = FakeVectorizer(), FakeVectorizer()
+    faiss.vector_store, chroma.vector_store = "faiss", "chroma"
+    chroma.index_version = "c1"
+    retrievers = [DocumentRetriever(vectorizer=vectorizer, top_k=1, passage_store=FakePassageStore(),
+                                    query_cache=cache) for vectorizer in (faiss, chroma, faiss, chroma)]
+
+    for retriever in retrievers:
+        retriever.retrieve("Kira bedeli?")
+    assert len(faiss.searches) == len(chroma.searches) == 1
+    assert cache.stats()["results"]["entries"] == 2
@@ -0,0 +1,98 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from src.query_service import QueryService
+from src.generator import AnswerGenerator
+from src.llm_client import LLMClient
+from src.mock_llm_server import MockLLMServer
+
+class FakeRetriever:
+    """Her `retrieve_many` çağrısının toplu iş boyutunu kaydeden getirici."""
+
+    def __init__(self, delay=0.0, gate=None):
+        self.delay = delay
+        self.gate = gate
+        self.batches = []
+        self.filters = []
+        self.started = threading.Event()
+
+    def retrieve_many(self, queries, filters=None):
+        if filters:
+            self.filters.append(filters)
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        self.batches.append(len(queries))
+        return [[(f"{query}.txt#0-10", f"{query} içeriği", 0.9)] for query in queries]
+
+def _post(service, path, payload):
+    return requests.post(f"{service.url}{path}", json=payload, timeout=10)
+
+def test_concurrent_queries_are_micro_batched():
+    """Eşzamanlı sorgular tek `retrieve_many` çağrılarında toplanmalı, sonuçlar doğru isteğe dönmeli."""
+    retriever = FakeRetriever(delay=0.02)
+    with QueryService(retriever, port=0, max_wait_ms=20) as service:
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            responses = list(pool.map(lambda i: _post(service, "/search", {"query": f"soru{i}"}), range(16)))
+
+    assert all(response.status_code == 200 for response in responses)
+    for i, response in enumerate(responses):
+        assert response.json()["results"][0]["chunk_id"] == f"soru{i}.txt#0-10"
+    assert sum(retriever.batches) == 16
+    assert len(retriever.batches) < 16
+    assert max(retriever.batches) > 1
+
+def test_full_queue_is_rejected_with_503():
+    """Kuyruk doluyken gelen istek beklemeden 503 ve Retry-After ile reddedilmeli."""
+    gate = threading.Event()
+    retriever = FakeRetriever(gate=gate)
+    with QueryService(retriever, port=0, max_batch_size=1, max_wait_ms=0, max_queue=2) as service:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            first = pool.submit(_post, service, "/search", {"query": "a"})
+            assert retriever.started.wait(5)
+            queued = [pool.submit(_post, service, "/search", {"query": q}) for q in ("b", "c")]
+            while service.batcher.queued < 2:
+                time.sleep(0.01)
+            rejected = _post(service, "/search", {"query": "d"})
+            gate.set()
+            statuses = [first.result().status_code] + [future.result().status_code for future in queued]
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert statuses == [200, 200, 200]
+
+def test_request_deadline_returns_504():
+    """İstek süresi sonuç hazır olmadan dolarsa 504 dönmeli."""
+    with QueryService(FakeRetriever(delay=0.3), port=0) as service:
+        response = _post(service, "/search", {"query": "yavaş", "timeout_ms": 50})
+    assert response.status_code == 504
+
+def test_ask_generates_answer_with_retrieved_context():
+    """`/ask` getirilen pasajlarla LLM'den yanıt üretmeli; üretici yoksa 501 dönmeli."""
+    with MockLLMServer(response="Kira her ay ödenir. [1]") as llm:
+        generator = AnswerGenerator(client=LLMClient(llm.url, "test"))
+        with QueryService(FakeRetriever(), generator=generator, port=0) as service:
+            response = _post(service, "/ask", {"query": "kira"})
+            invalid = _post(service, "/ask", {"soru": "kira"})
+
+    assert response.status_code == 200
+    assert response.json()["answer"] == "Kira her ay ödenir. [1]"
+    assert "kira içeriği" in llm.requests[0]["prompt"]
+    assert invalid.status_code == 400
+
+    with QueryService(FakeRetriever(), port=0) as service:
+        assert _post(service, "/ask", {"query": "kira"}).status_code == 501
+        assert requests.get(f"{service.url}/health", timeout=5).json()["status"] == "ok"
+
+def test_search_filters_are_validated_and_forwarded():
+    """Filtreler normalize edilip getiriciye iletilmeli; geçersiz filtre 400 dönmeli."""
+    retriever = FakeRetriever()
+    with QueryService(retriever, port=0) as service:
+        response = _post(service, "/search", {"query": "kira", "filters": {"doc_type": "kanun", "year": 2011}})
+        invalid = _post(service, "/search", {"query": "kira", "filters": {"yazar": "x"}})
+
+    assert response.status_code == 200
+    assert retriever.filters == [{"doc_type": {"$eq": "kanun"}, "year": {"$eq": 2011}}]
+    assert invalid.status_code == 400
@@ -0,0 +1,42 @@
+import time
+import pytest
+from src.reranker import CrossEncoderReranker
+
+class KeywordModel:
+    """Pasajda sorgu kelimesi geçiyorsa yüksek skor veren basit çapraz kodlayıcı taklidi."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=16, show_progress_bar=False):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [float(query.split()[0] in passage) for query, passage in pairs]
+
+@pytest.fixture
+def candidates():
+    return [
+        ("a.txt#0-10", "Dava zamanaşımı", 0.1),
+        ("b.txt#0-10", "Kira sözleşmesi feshi", 0.2),
+        ("c.txt#0-10", "Miras paylaşımı", 0.3),
+    ]
+
+def test_rerank_orders_by_cross_encoder_and_caches(candidates):
+    """En alakalı pasaj öne alınmalı; aynı soru ikinci kez modele gitmemeli."""
+    model = KeywordModel()
+    reranker = CrossEncoderReranker(batch_size=2, model=model)
+
+    results = reranker.rerank("Kira bedeli", candidates, top_k=2)
+    assert [r[0] for r in results] == ["b.txt#0-10", "a.txt#0-10"]
+
+    calls = model.calls
+    reranker.rerank("Kira bedeli", candidates, top_k=2)
+    assert model.calls == calls
+
+def test_time_budget_keeps_first_stage_order(candidates):
+    """Bütçe aşılınca skorlanmayan adaylar ilk aşama sırasıyla dönmeli."""
+    reranker = CrossEncoderReranker(batch_size=1, time_budget=0.01, model=KeywordModel(delay=0.05))
+    results = reranker.rerank("Miras", candidates, top_k=3)
+
+    assert [r[0] for r in results] == ["a.txt#0-10", "b.txt#0-10", "c.txt#0-10"]
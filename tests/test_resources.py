@@ -0,0 +1,61 @@
+import threading
+from src.resources import ResourceManager
+
+def test_model_and_index_are_shared():
+    """Model ve yüklenmiş dizin, getiriciler arasında bir kez yüklenip paylaşılmalı."""
+    manager = ResourceManager()
+    first = manager.get_retriever(vector_store='faiss', top_k=3)
+    second = manager.get_retriever(vector_store='faiss', top_k=5)
+
+    assert first.vectorizer is second.vectorizer
+    assert manager.new_vectorizer('faiss').model is first.vectorizer.model
+
+def test_embedding_cache_is_shared(tmpdir):
+    """Sorgu ve alım vektörleştiricileri aynı gömme önbelleği örneğini kullanmalı."""
+    manager = ResourceManager({"vectorization": {"embedding_cache_dir": str(tmpdir)}})
+    cache = manager.get_embedding_cache()
+
+    assert cache is not None
+    assert manager.new_vectorizer('faiss').embedding_cache is cache
+    assert manager.ingest_vectorizer('faiss').embedding_cache is cache
+
+class SlowVectorizer:
+    """Yüklemesi verilen olay gelene kadar bekleyen, sürümü elle değiştirilebilen vektörleştirici."""
+
+    def __init__(self, published, release=None):
+        self.published = published
+        self.index_version = None
+        self.release = release
+        self.loading = threading.Event()
+
+    def published_version(self):
+        return self.published["version"]
+
+    def load(self, mmap=False):
+        self.loading.set()
+        if self.release is not None:
+            self.release.wait(5)
+        self.index_version = self.published["version"]
+        return True
+
+def test_swap_loads_outside_the_lock():
+    """Yeni sürüm yüklenirken diğer çağrılar beklemeden eski dizini almalı; yükleme bitince yenisine geçilmeli."""
+    published, release = {"version": "v1"}, threading.Event()
+    manager = ResourceManager(check_interval=0)
+    created = []
+    manager.new_vectorizer = lambda vector_store='faiss': created.append(
+        SlowVectorizer(published, release if created else None)) or created[-1]
+    old = manager.get_vectorizer()
+
+    published["version"] = "v2"
+    swapper = threading.Thread(target=manager.get_vectorizer)
+    swapper.start()
+    while len(created) < 2 or not created[1].loading.wait(0.01):
+        pass
+    assert manager.get_vectorizer() is old
+    assert len(created) == 2
+
+    release.set()
+    swapper.join(5)
+    assert manager.get_vectorizer() is created[1]
+    assert created[1].index_version == "v2"
@@ -15,3 +15,29 @@ def test_document_retrieval(sample_documents):
     
     assert len(results) > 0
     assert "document_1" in [doc[0] for doc in results]
+
+class ScopedVectorizer:
+    """Yoğun arama sonucu vermeyen, koleksiyonu dosya adının önekinden belirleyen vektörleştirici."""
+
+    index_version = "v1"
+
+    def shard_of(self, chunk_id):
+        return chunk_id.split("_")[0]
+
+    def filter_chunk_ids(self, chunk_ids, filters):
+        return [chunk_id for chunk_id in chunk_ids if chunk_id.endswith(f"#{filters['article']}-9")]
+
+def test_lexical_search_is_scoped_before_top_k():
+    """Koleksiyon ve filtre kısıtı BM25'in top_k kesiminden önce uygulanmalı."""
+    from src.lexical import BM25Index
+
+    index = BM25Index()
+    for i in range(50):
+        index.add(f"ceza_{i}.txt#{i % 3}-9", "6098 sayılı kanun madde 12 kira kira")
+    index.add("borclar_tbk.txt#2-9", "6098 sayılı kanun madde 12 hükümleri saklıdır ve uygulanır")
+    retriever = DocumentRetriever(vectorizer=ScopedVectorizer(), lexical_index=index, top_k=2)
+
+    hits = retriever._lexical_search("6098 sayılı kanun madde 12", 2, collections=["borclar"])
+    assert [chunk_id for chunk_id, _ in hits] == ["borclar_tbk.txt#2-9"]
+    hits = retriever._lexical_search("6098 sayılı kanun madde 12", 2, filters={"article": 1})
+    assert len(hits) == 2 and all(chunk_id.endswith("#1-9") for chunk_id, _ in hits)
@@ -0,0 +1,102 @@
+import pytest
+from pathlib import Path
+from src.sharded_index import ShardedVectorizer
+from src.vectorizer import DocumentVectorizer
+
+DOCUMENTS = [
+    ("tbk.txt#0-60", "Sözleşme, tarafların iradelerini karşılıklı ve birbirine uygun açıklamasıyla kurulur."),
+    ("tbk.txt#60-120", "Kira sözleşmesinde kiracı, kira bedelini zamanında ödemekle yükümlüdür."),
+    ("tck.txt#0-50", "Kasten öldürme suçunu işleyen kişi ağırlaştırılmış müebbet hapis cezası alır."),
+    ("tck.txt#50-90", "Hırsızlık suçu, başkasına ait taşınır malın izinsiz alınmasıdır."),
+    ("kvkk.txt#0-40", "Kişisel veriler, ilgili kişinin açık rızası olmadan işlenemez."),
+]
+
+@pytest.fixture
+def sharded(tmp_path):
+    return ShardedVectorizer(shard_by='collection', collections={"borclar": ["tbk*"], "ceza": ["tck*"]},
+                             root=str(tmp_path / "shards"))
+
+def test_documents_are_routed_to_collection_shards(sharded):
+    """Bir belgenin tüm pasajları kendi koleksiyon parçasına, eşleşmeyenler `default` parçasına gitmeli."""
+    sharded.add_documents(DOCUMENTS)
+    assert sharded.stats() == {"borclar": 2, "ceza": 2, "default": 1}
+    assert sharded.shard_of("tck.txt#50-90") == "ceza"
+
+def test_fan_out_search_matches_single_index(sharded):
+    """Tüm parçalarda aranan sonuçlar, tek dizindeki kesin aramayla aynı sırada olmalı."""
+    sharded.add_documents(DOCUMENTS)
+    single = DocumentVectorizer(vector_store='faiss', model=sharded.model, root=str(sharded.root) + "_single")
+    single.add_documents(DOCUMENTS)
+
+    queries = ["kira bedeli ödemesi", "hırsızlık cezası", "kişisel verilerin işlenmesi"]
+    merged = sharded.search_many(queries, top_k=3)
+    expected = single.search_many(queries, top_k=3)
+    assert [[chunk_id for chunk_id, _ in hits] for hits in merged] == \
+           [[chunk_id for chunk_id, _ in hits] for hits in expected]
+
+def test_collection_restricted_search_touches_one_shard(sharded, monkeypatch):
+    """Koleksiyonla sınırlanan sorgu yalnızca o parçada aranmalı."""
+    sharded.add_documents(DOCUMENTS)
+    touched = []
+    for name, shard in sharded.shards.items():
+        original = shard._search_vectors
+        monkeypatch.setattr(shard, "_search_vectors",
+                            lambda *args, name=name, original=original: touched.append(name) or original(*args))
+
+    results = sharded.search("suç ve ceza", top_k=5, collections=["ceza"])
+    assert touched == ["ceza"]
+    assert {chunk_id.split("#")[0] for chunk_id, _ in results} == {"tck.txt"}
+    with pytest.raises(ValueError):
+        sharded.search("suç", collections=["idare"])
+
+def test_shards_persist_and_reload_independently(sharded, tmp_path):
+    """Parçalar ayrı anlık görüntüler olarak kaydedilmeli; silme yalnızca ilgili parçayı değiştirmeli."""
+    sharded.add_documents(DOCUMENTS)
+    sharded.persist()
+    versions = {name: shard.index_version for name, shard in sharded.shards.items()}
+
+    sharded.remove_documents(["tck.txt"])
+    sharded.persist()
+    changed = [name for name, shard in sharded.shards.items() if shard.index_version != versions[name]]
+    assert changed == ["ceza"]
+
+    reloaded = ShardedVectorizer(shard_by='collection', collections={"borclar": ["tbk*"], "ceza": ["tck*"]},
+                                 root=str(tmp_path / "shards"), model=sharded.model)
+    assert reloaded.load()
+    assert reloaded.stats() == {"borclar": 2, "ceza": 0, "default": 1}
+    assert reloaded.index_version == sharded.index_version == reloaded.published_version()
+
+def test_filters_are_pushed_into_every_shard(sharded):
+    """Meta veri filtresi her parçanın aramasına uygulanmalı."""
+    metadata = {"tbk": {"doc_type": "kanun", "law_number": "6098"}, "tck": {"doc_type": "kanun", "law_number": "5237"},
+                "kvkk": {"doc_type": "kanun", "law_number": "6698"}}
+    sharded.add_documents([(chunk_id, text, metadata[chunk_id.split(".")[0]]) for chunk_id, text in DOCUMENTS])
+
+    results = sharded.search("suç ve sözleşme", top_k=5, filters={"law_number": ["5237", "6698"]})
+    assert {chunk_id.split("#")[0] for chunk_id, _ in results} == {"tck.txt", "kvkk.txt"}
+    assert sharded.filter_chunk_ids(["tbk.txt#0-60", "tck.txt#0-50"], {"law_number": "5237"}) == ["tck.txt#0-50"]
+
+def test_side_files_follow_shard_versions(sharded, tmp_path):
+    """Ortak yan dosyalar parça sürümleriyle yayımlanmalı; yetişmemiş anlık görüntü yeni sürüm sayılmamalı."""
+    sharded.add_documents(DOCUMENTS)
+    write = lambda text: lambda path: Path(path).write_text(text)
+    sharded.persist(side_files={"bm25_index.npz": write("v1")})
+
+    reloaded = ShardedVectorizer(shard_by='collection', collections={"borclar": ["tbk*"], "ceza": ["tck*"]},
+                                 root=str(tmp_path / "shards"), model=sharded.model)
+    assert reloaded.load()
+    assert Path(reloaded.snapshot_file("bm25_index.npz")).read_text() == "v1"
+
+    # Parça yayımlandı ama ortak anlık görüntü henüz yazılmadı: okuyucu yüklü sürümde kalmalı
+    sharded.remove_documents(["tck.txt"])
+    sharded.shards["ceza"].persist()
+    assert reloaded.published_version() == reloaded.index_version
+    sharded.persist(side_files={"bm25_index.npz": write("v2")})
+    assert reloaded.published_version() == sharded.index_version != reloaded.index_version
+
+    # Parçalar değişmeden yalnızca yan dosyalar değişti: yeni ortak sürüm yayımlanmalı
+    reloaded.load()
+    sharded.persist(side_files={"bm25_index.npz": write("v3")})
+    assert reloaded.published_version() == sharded.index_version != reloaded.index_version
+    assert reloaded.load() and Path(reloaded.snapshot_file("bm25_index.npz")).read_text() == "v3"
+    assert reloaded.index_version == sharded.index_version
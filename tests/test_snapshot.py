@@ -0,0 +1,73 @@
+import os
+import numpy as np
+from src.snapshot import MetadataStore, MetadataMap, publish_snapshot, current_snapshot, current_version
+
+def _writer(content):
+    def write_files(directory):
+        with open(os.path.join(directory, "index.bin"), 'w') as f:
+            f.write(content)
+    return write_files
+
+def test_metadata_store_keeps_commas_and_offsets(tmp_path):
+    """Virgül içeren kimlikler bozulmadan okunmalı; belge dizini üzerinden arama yapılabilmeli."""
+    path = str(tmp_path / "metadata.sqlite")
+    doc_map = {0: "Karar, 2023.pdf#0-120", 1: "Karar, 2023.pdf#120-300", 4: "kanun.txt"}
+    MetadataStore.write(path, doc_map, meta={"next_id": 5})
+
+    store = MetadataStore(path)
+    assert store.read_map() == doc_map
+    assert store.get_meta("next_id") == 5
+    assert sorted(store.vector_ids_for(["Karar, 2023.pdf"])) == [0, 1]
+    assert store.lookup([1, 4]) == {
+        1: {"chunk_id": "Karar, 2023.pdf#120-300", "doc_id": "Karar, 2023.pdf", "start": 120, "end": 300},
+        4: {"chunk_id": "kanun.txt", "doc_id": "kanun.txt", "start": None, "end": None},
+    }
+
+def test_publish_switches_pointer_and_prunes(tmp_path):
+    """Her yayım CURRENT'ı yeni görüntüye çevirmeli; en fazla `keep` görüntü saklanmalı."""
+    root = str(tmp_path)
+    assert current_snapshot(root) is None
+    for version in ("v1", "v2", "v3"):
+        publish_snapshot(version, _writer(version), {"vectors": 1}, root=root, keep=2)
+
+    directory, manifest = current_snapshot(root)
+    assert current_version(root) == "v3"
+    assert manifest["version"] == "v3" and manifest["files"] == {"index.bin": 2}
+    with open(os.path.join(directory, "index.bin")) as f:
+        assert f.read() == "v3"
+    assert sorted(os.listdir(tmp_path / "snapshots")) == ["v2", "v3"]
+
+def test_failed_write_keeps_previous_snapshot(tmp_path):
+    """Yazım yarıda kalırsa yayımlanmış görüntü değişmemeli."""
+    root = str(tmp_path)
+    publish_snapshot("v1", _writer("v1"), {}, root=root)
+
+    def failing(directory):
+        raise IOError("disk dolu")
+    try:
+        publish_snapshot("v2", failing, {}, root=root)
+    except IOError:
+        pass
+    assert current_version(root) == "v1"
+    assert current_snapshot(root)[1]["version"] == "v1"
+
+def test_metadata_map_resolves_without_loading(tmp_path):
+    """Salt okunur görünüm, kimlik matrisini SQLite'tan çözmeli; bulunamayan ve -1 kimlikler None olmalı."""
+    path = str(tmp_path / "metadata.sqlite")
+    MetadataStore.write(path, {0: "a.txt#0-5", 2: "b, c.txt#5-9"})
+    view = MetadataMap(MetadataStore(path))
+
+    assert len(view) == 2 and view[2] == "b, c.txt#5-9" and list(view) == [0, 2]
+    names = view.resolve(np.array([[2, 0, -1], [1, 2, 2]]))
+    assert names.tolist() == [["b, c.txt#5-9", "a.txt#0-5", None], [None, "b, c.txt#5-9", "b, c.txt#5-9"]]
+
+def test_metadata_store_keeps_filter_fields(tmp_path):
+    """Madde numaraları ve belge meta verisi saklanmalı; eski (alansız) depolar boş döndürmeli."""
+    path = str(tmp_path / "metadata.sqlite")
+    MetadataStore.write(path, {0: "tbk.txt#0-50", 1: "tbk.txt#50-90", 2: "tck.txt"},
+                        articles={"tbk.txt#50-90": 2}, documents={"tbk.txt": {"doc_type": "kanun", "year": 2011}})
+    store = MetadataStore(path)
+    assert store.read_articles() == {"tbk.txt#50-90": 2}
+    assert store.read_documents() == {"tbk.txt": {"doc_type": "kanun", "year": 2011}}
+    assert store.filter_columns() == [(0, "tbk.txt", None), (1, "tbk.txt", 2), (2, "tck.txt", None)]
+    assert store.chunk_articles(["tbk.txt#0-50", "tbk.txt#50-90"]) == {"tbk.txt#50-90": 2}
@@ -0,0 +1,47 @@
+import time
+import hashlib
+from src.llm_client import LLMClient
+from src.mock_llm_server import MockLLMServer
+from src.summarizer import MapReduceSummarizer, SummaryCache
+
+def _document(articles=12, changed=None):
+    return "\n".join(f"MADDE {i} - " + f"Kiracı, {i}. madde uyarınca bedeli {'geç' if i == changed else 'zamanında'} öder. " * 30
+                     for i in range(1, articles + 1))
+
+def test_long_document_is_summarized_in_parallel_sections():
+    """Uzun belge bölümlere ayrılmalı, bölümler paralel özetlenip tek özette birleşmeli."""
+    with MockLLMServer(response=lambda prompt: "bölüm özeti", latency=0.1) as server:
+        summarizer = MapReduceSummarizer(LLMClient(server.url, "test", max_concurrency=8),
+                                         section_chars=2000, fan_in=4)
+        sections = summarizer.split_sections(_document())
+        start = time.perf_counter()
+        summary = summarizer.summarize(_document())
+        elapsed = time.perf_counter() - start
+
+    assert summary == "bölüm özeti"
+    assert len(sections) > 4
+    groups = -(-len(sections) // 4)
+    assert groups > 1
+    assert len(server.requests) == len(sections) + groups + 1  # map + gruplar + son birleştirme
+    assert elapsed < 0.1 * len(server.requests) / 2
+
+def test_edited_document_only_resummarizes_changed_sections(tmp_path):
+    """Önbellek diske yazılmalı; düzenlenen belgede yalnızca değişen bölüm ve birleştirmeler yeniden istenmeli."""
+    cache_path = str(tmp_path / "summaries.json")
+    with MockLLMServer(response=lambda prompt: hashlib.md5(prompt.encode()).hexdigest()) as server:
+        client = LLMClient(server.url, "test")
+        MapReduceSummarizer(client, section_chars=2000, fan_in=4, cache=SummaryCache(cache_path)).summarize(_document())
+        first = len(server.requests)
+
+        summarizer = MapReduceSummarizer(client, section_chars=2000, fan_in=4, cache=SummaryCache(cache_path))
+        summarizer.summarize(_document())
+        assert len(server.requests) == first
+
+        summarizer.summarize(_document(changed=3))
+        assert len(server.requests) - first == 1 + 1 + 1  # değişen bölüm + grubu + son birleştirme
+
+def test_short_document_single_call():
+    with MockLLMServer(response="kısa özet") as server:
+        summarizer = MapReduceSummarizer(LLMClient(server.url, "test"))
+        assert summarizer.summarize("MADDE 1 - Kısa bir belge.") == "kısa özet"
+    assert len(server.requests) == 1
@@ -0,0 +1,45 @@
+import json
+import pytest
+from src.tracing import Tracer, NOOP_SPAN
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = Tracer()
+    tracer.configure(enabled=True, trace_file=str(tmp_path / "traces.jsonl"))
+    return tracer
+
+def test_nested_spans_written_as_one_trace(tracer):
+    """Kök aralık bittiğinde alt aralıklarıyla birlikte tek bir JSONL satırı yazılmalı."""
+    with tracer.span("query") as root:
+        with tracer.span("embed", texts=1):
+            tracer.record_cache("embedding", True)
+        with tracer.span("search", top_k=3) as search:
+            search.set(results=2)
+        root.set(results=2)
+
+    with open(tracer.trace_file, encoding="utf-8") as f:
+        trace = json.loads(f.readline())
+    spans = {s["name"]: s for s in trace["spans"]}
+    assert trace["name"] == "query"
+    assert spans["embed"]["parent_id"] == spans["query"]["span_id"]
+    assert spans["embed"]["embedding_cache_hits"] == 1
+    assert spans["search"]["results"] == 2
+
+def test_prometheus_export(tracer):
+    """Aşama süreleri histogram, önbellek istekleri sayaç olarak dışa aktarılmalı."""
+    with tracer.span("search"):
+        tracer.record_cache("answer", False)
+
+    text = tracer.metrics.render()
+    assert 'rag_stage_duration_seconds_count{stage="search"} 1' in text
+    assert 'rag_cache_requests_total{cache="answer",result="miss"} 1' in text
+
+def test_disabled_tracer_is_noop(tmp_path):
+    """İzleme kapalıyken boş aralık dönmeli ve dosya yazılmamalı."""
+    tracer = Tracer()
+    tracer.configure(enabled=False, trace_file=str(tmp_path / "traces.jsonl"))
+    with tracer.span("query") as span:
+        span.set(results=1)
+
+    assert span is NOOP_SPAN
+    assert not (tmp_path / "traces.jsonl").exists()
@@ -1,3 +1,4 @@
+import os
 import pytest
 from src.vectorizer import DocumentVectorizer
 
@@ -22,3 +23,191 @@ def test_chroma_vectorizer(sample_document):
     results = vectorizer.search("hukuki süreçler")
     assert len(results) > 0
     assert results[0][0] == "test_doc"
+
+def test_faiss_bulk_add(sample_document):
+    """Toplu ekleme, bloklara bölünse de tüm belgeleri sırasıyla eklemeli."""
+    vectorizer = DocumentVectorizer(vector_store='faiss', add_block_size=2)
+    documents = [(f"doc_{i}", f"{sample_document} {i}") for i in range(5)]
+    count = vectorizer.add_documents(iter(documents), batch_size=2)
+
+    assert count == 5
+    assert vectorizer.index.ntotal == 5
+    assert [vectorizer.doc_map[i] for i in range(5)] == [d[0] for d in documents]
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "hnsw"])
+def test_faiss_ann_index_remove(sample_document, index_type):
+    """ANN dizinlerinde de silinen belge arama sonuçlarında görünmemeli."""
+    vectorizer = DocumentVectorizer(vector_store='faiss',
+                                    index_config={"type": index_type, "nlist": 2, "train_size": 4})
+    vectorizer.add_documents([(f"doc_{i}", f"{sample_document} {i}") for i in range(6)])
+    vectorizer.remove_documents(["doc_0"])
+
+    results = vectorizer.search("hukuki süreçler", top_k=6)
+    assert "doc_0" not in [doc_id for doc_id, _ in results]
+    assert len(results) == 5
+
+def test_faiss_search_many_matches_single_search(sample_document):
+    """Toplu arama, her sorgu için tekli aramayla aynı sonuçları dönmeli."""
+    vectorizer = DocumentVectorizer(vector_store='faiss')
+    vectorizer.add_documents([(f"doc_{i}", f"{sample_document} {i}") for i in range(5)])
+    vectorizer.remove_documents(["doc_1"])
+    queries = ["hukuki süreçler", "test belgesi", "bilgiler"]
+
+    batched = vectorizer.search_many(queries, top_k=3)
+    assert len(batched) == len(queries)
+    for query, results in zip(queries, batched):
+        assert [doc_id for doc_id, _ in results] == [doc_id for doc_id, _ in vectorizer.search(query, top_k=3)]
+        assert "doc_1" not in [doc_id for doc_id, _ in results]
+
+def test_faiss_compressed_index_rescoring(sample_document, tmp_path, monkeypatch):
+    """PQ kodlu dizin, diskteki tam vektörlerle yeniden skorlandığında en yakın belgeyi bulmalı."""
+    monkeypatch.chdir(tmp_path)
+    vectorizer = DocumentVectorizer(vector_store='faiss',
+                                    index_config={"encoding": "pq", "pq_m": 8, "pq_nbits": 4,
+                                                  "train_size": 16, "rescore_factor": 4})
+    vectorizer.add_documents([(f"doc_{i}", f"{sample_document} {i}") for i in range(20)])
+
+    results = vectorizer.search(f"{sample_document} 7", top_k=3)
+    assert results[0][0] == "doc_7"
+    assert vectorizer.float_store.capacity >= 20
+
+def test_faiss_snapshot_roundtrip(sample_document, tmp_path, monkeypatch):
+    """Kaydedilen anlık görüntü, virgüllü kimlikleri ve silinmiş kimlik sayacını korumalı."""
+    monkeypatch.chdir(tmp_path)
+    vectorizer = DocumentVectorizer(vector_store='faiss')
+    vectorizer.add_documents([("Karar, 2023.txt#0-10", sample_document), ("eski.txt#0-5", "eski belge")])
+    vectorizer.remove_documents(["eski.txt"])
+    vectorizer.persist()
+
+    loaded = DocumentVectorizer(vector_store='faiss')
+    assert loaded.load()
+    assert loaded.doc_map == {0: "Karar, 2023.txt#0-10"}
+    assert loaded.next_id == 2
+    assert loaded.index_version == vectorizer.index_version
+
+def test_faiss_mmap_load_is_read_only(sample_document, tmp_path, monkeypatch):
+    """Bellek eşlemeli yüklenen dizin aynı sonuçları vermeli ve değişikliğe izin vermemeli."""
+    monkeypatch.chdir(tmp_path)
+    vectorizer = DocumentVectorizer(vector_store='faiss', index_config={"type": "hnsw"})
+    vectorizer.add_documents([(f"doc_{i}", f"{sample_document} {i}") for i in range(5)])
+    vectorizer.persist()
+
+    mapped = DocumentVectorizer(vector_store='faiss', index_config={"type": "hnsw"})
+    assert mapped.load(mmap=True) and mapped.read_only
+    assert mapped.search("hukuki süreçler", top_k=3) == vectorizer.search("hukuki süreçler", top_k=3)
+    with pytest.raises(RuntimeError):
+        mapped.add_document("doc_5", sample_document)
+
+@pytest.mark.parametrize("index_config", [None, {"type": "hnsw"}, {"encoding": "pq", "pq_m": 4, "pq_nbits": 2}])
+def test_faiss_filtered_search(sample_document, index_config, tmp_path):
+    """Filtreli aramada yalnızca filtreye uyan pasajlar dönmeli; filtre kayıt/yüklemeden sonra da çalışmalı."""
+    vectorizer = DocumentVectorizer(vector_store='faiss', index_config=index_config, root=str(tmp_path))
+    kanun = {"doc_type": "kanun", "law_number": "6098", "year": 2011}
+    yonetmelik = {"doc_type": "yonetmelik", "year": 2012}
+    vectorizer.add_documents([(f"tbk.txt#{i}-{i + 1}", f"{sample_document} {i}", {**kanun, "article": i})
+                              for i in range(4)] +
+                             [(f"yon.txt#{i}-{i + 1}", f"{sample_document} {i}", {**yonetmelik, "article": i})
+                              for i in range(4)])
+
+    results = vectorizer.search("hukuki süreçler", top_k=8, filters={"doc_type": "yonetmelik"})
+    assert {doc_id.split("#")[0] for doc_id, _ in results} == {"yon.txt"} and len(results) == 4
+    results = vectorizer.search("hukuki süreçler", top_k=8, filters={"law_number": "6098", "article": {"$gte": 2}})
+    assert sorted(doc_id for doc_id, _ in results) == ["tbk.txt#2-3", "tbk.txt#3-4"]
+    assert vectorizer.search("hukuki süreçler", filters={"year": 1999}) == []
+
+    vectorizer.remove_documents(["yon.txt"])
+    vectorizer.persist()
+    reloaded = DocumentVectorizer(vector_store='faiss', index_config=index_config, model=vectorizer.model,
+                                  root=str(tmp_path))
+    for mmap in (False, True):
+        assert reloaded.load(mmap=mmap)
+        results = reloaded.search("hukuki süreçler", top_k=8, filters={"article": [0, 3]})
+        assert sorted(doc_id for doc_id, _ in results) == ["tbk.txt#0-1", "tbk.txt#3-4"]
+        assert reloaded.filter_chunk_ids(["tbk.txt#0-1", "tbk.txt#1-2"], {"article": 1}) == ["tbk.txt#1-2"]
+
+@pytest.mark.parametrize("index_config", [
+    {"type": "flat"},
+    {"type": "flat", "encoding": "sq8"},
+    {"type": "ivf_flat", "nlist": 4, "nprobe": 4, "train_size": 100},
+    {"type": "ivf_pq", "nlist": 4, "nprobe": 4, "pq_m": 8, "pq_nbits": 6, "train_size": 100, "rescore_factor": 8},
+    {"type": "hnsw"},
+])
+def test_remove_keeps_exact_ids(index_config, tmp_path, random_model):
+    """Silmeden sonra her pasaj, kendi metniyle arandığında yine kendi kimliğiyle dönmeli."""
+    vectorizer = DocumentVectorizer(vector_store='faiss', model=random_model, index_config=index_config,
+                                    root=str(tmp_path))
+    chunks = [(f"d{i // 10}.txt#{i}-{i + 1}", f"pasaj {i}") for i in range(200)]
+    vectorizer.add_documents(chunks)
+    vectorizer.remove_documents(["d0.txt", "d5.txt", "d17.txt"])
+
+    kept = [i for i in (1, 50, 150, 199, 12, 60) if i // 10 not in (0, 5, 17)]
+    results = vectorizer.search_many([f"pasaj {i}" for i in kept], top_k=1)
+    assert [hits[0][0] for hits in results] == [chunks[i][0] for i in kept]
+    removed = vectorizer.search_many(["pasaj 1", "pasaj 50"], top_k=200)
+    assert all(not chunk_id.startswith(("d0.", "d5.", "d17.")) for hits in removed for chunk_id, _ in hits)
+
+@pytest.mark.parametrize("encoding", ["float32", "sq8"])
+def test_hnsw_tombstones_are_compacted(encoding, tmp_path, random_model):
+    """HNSW'de silinmişlerin oranı eşiği aşınca dizin yalnızca canlı vektörlerle yeniden kurulmalı."""
+    vectorizer = DocumentVectorizer(vector_store='faiss', model=random_model, root=str(tmp_path),
+                                    index_config={"type": "hnsw", "encoding": encoding, "rescore_factor": 2,
+                                                  "compact_ratio": 0.2})
+    chunks = [(f"d{i // 10}.txt#{i}-{i + 1}", f"pasaj {i}") for i in range(100)]
+    vectorizer.add_documents(chunks)
+
+    vectorizer.remove_documents(["d0.txt"])
+    assert vectorizer.index.ntotal == 100
+    vectorizer.remove_documents(["d1.txt", "d2.txt"])
+    assert vectorizer.index.ntotal == len(vectorizer.doc_map) == 70
+
+    kept = [35, 50, 99]
+    results = vectorizer.search_many([f"pasaj {i}" for i in kept], top_k=1)
+    assert [hits[0][0] for hits in results] == [chunks[i][0] for i in kept]
+    vectorizer.add_documents([("d10.txt#0-1", "yeni pasaj")])
+    assert vectorizer.search("yeni pasaj", top_k=1)[0][0] == "d10.txt#0-1"
+
+def test_flat_fallback_is_temporary(tmp_path, random_model):
+    """Eğitim örneği yetersizken flat'e düşülmeli, ayarlar değişmemeli; yeterli vektörle IVF kurulmalı."""
+    config = {"type": "ivf_flat", "nlist": 8, "nprobe": 8, "train_size": 100}
+    vectorizer = DocumentVectorizer(vector_store='faiss', model=random_model, index_config=config,
+                                    root=str(tmp_path))
+    vectorizer.add_documents([(f"a.txt#{i}-{i + 1}", f"pasaj {i}") for i in range(4)])
+    assert vectorizer.search("pasaj 2", top_k=1)[0][0] == "a.txt#2-3"
+    assert vectorizer.index_config["type"] == 'ivf_flat'
+    assert vectorizer.active_config["type"] == 'flat'
+
+    vectorizer.persist()
+    reloaded = DocumentVectorizer(vector_store='faiss', model=random_model, index_config=config,
+                                  root=str(tmp_path))
+    assert reloaded.load(mmap=True) and reloaded.active_config["type"] == 'flat'
+
+    vectorizer.add_documents([(f"b.txt#{i}-{i + 1}", f"pasaj {i}") for i in range(4, 150)])
+    assert vectorizer.active_config is vectorizer.index_config
+    assert vectorizer.index.is_trained and vectorizer.index.ntotal == 150
+    results = vectorizer.search_many(["pasaj 1", "pasaj 120"], top_k=1)
+    assert [hits[0][0] for hits in results] == ["a.txt#1-2", "b.txt#120-121"]
+
+def test_float_store_is_published_in_snapshot(tmp_path, random_model):
+    """Tam vektörler anlık görüntüye yazılmalı; sonraki eklemeler eski anlık görüntünün okuyucularını bozmamalı."""
+    config = {"type": "flat", "encoding": "sq8", "rescore_factor": 4}
+    writer = DocumentVectorizer(vector_store='faiss', model=random_model, index_config=config, root=str(tmp_path))
+    writer.add_documents([(f"a.txt#{i}-{i + 1}", f"pasaj {i}") for i in range(50)])
+    writer.persist()
+    first = writer.snapshot_dir
+    assert os.path.exists(os.path.join(first, "faiss_vectors.f16"))
+    assert not os.path.exists(os.path.join(str(tmp_path), "faiss_vectors.f16"))
+
+    reader = DocumentVectorizer(vector_store='faiss', model=random_model, index_config=config, root=str(tmp_path))
+    reader.load(mmap=True)
+    assert reader.float_store.path == os.path.join(first, "faiss_vectors.f16")
+
+    published = os.path.join(first, "faiss_vectors.f16")
+    size, content = os.path.getsize(published), open(published, 'rb').read()
+    writer.add_documents([(f"b.txt#{i}-{i + 1}", f"yeni {i}") for i in range(2000)])
+    writer.persist()
+    assert writer.snapshot_dir != first
+    # Yayımlanmış anlık görüntü değişmez; manifestodaki boyut hâlâ doğrudur
+    assert os.path.getsize(published) == size and open(published, 'rb').read() == content
+    assert os.path.exists(os.path.join(writer.snapshot_dir, "faiss_vectors.f16"))
+    assert reader.search("pasaj 7", top_k=1)[0][0] == "a.txt#7-8"
+    assert writer.search("yeni 1500", top_k=1)[0][0] == "b.txt#1500-1501"